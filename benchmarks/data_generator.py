@@ -0,0 +1,151 @@
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+
+from model.auth_service import AuthService
+from model.item_store import ITEM_TYPE_ORDER
+
+logger = logging.getLogger(__name__)
+
+BENCH_USER_PREFIX = 'bench_user_'
+BENCH_PASSWORD = 'bench-password'
+
+# Rough shape of a real collection: mostly movies, series and games, mostly completed.
+ITEM_TYPE_WEIGHTS = {
+    'Movie': 25, 'Series': 15, 'Game': 15, 'Anime': 12, 'Book': 10,
+    'Manga': 8, 'Manhwa': 5, 'Cartoon': 4, 'Manhua': 3, 'Board game': 3,
+}
+STATUS_WEIGHTS = {'Completed': 55, 'Planned': 20, 'In Progress': 12, 'Dropped': 8, 'Ongoing': 5}
+OVERALL_ONLY_SHARE = 0.3        # Items rated with a single Total score instead of criteria
+ALT_NAME_SHARE = 0.25
+REVIEW_SHARE = 0.2
+UPDATED_SHARE = 0.4             # Items edited at least once (updated_at set)
+HISTORY_DAYS = 3 * 365          # created_at is spread over this many days
+
+WORDS = ['shadow', 'river', 'crown', 'silent', 'winter', 'dragon', 'glass', 'iron', 'last', 'city',
+         'moon', 'garden', 'storm', 'hidden', 'star', 'echo', 'blade', 'ember', 'ocean', 'tale',
+         'night', 'golden', 'forest', 'knight', 'legacy', 'signal', 'paper', 'lost', 'wild', 'dream']
+
+INSERT_USERS_SQL = "INSERT INTO users (username, email, password_hash) VALUES %s;"
+INSERT_ITEMS_SQL = """
+    INSERT INTO rated_items (user_id, name, alt_name, item_type, status, review, created_at, updated_at)
+    VALUES %s;
+"""
+INSERT_RATINGS_SQL = "INSERT INTO item_criterion_ratings (item_id, criterion_id, rating) VALUES %s;"
+
+class DataGenerator:
+    """
+    Seeds the database with synthetic users, items and criterion ratings for the benchmarks.
+    The same seed and sizes always produce the same data, so runs can be compared.
+    All generated users are named bench_user_<n> and share BENCH_PASSWORD.
+    """
+
+    def __init__(self, data_model, users=5, items_per_user=2000, ratings_per_item=3, seed=42):
+        self.data_model = data_model    # Link to DatabaseModel
+        self.users = users
+        self.items_per_user = items_per_user
+        self.ratings_per_item = ratings_per_item
+        self.seed = seed
+
+    def generate(self):
+        """Removes earlier benchmark data, seeds a fresh set and returns [(user_id, username)]."""
+        rng = random.Random(self.seed)
+        self.drop()
+
+        # One bcrypt hash for everyone: hashing is deliberately slow and not what is measured here.
+        # Hashed at BCRYPT_ROUNDS so the login benchmark never triggers a rehash.
+        password_hash = AuthService(self.data_model).hash_password(BENCH_PASSWORD)
+        usernames = [f"{BENCH_USER_PREFIX}{n}" for n in range(1, self.users + 1)]
+        self.data_model.execute_values(
+            INSERT_USERS_SQL, [(name, f"{name}@bench.invalid", password_hash) for name in usernames], sensitive=True)
+        rows = self.data_model.execute_query(
+            "SELECT user_id, username FROM users WHERE username = ANY(%s) ORDER BY user_id;",
+            (usernames,), fetch="all")
+        users = [(row[0], row[1]) for row in rows]
+
+        catalog = self.data_model.criteria_catalog
+        catalog.invalidate()
+        overall = catalog.get_overall()
+        criteria_by_type = {
+            item_type: [c['criterion_id'] for c in catalog.get_for_type(item_type) if not c['is_overall']]
+            for item_type in ITEM_TYPE_ORDER
+        }
+
+        now = datetime.now(timezone.utc)
+        for user_id, username in users:
+            with self.data_model.transaction():
+                self.data_model.execute_values(
+                    INSERT_ITEMS_SQL, [self._make_item(rng, user_id, now) for _ in range(self.items_per_user)])
+                items = self.data_model.execute_query(
+                    "SELECT item_id, item_type::text, status::text FROM rated_items WHERE user_id = %s ORDER BY item_id;",
+                    (user_id,), fetch="all")
+
+                ratings = []
+                for item_id, item_type, status in items:
+                    ratings.extend(self._make_ratings(rng, item_id, item_type, status, overall, criteria_by_type))
+                if ratings:
+                    self.data_model.execute_values(INSERT_RATINGS_SQL, ratings)
+            logger.info(f"Seeded {len(items)} items and {len(ratings)} criterion ratings for '{username}'.")
+
+        self.data_model.criterion_ratings_cache.clear()
+        return users
+
+    def existing_users(self):
+        """Returns [(user_id, username)] of the benchmark users already in the database."""
+        rows = self.data_model.execute_query(
+            "SELECT user_id, username FROM users WHERE username LIKE %s ORDER BY user_id;",
+            (self._user_pattern(),), fetch="all")
+        return [(row[0], row[1]) for row in rows]
+
+    def drop(self):
+        """Deletes every benchmark user; their items and ratings go with them (ON DELETE CASCADE)."""
+        self.data_model.execute_query("DELETE FROM users WHERE username LIKE %s;", (self._user_pattern(),))
+        self.data_model.criterion_ratings_cache.clear()
+
+    @staticmethod
+    def _user_pattern():
+        return BENCH_USER_PREFIX.replace('_', r'\_') + '%'
+
+    def make_item_fields(self, rng):
+        """Random (name, alt_name, item_type, status, review) for an item saved through the app code."""
+        return (self._make_name(rng), self._maybe(rng, ALT_NAME_SHARE, self._make_name),
+                self._pick(rng, ITEM_TYPE_WEIGHTS), self._pick(rng, STATUS_WEIGHTS),
+                self._maybe(rng, REVIEW_SHARE, self._make_review))
+
+    def _make_item(self, rng, user_id, now):
+        name, alt_name, item_type, status, review = self.make_item_fields(rng)
+        created_at = now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 24 * 3600))
+        updated_at = None
+        if rng.random() < UPDATED_SHARE:
+            updated_at = created_at + (now - created_at) * rng.random()
+        return user_id, name, alt_name, item_type, status, review, created_at, updated_at
+
+    def _make_ratings(self, rng, item_id, item_type, status, overall, criteria_by_type):
+        if status == 'Planned' or self.ratings_per_item <= 0:
+            return []
+        criteria = criteria_by_type.get(item_type) or []
+        if overall and (not criteria or rng.random() < OVERALL_ONLY_SHARE):
+            return [(item_id, overall['criterion_id'], self._make_rating(rng))]
+        chosen = rng.sample(criteria, min(self.ratings_per_item, len(criteria)))
+        return [(item_id, criterion_id, self._make_rating(rng)) for criterion_id in chosen]
+
+    @staticmethod
+    def _make_rating(rng):
+        """Ratings cluster around 7, in half points between 1 and 10."""
+        return min(10.0, max(1.0, round(rng.gauss(7.0, 1.6) * 2) / 2))
+
+    @staticmethod
+    def _make_name(rng):
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+
+    @staticmethod
+    def _make_review(rng):
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(10, 60))).capitalize() + '.'
+
+    @staticmethod
+    def _maybe(rng, share, make):
+        return make(rng) if rng.random() < share else None
+
+    @staticmethod
+    def _pick(rng, weights):
+        return rng.choices(list(weights), weights=list(weights.values()))[0]
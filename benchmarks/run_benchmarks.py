@@ -0,0 +1,229 @@
+"""
+Times the core database paths of RateSphere against synthetic data and compares the result with a baseline.
+
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --baseline bench.json --tolerance 0.2
+
+Uses the database configured in .env (see README). Run it against a local scratch database:
+the generator deletes and recreates every bench_user_* account.
+Exits with status 1 if any benchmark is slower than the baseline beyond the tolerance.
+"""
+import os
+os.environ.setdefault('KIVY_NO_ARGS', '1')  # Kivy must not parse our command line options
+
+import argparse
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.data_generator import DataGenerator, BENCH_PASSWORD
+from controller.ratings_controller import ITEMS_PAGE_SIZE
+from model.auth_service import AuthService
+from model.database_model import (DatabaseModel, ALLOWED_SORT_COLUMNS, OVERALL_CRITERION_NAME, close_pool,
+                                  initialize_pool)
+
+logger = logging.getLogger('benchmarks')
+
+DEFAULT_TOLERANCE = 0.2     # Allowed slowdown of the median against the baseline (0.2 = 20%)
+DEFAULT_MIN_DELTA_MS = 0.5  # Slowdowns smaller than this are treated as noise
+
+class BenchmarkRunner:
+    """Runs every benchmark against the seeded users and collects timings in milliseconds."""
+
+    def __init__(self, data_model, users, repeat, warmup, seed):
+        self.data_model = data_model    # Link to DatabaseModel
+        self.users = users              # [(user_id, username)] created by DataGenerator
+        self.repeat = repeat
+        self.warmup = warmup
+        self.rng = random.Random(seed)
+        self.results = {}
+        self.auth_service = AuthService(data_model)
+
+    def run_all(self):
+        self.bench_user_items()
+        self.bench_user_statistics()
+        self.bench_criterion_ratings()
+        self.bench_login()
+        self.bench_save_item()
+        return self.results
+
+    def measure(self, name, func):
+        """Calls func() warmup + repeat times and records the timings of the last repeat calls."""
+        for _ in range(self.warmup):
+            func()
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.results[name] = {
+            'runs': len(timings),
+            'min_ms': round(timings[0], 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(timings[min(len(timings) - 1, int(0.95 * len(timings)))], 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'max_ms': round(timings[-1], 3),
+        }
+        logger.info(f"{name}: median {self.results[name]['median_ms']:.2f} ms, p95 {self.results[name]['p95_ms']:.2f} ms")
+
+    def _random_user_id(self):
+        return self.rng.choice(self.users)[0]
+
+    def bench_user_items(self):
+        for column in ALLOWED_SORT_COLUMNS:
+            for order in ('ASC', 'DESC'):
+                self.measure(f"get_user_items[{column} {order}]", lambda: self.data_model.get_user_items(
+                    self._random_user_id(), sort_by=column, sort_order=order, use_dict_cursor=True,
+                    limit=ITEMS_PAGE_SIZE + 1))
+
+    def bench_user_statistics(self):
+        self.measure("get_user_statistics", lambda: self.data_model.get_user_statistics(self._random_user_id()))
+
+    def bench_criterion_ratings(self):
+        item_ids = [row[0] for row in self.data_model.execute_query(
+            "SELECT item_id FROM rated_items WHERE user_id = ANY(%s) ORDER BY item_id;",
+            ([user_id for user_id, _ in self.users],), fetch="all")]
+        cache = self.data_model.criterion_ratings_cache
+
+        def cold():
+            cache.clear()
+            self.data_model.get_criterion_ratings_for_item(self.rng.choice(item_ids))
+
+        self.measure("get_criterion_ratings_for_item[cold]", cold)
+        self.measure("get_criterion_ratings_for_item[cached]",
+                     lambda: self.data_model.get_criterion_ratings_for_item(item_ids[0]))
+
+    def bench_login(self):
+        def login():
+            # The work LoginController.do_login hands to the auth pool (lookup and bcrypt check).
+            username = self.rng.choice(self.users)[1]
+            if not self.auth_service.authenticate(username, BENCH_PASSWORD):
+                raise RuntimeError(f"Benchmark login failed for '{username}'.")
+
+        self.measure("login", login)
+
+    def bench_save_item(self):
+        """DatabaseModel.save_item (the work AddItemController.save_item runs) for new and edited items."""
+        generator = DataGenerator(self.data_model)
+        catalog = self.data_model.criteria_catalog
+        saved_ids = []
+
+        def rating_data(item_type):
+            criteria = catalog.get_for_type(item_type)
+            if not criteria or self.rng.random() < 0.3:
+                return {OVERALL_CRITERION_NAME: 8.0}
+            return {criterion['name']: float(self.rng.randint(1, 10)) for criterion in criteria}
+
+        def add():
+            name, alt_name, item_type, status, review = generator.make_item_fields(self.rng)
+            item = self.data_model.save_item(
+                self._random_user_id(), name, alt_name, item_type, status, review, rating_data(item_type))
+            saved_ids.append(item['item_id'])
+
+        def update():
+            item_id = self.rng.choice(saved_ids)
+            name, alt_name, item_type, status, review = generator.make_item_fields(self.rng)
+            self.data_model.save_item(
+                None, name, alt_name, item_type, status, review, rating_data(item_type), item_id=item_id)
+
+        self.measure("save_item[add]", add)
+        self.measure("save_item[update]", update)
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Returns [(name, baseline median, current median)] for benchmarks that got slower than allowed."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        before, now = previous['median_ms'], current['median_ms']
+        if now > before * (1 + tolerance) and now - before > min_delta_ms:
+            regressions.append((name, before, now))
+    return regressions
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="RateSphere database benchmarks")
+    parser.add_argument('--users', type=int, default=5, help="benchmark users to create")
+    parser.add_argument('--items', type=int, default=2000, help="items per user")
+    parser.add_argument('--ratings', type=int, default=3, help="criterion ratings per rated item")
+    parser.add_argument('--seed', type=int, default=42, help="random seed for data and access patterns")
+    parser.add_argument('--repeat', type=int, default=30, help="timed runs per benchmark")
+    parser.add_argument('--warmup', type=int, default=3, help="untimed runs before each benchmark")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="JSON file of an earlier run to compare with")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed median slowdown against the baseline (0.2 = 20%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="ignore slowdowns smaller than this many milliseconds")
+    parser.add_argument('--reuse-data', action='store_true', help="use the existing bench_user_* data")
+    parser.add_argument('--keep-data', action='store_true', help="do not delete the benchmark data afterwards")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logging.getLogger('model').setLevel(logging.WARNING)
+    logging.getLogger('controller').setLevel(logging.WARNING)
+
+    initialize_pool()
+    data_model = DatabaseModel()
+    generator = DataGenerator(data_model, users=args.users, items_per_user=args.items,
+                              ratings_per_item=args.ratings, seed=args.seed)
+    try:
+        if args.reuse_data:
+            users = generator.existing_users()
+            if not users:
+                logger.error("No benchmark data found; run without --reuse-data first.")
+                return 2
+        else:
+            started = time.perf_counter()
+            users = generator.generate()
+            logger.info(f"Generated benchmark data in {time.perf_counter() - started:.1f}s.")
+
+        runner = BenchmarkRunner(data_model, users, repeat=args.repeat, warmup=args.warmup, seed=args.seed)
+        results = runner.run_all()
+        server_version = data_model.execute_query("SHOW server_version;", fetch="one")[0]
+
+        if not args.keep_data:
+            generator.drop()
+    finally:
+        close_pool()
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'postgresql': server_version,
+        },
+        'parameters': {key: getattr(args, key) for key in ('users', 'items', 'ratings', 'seed', 'repeat', 'warmup')},
+        'results': results,
+        'query_metrics': data_model.query_metrics.snapshot(),
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Results written to {args.output}.")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('parameters') != report['parameters']:
+        logger.warning(f"Baseline was run with different parameters: {baseline.get('parameters')}")
+    regressions = compare(results, baseline.get('results', {}), args.tolerance, args.min_delta_ms)
+    for name, before, now in regressions:
+        logger.error(f"REGRESSION {name}: median {before:.2f} ms -> {now:.2f} ms (+{(now / before - 1) * 100:.0f}%)")
+    if regressions:
+        return 1
+    logger.info(f"No regressions beyond {args.tolerance * 100:.0f}% against {args.baseline}.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
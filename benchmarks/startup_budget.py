@@ -0,0 +1,133 @@
+"""
+Checks the startup time of RateSphere against a budget.
+
+    python -m benchmarks.startup_budget --runs 3 --output startup_summary.json
+    # Or check a report recorded by hand
+    STARTUP_PROFILE=startup.json python main.py
+    python -m benchmarks.startup_budget --report startup.json
+
+Starts main.py --runs times with the startup profiler enabled (STARTUP_PROFILE, see startup_profiler.py);
+each run stops by itself once the first frame is drawn and the database is ready. The median of every
+mark and phase is compared with benchmarks/startup_budget.json (milliseconds).
+Needs a display and the database configured in .env.
+Exits with status 1 if anything is over budget.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+logger = logging.getLogger('benchmarks')
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET = os.path.join(PROJECT_DIR, 'benchmarks', 'startup_budget.json')
+RUN_TIMEOUT = 120   # Seconds before a hanging run is killed
+
+def run_once(timeout=RUN_TIMEOUT):
+    """Starts the app once with the profiler on and returns its report."""
+    fd, report_path = tempfile.mkstemp(prefix='startup-', suffix='.json')
+    os.close(fd)
+    env = dict(os.environ, STARTUP_PROFILE=report_path, STARTUP_PROFILE_EXIT='1', KIVY_NO_ARGS='1')
+    try:
+        subprocess.run([sys.executable, 'main.py'], cwd=PROJECT_DIR, env=env, timeout=timeout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        with open(report_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise RuntimeError(f"The app wrote no startup report ({e}); run it with STARTUP_PROFILE to see why.") from e
+    finally:
+        os.unlink(report_path)
+
+def summarize(reports):
+    """Median over the runs of every mark, phase (summed per run if repeated) and the total import time."""
+    marks, phases, imports = {}, {}, []
+    for report in reports:
+        for name, at in report['marks'].items():
+            marks.setdefault(name, []).append(at)
+        totals = {}
+        for entry in report['phases']:
+            totals[entry['name']] = totals.get(entry['name'], 0.0) + entry['duration_ms']
+        for name, total in totals.items():
+            phases.setdefault(name, []).append(total)
+        imports.append(report['imports']['total_self_ms'])
+    return {
+        'runs': len(reports),
+        'marks': {name: statistics.median(values) for name, values in marks.items()},
+        'phases': {name: statistics.median(values) for name, values in phases.items()},
+        'imports_total_self_ms': statistics.median(imports),
+        'slowest_imports': reports[-1]['imports']['slowest'],
+    }
+
+def check(summary, budget):
+    """Returns [(name, measured ms, budget ms)] for everything over budget; budgeted entries never reached count too."""
+    over = []
+    for section in ('marks', 'phases'):
+        for name, limit in budget.get(section, {}).items():
+            measured = summary[section].get(name)
+            if measured is None:
+                logger.warning(f"'{name}' was not reached in any run.")
+                if section == 'marks':
+                    over.append((name, None, limit))
+            elif measured > limit:
+                over.append((name, measured, limit))
+    limit = budget.get('imports_total_self_ms')
+    if limit is not None and summary['imports_total_self_ms'] > limit:
+        over.append(('imports_total_self_ms', summary['imports_total_self_ms'], limit))
+    return over
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="RateSphere startup time budget")
+    parser.add_argument('--runs', type=int, default=3, help="app starts to take the median of")
+    parser.add_argument('--budget', default=DEFAULT_BUDGET, help="JSON file of budgets in milliseconds")
+    parser.add_argument('--report', action='append',
+                        help="check this existing STARTUP_PROFILE report instead of starting the app (repeatable)")
+    parser.add_argument('--output', help="write the summary to this JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.report:
+        reports = []
+        for path in args.report:
+            with open(path, encoding='utf-8') as f:
+                reports.append(json.load(f))
+    else:
+        reports = []
+        for run in range(1, args.runs + 1):
+            reports.append(run_once())
+            logger.info(f"Run {run}/{args.runs}: first frame at {reports[-1]['marks'].get('first_frame', 0):.0f} ms.")
+    summary = summarize(reports)
+
+    for name, at in sorted(summary['marks'].items(), key=lambda entry: entry[1]):
+        logger.info(f"  {name:<28} at {at:8.1f} ms")
+    for name, duration in sorted(summary['phases'].items(), key=lambda entry: -entry[1]):
+        logger.info(f"  {name:<28} {duration:8.1f} ms")
+    for entry in summary['slowest_imports'][:10]:
+        logger.info(f"  import {entry['module']:<40} {entry['cumulative_ms']:8.1f} ms (self {entry['self_ms']:.1f})")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        logger.info(f"Summary written to {args.output}.")
+
+    with open(args.budget, encoding='utf-8') as f:
+        budget = json.load(f)
+    over = check(summary, budget)
+    for name, measured, limit in over:
+        if measured is None:
+            logger.error(f"OVER BUDGET {name}: never reached (budget {limit:.0f} ms)")
+        else:
+            logger.error(f"OVER BUDGET {name}: {measured:.1f} ms > {limit:.0f} ms")
+    if over:
+        return 1
+    logger.info(f"Startup within budget ({args.budget}).")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
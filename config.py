@@ -8,8 +8,31 @@ KV_DIR = os.path.join(BASE_DIR, 'view', 'kv')
 VIEW_DIR = os.path.join(BASE_DIR, 'view', 'screens')
 CONTROLLER_DIR = os.path.join(BASE_DIR, 'controller')
 
+DB_BACKEND = os.getenv("DB_BACKEND", "postgresql").lower()  # 'postgresql', 'sqlite' or 'replica'
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(BASE_DIR, "ratesphere.db"))
+REPLICA_PATH = os.getenv("REPLICA_PATH", os.path.join(BASE_DIR, "ratesphere_replica.db"))
+SYNC_PUSH_INTERVAL = float(os.getenv("SYNC_PUSH_INTERVAL", "2"))
+SYNC_PULL_INTERVAL = float(os.getenv("SYNC_PULL_INTERVAL", "30"))
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", "200"))
+
 DB_NAME = os.getenv("DB_NAME")
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
\ No newline at end of file
+DB_PORT = os.getenv("DB_PORT")
+
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", "10"))
+DB_POOL_IDLE_TIMEOUT = float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "4"))
+CRITERION_RATINGS_CACHE_SIZE = int(os.getenv("CRITERION_RATINGS_CACHE_SIZE", "2000"))
+CHANGE_FEED_ENABLED = os.getenv("CHANGE_FEED_ENABLED", "true").lower() in ("1", "true", "yes")
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+DB_METRICS_DUMP_PATH = os.getenv("DB_METRICS_DUMP_PATH")
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # Cost factor of new password hashes (see model.auth_service)
+AUTH_WORKERS = int(os.getenv("AUTH_WORKERS", "2"))
+SCREEN_PREFETCH_DELAY = float(os.getenv("SCREEN_PREFETCH_DELAY", "1.0"))  # Idle seconds before likely next screens are built; 0 disables
+SETTINGS_FLUSH_DELAY = float(os.getenv("SETTINGS_FLUSH_DELAY", "1.0"))  # Seconds of quiet before session.json is written
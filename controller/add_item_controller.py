@@ -1,11 +1,10 @@
 import logging
+import asynckivy as ak
 from model.database_model import DatabaseError, DatabaseModel
 from view.screens.add_item_screen import AddItemScreen
 
 logger = logging.getLogger(__name__)
 
-OVERALL_CRITERION_NAME = "Total score"
-
 class AddItemController:
     data_model: DatabaseModel
     view: AddItemScreen
@@ -15,14 +14,23 @@ class AddItemController:
         self.session_model = models['session']  # Link to SessionModel
         self.view = view                        # Link to AddItemScreen
         self.app = app                          # Link to the main application class (for navigation)
+        self.db_executor = models['db_executor']
+        self.async_data_model = models['async_database']  # Link to AsyncDatabaseModel
+        self.tasks = self.db_executor.group()   # Background loads owned by this screen
+        self._edit_load_task = None             # asynckivy task loading the item being edited
+        self.item_events = models['item_events']  # Link to ItemEventBus (tells lists what changed)
+        self._saving = False
 
         logger.debug("AddItemController initialized.")
 
     def save_item(self, name, alt_name, item_type, status, review, rating_data):
         """
         Saves a new item or updates an existing one based on view.edit_mode.
-        Handles basic info and criteria ratings.
+        Handles basic info and criteria ratings. The database work runs in the background.
         """
+        if self._saving:
+            logger.debug("Save already in progress, ignoring repeated request.")
+            return
         if self.view.edit_mode:
             logger.info(f"Attempting to UPDATE item ID: {self.view.item_to_edit_id}")
             self._update_existing_item(name, alt_name, item_type, status, review, rating_data)
@@ -55,27 +63,24 @@ class AddItemController:
             self.view.show_error("Error: Rating must be provided.")
             return
 
-        item_id = None
-        try:
-            item_id = self.data_model.add_rated_item(
-                user_id=current_user_id, name=clean_name, alt_name=clean_alt_name,
-                item_type=item_type, status=status, review=clean_review
-            )
-            if not item_id: raise DatabaseError("Failed to get item_id after insertion.")
-
-            self._process_and_save_ratings(item_id, rating_data)
-
-            logger.info(f"New item '{clean_name}' (ID: {item_id}) added successfully.")
-            self.view.clear_fields()
+        self._start_save(
+            self.data_model.save_item, current_user_id, clean_name, clean_alt_name, item_type, status, clean_review,
+            dict(rating_data),
+            on_success=lambda item: self._on_item_added(clean_name, item),
+            on_error=lambda error: self._on_save_failed(f"adding item '{clean_name}'", error,
+                                                        "Failed to save item or ratings. Database error.",
+                                                        "An unexpected error occurred during saving."),
+        )
+
+    def _on_item_added(self, clean_name, item):
+        self._finish_save()
+        if item:
+            logger.info(f"New item '{clean_name}' (ID: {item['item_id']}) added successfully.")
+            self.item_events.item_inserted(item)
+        self.view.clear_fields()
+        if self.app.screen_manager.current == self.view.name:
             self.app.screen_manager.current = "ratings"
 
-        except DatabaseError as e:
-            logger.exception(f"Database error while adding item '{clean_name}': {e}")
-            self.view.show_error("Failed to save item or ratings. Database error.")
-        except Exception as e:
-            logger.exception(f"Unexpected error while adding item '{clean_name}': {e}")
-            self.view.show_error("An unexpected error occurred during saving.")
-
     def _update_existing_item(self, name, alt_name, item_type, status, review, rating_data):
         """Handles logic for updating an existing item."""
         item_id = self.view.item_to_edit_id
@@ -100,97 +105,103 @@ class AddItemController:
             self.view.show_error("Error: Rating must be provided.")
             return
 
-        try:
-            self.data_model.update_rated_item(
-                item_id=item_id, name=clean_name, alt_name=clean_alt_name,
-                item_type=item_type, status=status, review=clean_review
-            )
-            logger.info(f"Basic info for item {item_id} updated.")
-
-            overall_criterion = self.data_model.get_overall_criterion()
-            overall_criterion_id = overall_criterion['criterion_id'] if overall_criterion else -1
-
-            criteria_names_to_keep = set(rating_data.keys())
-            criteria_ids_to_keep = set()
-            if overall_criterion_id != -1:
-                criteria_ids_to_keep.add(overall_criterion_id)
-
-            for name in criteria_names_to_keep:
-                criterion = self.data_model.get_criterion_by_name(name, use_dict_cursor=True)
-                if criterion:
-                    criteria_ids_to_keep.add(criterion['criterion_id'])
-
-            self.data_model.delete_criteria_ratings_except(item_id, list(criteria_ids_to_keep))
-
-            self._process_and_save_ratings(item_id, rating_data)
-
-            logger.info(f"Item {item_id} updated successfully.")
+        self._start_save(
+            self.data_model.save_item, self.session_model.get_current_user_id(), clean_name, clean_alt_name,
+            item_type, status, clean_review, dict(rating_data), item_id=item_id,
+            on_success=lambda item: self._on_item_updated(item_id, item),
+            on_error=lambda error: self._on_save_failed(f"updating item {item_id}", error,
+                                                        "Failed to update item or ratings. Database error.",
+                                                        "An unexpected error occurred during update."),
+        )
+
+    def _on_item_updated(self, item_id, item):
+        self._finish_save()
+        logger.info(f"Item {item_id} updated successfully.")
+        if item:
+            self.item_events.item_updated(item)
+        else:
+            self.item_events.item_deleted(item_id)
+        if self.app.screen_manager.current == self.view.name:
             self.app.screen_manager.current = "ratings"
 
-        except DatabaseError as e:
-            logger.exception(f"Database error while updating item {item_id}: {e}")
-            self.view.show_error("Failed to update item or ratings. Database error.")
-        except Exception as e:
-            logger.exception(f"Unexpected error while updating item {item_id}: {e}")
-            self.view.show_error("An unexpected error occurred during update.")
+    def _start_save(self, func, *args, on_success, on_error, **kwargs):
+        # Saves are not part of self.tasks: leaving the screen must not drop a write that is under way.
+        self._saving = True
+        self.view.show_loading(True)
+        self.db_executor.submit(func, *args, on_success=on_success, on_error=on_error, **kwargs)
+
+    def _finish_save(self):
+        self._saving = False
+        self.view.show_loading(False)
+
+    def _on_save_failed(self, action, error, database_message, unexpected_message):
+        self._finish_save()
+        if isinstance(error, DatabaseError):
+            logger.error(f"Database error while {action}: {error}", exc_info=error)
+            self.view.show_error(database_message)
+        else:
+            logger.error(f"Unexpected error while {action}: {error}", exc_info=error)
+            self.view.show_error(unexpected_message)
 
-    def _process_and_save_ratings(self, item_id, rating_data):
+    def load_item_for_edit(self, item_id):
         """
-        Processes rating_data (overall or criteria), saves individual criterion ratings,
-        and updates the overall calculated rating.
-        Raises DatabaseError on failure.
+        Fetches the item being edited and its criterion ratings concurrently; the view is filled in when they arrive.
+        Ratings prefetched by the ratings list are applied immediately and only the item row is refreshed.
         """
-        if not rating_data:
-            logger.warning(f"No rating data provided for item {item_id}. Overall rating might become NULL.")
-            self.data_model.update_overall_rating(item_id)
+        self._cancel_edit_load()
+        cached_ratings = self.data_model.criterion_ratings_cache.get(item_id)
+        if cached_ratings is not None:
+            self.view.apply_edit_ratings(item_id, cached_ratings, None)
+            self._edit_load_task = ak.start(self._refresh_item_for_edit(item_id))
             return
+        self.view.show_loading(True)
+        self._edit_load_task = ak.start(self._load_item_for_edit(item_id))
 
-        overall_rating_value = rating_data.get(OVERALL_CRITERION_NAME)
-
-        if overall_rating_value is not None:
-            logger.info(f"Processing direct overall rating for item {item_id}.")
-            overall_criterion = self.data_model.get_overall_criterion()
-            if not overall_criterion:
-                logger.error(f"Cannot save overall rating: '{OVERALL_CRITERION_NAME}' criterion not found!")
-                raise DatabaseError(f"'{OVERALL_CRITERION_NAME}' criterion definition missing.")
+    async def _load_item_for_edit(self, item_id):
+        try:
+            item_task, ratings_task = await ak.wait_all(
+                self.async_data_model.get_rated_item(item_id),
+                self.async_data_model.get_criterion_ratings_for_item(item_id),
+            )
+        except ak.ExceptionGroup as group:
+            self.view.show_loading(False)
+            self.view.apply_edit_ratings(item_id, None, group.exceptions[0])
+            return
+        self.view.show_loading(False)
+        self.view.apply_edit_item(item_id, item_task.result)
+        self.view.apply_edit_ratings(item_id, ratings_task.result, None)
 
-            overall_criterion_id = overall_criterion['criterion_id']
-            try:
-                rating_val = float(overall_rating_value)
-                if not (1.0 <= rating_val <= 10.0):
-                    raise ValueError("Rating out of range")
-            except (ValueError, TypeError):
-                logger.error(f"Invalid value '{overall_rating_value}' provided for {OVERALL_CRITERION_NAME}.")
-                raise ValueError(f"Invalid value for {OVERALL_CRITERION_NAME}.")
+    async def _refresh_item_for_edit(self, item_id):
+        try:
+            item_row = await self.async_data_model.get_rated_item(item_id)
+        except DatabaseError as e:
+            logger.warning(f"Could not refresh item {item_id} for edit, keeping list data: {e}")
+            return
+        self.view.apply_edit_item(item_id, item_row)
 
-            self.data_model.add_or_update_criterion_rating(item_id, overall_criterion_id, rating_val)
-            self.data_model.update_overall_rating(item_id, direct_overall_rating=rating_val)
-            logger.info(f"Saved direct overall rating {rating_val} for item {item_id}.")
+    def _cancel_edit_load(self):
+        if self._edit_load_task is not None:
+            self._edit_load_task.cancel()
+            self._edit_load_task = None
 
-        else:
-            logger.info(f"Processing criteria ratings for item {item_id}.")
-            if not isinstance(rating_data, dict) or not rating_data:
-                logger.warning(
-                    f"No valid criteria ratings provided for item {item_id}. Updating overall rating (might become NULL).")
-            else:
-                saved_count = 0
-                for criterion_name, criterion_rating in rating_data.items():
-                    if criterion_rating is None: continue
-                    try:
-                        rating_val = float(criterion_rating)
-                        if not (1.0 <= rating_val <= 10.0): continue
-                    except (ValueError, TypeError):
-                        continue
-
-                    criterion = self.data_model.get_criterion_by_name(criterion_name)
-                    if criterion:
-                        criterion_id = criterion['criterion_id']
-                        self.data_model.add_or_update_criterion_rating(item_id, criterion_id, rating_val)
-                        saved_count += 1
-                    else:
-                        logger.warning(
-                            f"Criterion '{criterion_name}' not found in DB. Skipping rating for item {item_id}.")
-
-                logger.info(f"Saved/Updated {saved_count} criteria ratings for item {item_id}.")
-
-            self.data_model.update_overall_rating(item_id)
\ No newline at end of file
+    def load_criteria_choices(self, item_type, on_loaded):
+        """
+        Refreshes the criteria catalog if it changed and fetches the suggested and full criteria lists.
+        Calls on_loaded(suggested_criteria, all_criteria, error) on the main thread.
+        """
+        def query():
+            self.data_model.criteria_catalog.check_version()
+            return self.data_model.get_suggested_criteria(item_type), self.data_model.get_all_criteria()
+
+        self.tasks.submit(
+            query,
+            on_success=lambda result: on_loaded(result[0], result[1], None),
+            on_error=lambda error: on_loaded(None, None, error),
+        )
+
+    def cancel_pending(self):
+        """Cancels in-flight loads when the user leaves the screen (saves are left to finish)."""
+        self.tasks.cancel_all()
+        self._cancel_edit_load()
+        if not self._saving:
+            self.view.show_loading(False)
@@ -1,4 +1,3 @@
-import bcrypt
 import logging
 from model.database_model import DatabaseError
 
@@ -10,46 +9,45 @@ class LoginController:
         self.session_model = models['session']  # Link to SessionModel
         self.view = view                        # Link to LoginScreen
         self.app = app                          # Link to the main application class (for navigation)
+        self.auth_service = models['auth']      # Link to AuthService (hashes off the main thread)
+        self._login_task = None
 
         logger.debug("LoginController initialized.")
 
     def do_login(self, username, password):
-        """Processes a user login attempt."""
+        """Processes a user login attempt. The password check runs on the auth pool."""
         logger.info(f"Processing login attempt for user: {username}")
         self.view.show_error("")
 
         if not all([username, password]):
             logger.info(f"Login failed: Not all fields were filled.")
             self.view.show_error("Please fill in all the fields.")
+            return
 
-        try:
-            user_data = self.data_model.get_user_by_username(username)
-
-            if user_data:
-                stored_user_id = user_data['user_id']
-                stored_username = user_data['username']
-                stored_email = user_data['email']
-                stored_hash = user_data['password_hash']
-
-                if bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8')):
-                    self.session_model.login(stored_username, stored_user_id)
-                    logger.info(f"User '{username}' logged in successfully.")
-                    self.app.screen_manager.current = "ratings"
-                else:
-                    logger.warning(f"User '{username}' logged in failed.")
-                    self.view.show_error("Invalid username or password")
-            else:
-                logger.warning(f"User '{username}' logged in failed.")
-                self.view.show_error("Invalid username or password")
-        except DatabaseError as e:
-            logger.exception(f"Database error during login validation for '{username}': {e}")
-            self.view.show_error("Error checking user data. Please try again later.")
+        if self._login_task is not None and not self._login_task.done():
+            logger.debug("Login attempt ignored: the previous one is still being checked.")
             return
-        except Exception as e:
-            logger.exception(f"Unexpected error during login validation for '{username}': {e}")
+        self._login_task = self.auth_service.submit(
+            self.auth_service.authenticate, username, password,
+            on_success=lambda user_data: self._on_login_checked(username, user_data),
+            on_error=lambda e: self._on_login_error(username, e))
+
+    def _on_login_checked(self, username, user_data):
+        if user_data:
+            self.session_model.login(user_data['username'], user_data['user_id'])
+            logger.info(f"User '{username}' logged in successfully.")
+            self.app.screen_manager.current = "ratings"
+        else:
+            logger.warning(f"User '{username}' logged in failed.")
+            self.view.show_error("Invalid username or password")
+
+    def _on_login_error(self, username, error):
+        if isinstance(error, DatabaseError):
+            logger.error(f"Database error during login validation for '{username}': {error}")
+            self.view.show_error("Error checking user data. Please try again later.")
+        else:
+            logger.error(f"Unexpected error during login validation for '{username}': {error}", exc_info=error)
             self.view.show_error("An unexpected error occurred. Please try again later.")
-            return
-
 
     def go_to_signup(self):
         """Transition to the registration screen."""
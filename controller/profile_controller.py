@@ -1,16 +1,26 @@
 import logging
-import bcrypt
+import os
+from datetime import datetime
 
+import asynckivy as ak
+from kivy.clock import Clock
+
+from model.auth_service import AuthError
 from model.database_model import DatabaseModel, DatabaseError
+from model.async_database_model import AsyncDatabaseModel
+from model.item_importer import ItemImporter
+from model.item_exporter import ItemExporter, EXPORT_FORMATS
 from model.session_model import SessionModel
 
 logger = logging.getLogger(__name__)
 
 ALLOWED_SORT_COLUMNS = ['name', 'item_type', 'status', 'rating', 'created_at', 'updated_at']
 ALLOWED_SORT_ORDERS = ['ASC', 'DESC']
+STATS_REFRESH_DELAY = 0.5  # Seconds to wait for further item changes before refreshing the statistics
 
 class ProfileController:
     data_model: DatabaseModel
+    async_data_model: AsyncDatabaseModel
     session_model: SessionModel
     view: object
     app: object
@@ -20,11 +30,21 @@ class ProfileController:
         self.session_model = models['session']  # Link to SessionModel
         self.view = view                        # Link to ProfileScreen
         self.app = app                          # Link to the main application class (for navigation)
+        self.async_data_model = models['async_database']  # Link to AsyncDatabaseModel
+        self._load_task = None                  # asynckivy task loading the profile, if any
+        self._refresh_trigger = Clock.create_trigger(lambda dt: self.load_profile_data(), STATS_REFRESH_DELAY)
+        self.db_executor = models['db_executor']
+        self.item_events = models['item_events']  # Link to ItemEventBus
+        self.auth_service = models['auth']        # Link to AuthService (hashes off the main thread)
+        self._password_task = None
+        self.item_events.subscribe(self._on_item_event)
+        self._importing = False
+        self._exporting = False
 
         logger.debug('ProfileController initialized.')
 
     def load_profile_data(self):
-        """Loads user details and statistics and tells the view to display them."""
+        """Starts loading user details and statistics; the view is updated when they arrive."""
         logger.info("Loading profile data...")
 
         if not self.session_model.is_logged_in():
@@ -36,40 +56,172 @@ class ProfileController:
         user_id = self.session_model.get_current_user_id()
         username = self.session_model.get_current_username()
 
-        user_info = {'username': username, 'email': 'N/A', 'created_at': 'N/A'}
-        stats = {
-            'total_items': 0,
-            'count_by_type': {},
-            'count_by_status': {},
-            'average_rating': None
-        }
+        self._cancel_load()
+        self.view.show_loading(True)
+        self._load_task = ak.start(self._load_profile_data(user_id, username))
 
+    async def _load_profile_data(self, user_id, username):
+        """Fetches user details and statistics concurrently."""
         try:
-            details = self.data_model.get_user_details(user_id)
-            if details:
-                user_info['email'] = self._mask_email(details.get('email', ''))
-                user_info['created_at'] = self._format_datetime(details.get('created_at'))
-            else:
-                logger.warning(f"Could not fetch user details for user_id {user_id}.")
+            details_task, stats_task = await ak.wait_all(
+                self.async_data_model.get_user_details(user_id),
+                self.async_data_model.get_user_statistics(user_id),
+            )
+        except ak.ExceptionGroup as group:
+            self._on_profile_data_failed(user_id, username, group.exceptions[0])
+            return
+        self._on_profile_data_loaded(user_id, username, details_task.result, stats_task.result)
 
-            stats = self.data_model.get_user_statistics(user_id)
-            logger.debug(f"Loaded user stats: {stats}")
+    def _on_profile_data_loaded(self, user_id, username, details, stats):
+        user_info = {'username': username, 'email': 'N/A', 'created_at': 'N/A'}
+        if details:
+            user_info['email'] = self._mask_email(details.get('email', ''))
+            user_info['created_at'] = self._format_datetime(details.get('created_at'))
+        else:
+            logger.warning(f"Could not fetch user details for user_id {user_id}.")
+        logger.debug(f"Loaded user stats: {stats}")
+        self._display_profile_data(user_info, stats)
 
-        except DatabaseError as e:
-            logger.exception(f"Database error loading profile data for user_id {user_id}: {e}")
+    def _on_profile_data_failed(self, user_id, username, error):
+        if isinstance(error, DatabaseError):
+            logger.error(f"Database error loading profile data for user_id {user_id}: {error}", exc_info=error)
             if hasattr(self.view, 'show_error'):
                 self.view.show_error("Error loading profile data.")
-        except Exception as e:
-            logger.exception(f"Unexpected error loading profile data for user_id {user_id}: {e}")
+        else:
+            logger.error(f"Unexpected error loading profile data for user_id {user_id}: {error}", exc_info=error)
             if hasattr(self.view, 'show_error'):
                 self.view.show_error("An unexpected error occurred.")
 
+        user_info = {'username': username, 'email': 'N/A', 'created_at': 'N/A'}
+        stats = {
+            'total_items': 0,
+            'count_by_type': {},
+            'count_by_status': {},
+            'average_rating': None
+        }
+        self._display_profile_data(user_info, stats)
+
+    def _display_profile_data(self, user_info, stats):
+        self.view.show_loading(False)
         if hasattr(self.view, 'display_profile_data'):
             self.view.display_profile_data(user_info, stats)
             logger.info("Profile data passed to view.")
         else:
             logger.error("View object for ProfileController does not have 'display_profile_data' method!")
 
+    def _on_item_event(self, event):
+        """Keeps the statistics current while the profile screen is open (e.g. changes from other clients)."""
+        if self.app.screen_manager.current != self.view.name:
+            return
+        if event.user_id is not None and event.user_id != self.session_model.get_current_user_id():
+            return
+        self._refresh_trigger()
+
+    def cancel_pending(self):
+        """Cancels in-flight loads, e.g. when the user leaves the screen."""
+        self._cancel_load()
+        self._refresh_trigger.cancel()
+        self.view.show_loading(False)
+
+    def _cancel_load(self):
+        if self._load_task is not None:
+            self._load_task.cancel()
+            self._load_task = None
+
+    def import_items(self, path):
+        """Imports a CSV / JSON lines library file in the background and reports the outcome."""
+        if self._importing:
+            logger.debug("Import already running, ignoring request.")
+            return
+        user_id = self.session_model.get_current_user_id()
+        if not user_id:
+            self.view.show_library_feedback("Error: User session not found.", is_error=True)
+            return
+
+        logger.info(f"Importing '{path}' for user {user_id}...")
+        self._importing = True
+        self.view.show_loading(True)
+        self.view.show_library_feedback(f"Importing {os.path.basename(path)}...")
+        self.db_executor.submit(
+            ItemImporter(self.data_model).import_file, path, user_id,
+            on_success=lambda report: self._on_import_finished(user_id, report),
+            on_error=self._on_import_failed,
+        )
+
+    def _on_import_finished(self, user_id, report):
+        self._importing = False
+        self.view.show_loading(False)
+        message = report.summary()
+        if report.error_count:
+            errors_path = f"{report.source}.errors.csv"
+            try:
+                report.write_errors(errors_path)
+                message += f" See {os.path.basename(errors_path)} for details."
+            except OSError as e:
+                logger.error(f"Could not write import error report to {errors_path}: {e}")
+        self.view.show_library_feedback(message, is_error=not report.items_imported and bool(report.error_count))
+        if report.items_imported:
+            self.item_events.items_reloaded(user_id)
+
+    def _on_import_failed(self, error):
+        self._importing = False
+        self.view.show_loading(False)
+        if isinstance(error, DatabaseError):
+            logger.error(f"Database error during import: {error}", exc_info=error)
+            self.view.show_library_feedback("Import failed: database error. Nothing was imported.", is_error=True)
+        elif isinstance(error, (OSError, ValueError)):
+            logger.warning(f"Could not read import file: {error}")
+            self.view.show_library_feedback(f"Could not read the file: {error}", is_error=True)
+        else:
+            logger.error(f"Unexpected error during import: {error}", exc_info=error)
+            self.view.show_library_feedback("An unexpected error occurred during import.", is_error=True)
+
+    def export_items(self, directory, export_format):
+        """Exports the library into a new file in directory in the background, showing progress."""
+        if self._exporting:
+            logger.debug("Export already running, ignoring request.")
+            return
+        user_id = self.session_model.get_current_user_id()
+        if not user_id or export_format not in EXPORT_FORMATS:
+            self.view.show_library_feedback("Error: Cannot start the export.", is_error=True)
+            return
+
+        extension = EXPORT_FORMATS[export_format][0]
+        suffix = '_wide' if export_format == 'wide_csv' else ''
+        file_name = (f"ratesphere_{self.session_model.get_current_username()}"
+                     f"_{datetime.now():%Y%m%d_%H%M%S}{suffix}{extension}")
+        path = os.path.join(directory, file_name)
+
+        logger.info(f"Exporting items of user {user_id} to '{path}' ({export_format})...")
+        self._exporting = True
+        self.view.show_export_progress(0, None)
+        self.view.show_library_feedback(f"Exporting to {file_name}...")
+        self.db_executor.submit(
+            ItemExporter(self.data_model).export, user_id, path, export_format,
+            # Called on the worker thread; the view is updated on the main thread.
+            progress=lambda done, total: Clock.schedule_once(lambda dt: self.view.show_export_progress(done, total)),
+            on_success=lambda written: self._on_export_finished(path, written),
+            on_error=self._on_export_failed,
+        )
+
+    def _on_export_finished(self, path, written):
+        self._exporting = False
+        self.view.hide_export_progress()
+        self.view.show_library_feedback(f"Exported {written} items to {path}.")
+
+    def _on_export_failed(self, error):
+        self._exporting = False
+        self.view.hide_export_progress()
+        if isinstance(error, DatabaseError):
+            logger.error(f"Database error during export: {error}", exc_info=error)
+            self.view.show_library_feedback("Export failed: database error.", is_error=True)
+        elif isinstance(error, OSError):
+            logger.error(f"Could not write export file: {error}")
+            self.view.show_library_feedback(f"Could not write the file: {error}", is_error=True)
+        else:
+            logger.error(f"Unexpected error during export: {error}", exc_info=error)
+            self.view.show_library_feedback("An unexpected error occurred during export.", is_error=True)
+
     def _mask_email(self, email):
         """Masks email address, e.g., 'user@example.com' -> 'us***@example.com'."""
         if not email or '@' not in email:
@@ -121,61 +273,29 @@ class ProfileController:
             self.view.show_password_feedback("Error: User session not found.", is_error=True)
             return
 
-        try:
-            current_hash = self.data_model.get_user_password_hash(user_id)
-            if not current_hash:
-                logger.error(f"Password change failed: Could not retrieve current password hash for user {user_id}.")
-                self.view.show_password_feedback("Error retrieving user data.", is_error=True)
-                return
-
-        except DatabaseError as e:
-            logger.exception(f"Database error fetching current password hash for user {user_id}: {e}")
-            self.view.show_password_feedback("Database error checking password.", is_error=True)
-            return
-        except Exception as e:
-            logger.exception(f"Unexpected error fetching current password hash for user {user_id}: {e}")
-            self.view.show_password_feedback("An unexpected error occurred.", is_error=True)
-            return
-
-        try:
-            if not bcrypt.checkpw(current_password.encode('utf-8'), current_hash.encode('utf-8')):
-                logger.warning(f"Password change failed: Incorrect current password for user {user_id}.")
-                self.view.show_password_feedback("Incorrect current password.", is_error=True)
-                return
-        except ValueError as e:
-            logger.error(f"Password check error (ValueError) for user {user_id}: {e}. Hash might be invalid.")
-            self.view.show_password_feedback("Error checking current password validity.", is_error=True)
+        if self._password_task is not None and not self._password_task.done():
+            logger.debug("Password change ignored: the previous one is still running.")
             return
-        except Exception as e:
-            logger.exception(f"Unexpected error during password check for user {user_id}: {e}")
-            self.view.show_password_feedback("An unexpected error occurred during password check.", is_error=True)
-            return
-
-        try:
-            new_hashed_pw = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
-            new_hash_str = new_hashed_pw.decode('utf-8')
-            logger.debug("New password hashed successfully.")
-        except Exception as e:
-            logger.exception(f"Password hashing error for new password (user {user_id}): {e}")
-            self.view.show_password_feedback("Error processing new password.", is_error=True)
-            return
-
-        try:
-            success = self.data_model.update_user_password(user_id, new_hash_str)
-            if success:
-                logger.info(f"Password updated successfully in DB for user {user_id}.")
-                self.view.show_password_feedback("Password updated successfully.", is_error=False)
-                self.view.clear_password_fields()
-            else:
-                 logger.error(f"Failed to update password in DB for user {user_id} (model returned False).")
-                 self.view.show_password_feedback("Failed to save new password.", is_error=True)
-
-        except DatabaseError as e:
-            logger.exception(f"Database error updating password for user {user_id}: {e}")
+        self._password_task = self.auth_service.submit(
+            self.auth_service.change_password, user_id, current_password, new_password,
+            on_success=lambda result: self._on_password_changed(user_id),
+            on_error=lambda e: self._on_password_change_error(user_id, e))
+
+    def _on_password_changed(self, user_id):
+        logger.info(f"Password updated successfully in DB for user {user_id}.")
+        self.view.show_password_feedback("Password updated successfully.", is_error=False)
+        self.view.clear_password_fields()
+
+    def _on_password_change_error(self, user_id, error):
+        if isinstance(error, AuthError):
+            logger.warning(f"Password change failed for user {user_id}: {error}")
+            self.view.show_password_feedback(str(error), is_error=True)
+        elif isinstance(error, DatabaseError):
+            logger.error(f"Database error changing password for user {user_id}: {error}")
             self.view.show_password_feedback("Database error saving new password.", is_error=True)
-        except Exception as e:
-            logger.exception(f"Unexpected error updating password for user {user_id}: {e}")
-            self.view.show_password_feedback("An unexpected error occurred saving password.", is_error=True)
+        else:
+            logger.error(f"Unexpected error changing password for user {user_id}: {error}", exc_info=error)
+            self.view.show_password_feedback("An unexpected error occurred.", is_error=True)
 
     def get_current_default_sort(self):
         """Returns the current default sort settings from the session."""
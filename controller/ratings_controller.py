@@ -1,10 +1,14 @@
 import logging
 from model.database_model import DatabaseError
+from model.item_filter import ItemFilter
+from model.item_store import ItemStore
+from model.item_events import ITEM_DELETED, ITEMS_RELOAD
 
 logger = logging.getLogger(__name__)
 
 ALLOWED_SORT_COLUMNS = ['name', 'item_type', 'status', 'rating', 'created_at', 'updated_at']
 ALLOWED_SORT_ORDERS = ['ASC', 'DESC']
+ITEMS_PAGE_SIZE = 100
 
 class RatingsController:
     def __init__(self, models, view, app):
@@ -12,6 +16,8 @@ class RatingsController:
         self.session_model = models['session']  # Link to SessionModel
         self.view = view                        # Link to RatingsScreen
         self.app = app                          # Link to the main application class (for navigation)
+        self.db_executor = models['db_executor']    # Link to DatabaseExecutor (writes)
+        self.tasks = self.db_executor.group()       # Background loads owned by this screen
 
         try:
             default_sort = self.session_model.get_default_sort()
@@ -29,45 +35,227 @@ class RatingsController:
             self.current_sort_column = 'created_at'
             self.current_sort_order = 'DESC'
 
+        self._next_page_cursor = None
+        self._has_more_items = False
+        self._loading_page = False
+        self._loading_details = False       # Criterion ratings of the item whose details were requested
+        self.search_query = ''      # Active search text; empty means the full, sorted list
+        self.current_filter = ItemFilter()  # Active filter, applied to both the list and search
+        self.item_store = ItemStore()       # Items currently shown, with precomputed sort keys
+        self.item_events = models['item_events']  # Link to ItemEventBus
+        self.item_events.subscribe(self._on_item_event)
+        self._loaded_user_id = None         # User whose list is loaded and kept current by item events
+
+    def show_items(self):
+        """Called when the ratings screen is entered: loads the list unless it is already loaded and current."""
+        if self._loaded_user_id is not None and self._loaded_user_id == self.session_model.get_current_user_id():
+            logger.debug("Ratings list is current, no reload needed.")
+            return
+        self.load_items()
+
     def load_items(self):
-        """Loads the rated user items and updates the View."""
+        """Starts loading the first page of rated user items; the View is updated when it arrives."""
+        self.tasks.cancel_all()
+        self._loading_details = False
+        self._loaded_user_id = None
+        self._next_page_cursor = None
+        self._has_more_items = False
+
+        self.item_store.clear()
+
         user_id = self.session_model.get_current_user_id()
         if not user_id:
             logger.warning("RatingsController Error: Cannot load items, user not logged in.")
+            self._loading_page = False
+            self._show_loading()
             self.view.update_data([])
             return
 
-        try:
-            items_raw = self.data_model.get_user_items(
-                user_id=user_id,
-                sort_by=self.current_sort_column,
-                sort_order=self.current_sort_order,
-                use_dict_cursor=True,
+        self._loading_page = True
+        self._show_loading()
+        if self.search_query:
+            self.tasks.submit(
+                self.data_model.search_user_items, user_id, self.search_query, item_filter=self.current_filter,
+                on_success=lambda items_raw: self._on_search_results_loaded(user_id, items_raw),
+                on_error=self._on_first_page_failed,
             )
+            return
+        self.tasks.submit(
+            self._query_items_page, user_id, self.current_sort_column, self.current_sort_order, None,
+            self.current_filter,
+            on_success=lambda items_raw: self._on_first_page_loaded(user_id, items_raw),
+            on_error=self._on_first_page_failed,
+        )
 
-            rv_data = []
-            if items_raw:
-                for row in items_raw:
-                    rv_data.append({
-                        'item_id': row['item_id'], # ID may be required for actions with the line
-                        'name': row['name'],
-                        'alt_name': row['alt_name'],
-                        'item_type': row['item_type'],
-                        'status': row['status'],
-                        'rating': row['rating'],
-                        'review': row['review'],
-                        'viewclass': 'RatingRowWidget'
-                    })
-
-            self.view.update_data(rv_data)
-        except DatabaseError as e:
-            logger.exception(f"Database error while loading items: {e}")
-            self.view.show_error("Failed to load ratings. Check logs.")
-            self.view.update_data([])
+    def set_filter(self, item_filter):
+        """Applies an ItemFilter (None clears it) and reloads the items."""
+        item_filter = item_filter or ItemFilter()
+        if item_filter == self.current_filter:
+            return
+        logger.info(f"Filter changed: {item_filter}")
+        self.current_filter = item_filter
+        self.load_items()
+
+    def search(self, query):
+        """Shows the items matching query (ranked), or the normal sorted list when query is empty."""
+        query = (query or '').strip()
+        if query == self.search_query:
+            return
+        logger.debug(f"Search requested: '{query}'")
+        self.search_query = query
+        self.load_items()
+
+    def _on_search_results_loaded(self, user_id, items_raw):
+        self._loading_page = False
+        self._show_loading()
+        logger.debug(f"Search '{self.search_query}' returned {len(items_raw or [])} items.")
+        results = [self._row_to_rv_item(row) for row in items_raw or []]
+        # Results are ordered by rank, not by a column, so header clicks go back to the database.
+        self.item_store.replace(results, complete=False)
+        self._loaded_user_id = user_id
+        self.view.update_data(results)
+
+    def _on_first_page_loaded(self, user_id, items_raw):
+        self._loading_page = False
+        self._show_loading()
+        try:
+            page = self._apply_page(items_raw)
+            self.item_store.replace(page, complete=not self._has_more_items,
+                                    sort_column=self.current_sort_column, sort_order=self.current_sort_order)
+            self._loaded_user_id = user_id
+            self.view.update_data(page)
         except Exception as e:
-            logger.exception(f"RatingsController Error loading items: {e}")
+            self._on_first_page_failed(e)
+
+    def _on_first_page_failed(self, error):
+        self._loading_page = False
+        self._show_loading()
+        if isinstance(error, DatabaseError):
+            logger.error(f"Database error while loading items: {error}", exc_info=error)
+            self.view.show_error("Failed to load ratings. Check logs.")
+        else:
+            logger.error(f"RatingsController Error loading items: {error}", exc_info=error)
             self.view.show_error("An unexpected error occurred while loading ratings.")
-            self.view.update_data([])
+        self.view.update_data([])
+
+    def load_more_items(self):
+        """Starts loading the next page of items. Called by the View when the list is scrolled near its end."""
+        if not self._has_more_items or self._loading_page:
+            return
+
+        user_id = self.session_model.get_current_user_id()
+        if not user_id:
+            return
+
+        self._loading_page = True
+        self._show_loading()
+        self.tasks.submit(
+            self._query_items_page, user_id, self.current_sort_column, self.current_sort_order,
+            self._next_page_cursor, self.current_filter,
+            on_success=self._on_next_page_loaded,
+            on_error=self._on_next_page_failed,
+        )
+
+    def _on_next_page_loaded(self, items_raw):
+        self._loading_page = False
+        self._show_loading()
+        page = self._apply_page(items_raw)
+        self.item_store.extend(page, complete=not self._has_more_items)
+        self.view.append_data(page)
+
+    def _on_next_page_failed(self, error):
+        self._loading_page = False
+        self._show_loading()
+        logger.error(f"Error while loading next page of items: {error}", exc_info=error)
+        self.view.show_error("Failed to load more ratings. Check logs.")
+
+    def load_item_criteria(self, item_id, on_loaded):
+        """
+        Fetches the criterion ratings of an item, served straight from the cache when it was prefetched.
+        Calls on_loaded(criteria_ratings, error) on the main thread; error is None on success.
+        The loading bar is shown meanwhile. If the fetch is cancelled (screen left, list reloaded),
+        on_loaded is not called and the bar is hidden again.
+        """
+        cached = self.data_model.criterion_ratings_cache.get(item_id)
+        if cached is not None:
+            on_loaded(cached, None)
+            return
+        self._loading_details = True
+        self._show_loading()
+        self.tasks.submit(
+            self.data_model.get_criterion_ratings_for_item, item_id,
+            on_success=lambda criteria_ratings: self._on_item_criteria_loaded(on_loaded, criteria_ratings, None),
+            on_error=lambda error: self._on_item_criteria_loaded(on_loaded, None, error),
+        )
+
+    def _on_item_criteria_loaded(self, on_loaded, criteria_ratings, error):
+        self._loading_details = False
+        self._show_loading()
+        on_loaded(criteria_ratings, error)
+
+    def prefetch_item_criteria(self, item_ids):
+        """Warms the criterion ratings cache for the given (visible) items with one batched query."""
+        missing = self.data_model.criterion_ratings_cache.missing(item_ids)
+        if not missing:
+            return
+        self.tasks.submit(
+            self.data_model.get_criterion_ratings_for_items, missing,
+            on_error=lambda error: logger.warning(f"Prefetching criterion ratings failed: {error}"),
+        )
+
+    def cancel_pending(self):
+        """Cancels in-flight loads, e.g. when the user leaves the screen (deletes are left to finish)."""
+        self.tasks.cancel_all()
+        if self._loading_page or self._loading_details:
+            self._loading_page = False
+            self._loading_details = False
+            self._show_loading()
+
+    def _show_loading(self):
+        """Shows the loading bar while a page or the criterion ratings for the details dialog are loading."""
+        self.view.show_loading(self._loading_page or self._loading_details)
+
+    def _query_items_page(self, user_id, sort_column, sort_order, after, item_filter):
+        """Runs on a database worker thread: fetches one page plus one row to detect more pages."""
+        items_raw = self.data_model.get_user_items(
+            user_id=user_id,
+            sort_by=sort_column,
+            sort_order=sort_order,
+            use_dict_cursor=True,
+            limit=ITEMS_PAGE_SIZE + 1,
+            after=after,
+            item_filter=item_filter,
+        )
+        return list(items_raw or [])
+
+    def _apply_page(self, items_raw):
+        """
+        Advances the page cursor past a fetched page (main thread).
+        Returns the rows converted to RecycleView dictionaries.
+        """
+        self._has_more_items = len(items_raw) > ITEMS_PAGE_SIZE
+        items_raw = items_raw[:ITEMS_PAGE_SIZE]
+        if items_raw:
+            self._next_page_cursor = self.data_model.items_page_cursor(items_raw[-1], self.current_sort_column)
+        logger.debug(f"Fetched page of {len(items_raw)} items, more available: {self._has_more_items}")
+
+        return [self._row_to_rv_item(row) for row in items_raw]
+
+    @staticmethod
+    def _row_to_rv_item(row):
+        """Converts a rated_items row into the dictionary used by the RecycleView."""
+        return {
+            'item_id': row['item_id'], # ID may be required for actions with the line
+            'name': row['name'],
+            'alt_name': row['alt_name'],
+            'item_type': row['item_type'],
+            'status': row['status'],
+            'rating': row['rating'],
+            'review': row['review'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+            'viewclass': 'RatingRowWidget'
+        }
 
     def sort_by(self, column_name):
         """
@@ -98,6 +286,9 @@ class RatingsController:
         except Exception as e:
             logger.exception("Failed to save default sort settings to session.", exc_info=True)
 
+        if self.item_store.complete and not self._loading_page and self.item_store.orders_in_memory(column_name):
+            self.view.update_data(self.item_store.sort(self.current_sort_column, self.current_sort_order))
+            return
         self.load_items()
 
     def delete_item(self, item_id):
@@ -108,18 +299,75 @@ class RatingsController:
             return
 
         logger.info(f"Attempting to delete item with id: {item_id}")
-        try:
-            success = self.data_model.delete_rated_item(item_id)
+        # Not part of self.tasks: leaving the screen must not drop a delete that was requested.
+        self.db_executor.submit(
+            self.data_model.delete_rated_item, item_id,
+            on_success=lambda success: self._on_item_deleted(item_id, success),
+            on_error=lambda error: self._on_delete_failed(item_id, error),
+        )
 
-            if success:
-                logger.info(f"Item {item_id} deleted successfully from database.")
-                self.load_items()
-            else:
-                logger.error(f"Failed to delete item {item_id} (model returned False).")
+    def _on_item_deleted(self, item_id, success):
+        if success:
+            logger.info(f"Item {item_id} deleted successfully from database.")
+            self.item_events.item_deleted(item_id, self.session_model.get_current_user_id())
+        else:
+            logger.error(f"Failed to delete item {item_id} (model returned False).")
 
-        except DatabaseError as e:
-            logger.exception(f"Database error occurred while deleting item {item_id}: {e}")
+    def _on_delete_failed(self, item_id, error):
+        if isinstance(error, DatabaseError):
+            logger.error(f"Database error occurred while deleting item {item_id}: {error}", exc_info=error)
             self.view.show_error("Failed to delete item due to a database error.")
-        except Exception as e:
-            logger.exception(f"Unexpected error occurred while deleting item {item_id}: {e}")
-            self.view.show_error("An unexpected error occurred during deletion.")
\ No newline at end of file
+        else:
+            logger.error(f"Unexpected error occurred while deleting item {item_id}: {error}", exc_info=error)
+            self.view.show_error("An unexpected error occurred during deletion.")
+
+    def _on_item_event(self, event):
+        """Patches the loaded list for one changed item instead of reloading it."""
+        if self._loaded_user_id is None or (event.user_id is not None and event.user_id != self._loaded_user_id):
+            return
+
+        if event.kind == ITEMS_RELOAD:
+            self.load_items()
+            return
+
+        if event.kind == ITEM_DELETED:
+            index = self.item_store.remove(event.item_id)
+            if index is not None:
+                self.view.remove_row(index)
+            return
+
+        rv_item = self._row_to_rv_item(event.item)
+        present = self.item_store.index_of(event.item_id) is not None
+        if not self.current_filter.matches(rv_item):
+            index = self.item_store.remove(event.item_id)
+            if index is not None:
+                self.view.remove_row(index)
+            return
+
+        if self.search_query:
+            # Whether a new item matches the query is only known to the database; refresh matches in place.
+            if present:
+                index, _ = self.item_store.update(rv_item)
+                self.view.replace_row(index, rv_item)
+            return
+
+        if not self.item_store.orders_in_memory():
+            # Only the database knows where a renamed or new item goes in a name-sorted list.
+            if present and self.item_store.get(event.item_id)['name'] == rv_item['name']:
+                index, _ = self.item_store.update(rv_item)
+                self.view.replace_row(index, rv_item)
+            else:
+                self.load_items()
+            return
+
+        if present:
+            old_index, new_index = self.item_store.update(rv_item)
+            if old_index == new_index:
+                self.view.replace_row(new_index, rv_item)
+                return
+            self.view.remove_row(old_index)
+        else:
+            new_index = self.item_store.insert(rv_item)
+        if new_index is not None:
+            self.view.insert_row(new_index, rv_item)
+        logger.debug(f"Applied {event} to the ratings list at position {new_index}.")
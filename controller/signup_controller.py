@@ -1,6 +1,6 @@
-import bcrypt
 import re
 import logging
+from model.auth_service import AuthError
 from model.database_model import DatabaseError
 
 logger = logging.getLogger(__name__)
@@ -13,11 +13,13 @@ class SignUpController:
         self.session_model = models['session']  # Link to SessionModel
         self.view = view                        # Link to SignUpScreen
         self.app = app                          # Link to the main application class (for navigation)
+        self.auth_service = models['auth']      # Link to AuthService (hashes off the main thread)
+        self._signup_task = None
 
         logger.debug("SignUpController initialized.")
 
     def do_signup(self, username, email, password, confirm_password):
-        """Processes a registration attempt."""
+        """Processes a registration attempt. The availability checks and hashing run on the auth pool."""
         logger.info(f"Processing signup attempt for username: {username}")
         self.view.show_error("")
 
@@ -41,55 +43,30 @@ class SignUpController:
              self.view.show_error("Password must be at least 6 characters long")
              return
 
-        try:
-            if self.data_model.get_user_by_username(username):
-                logger.warning(f"Signup failed: Username '{username}' is already taken.")
-                self.view.show_error("This username is already taken")
-                return
-
-            if self.data_model.get_user_by_email(email):
-                logger.warning(f"Signup failed: Email '{email}' is already registered.")
-                self.view.show_error("This email is already registered")
-                return
-
-        except DatabaseError as e:
-             logger.exception(f"Database error during signup validation for '{username}': {e}")
-             self.view.show_error("Error checking user data. Please try again later.")
-             return
-        except Exception as e:
-             logger.exception(f"Unexpected error during signup validation for '{username}': {e}")
-             self.view.show_error("An unexpected error occurred. Please try again later.")
-             return
-
-        try:
-            hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-            hashed_pw_str = hashed_pw.decode('utf-8')
-            logger.debug(f"Password hashed successfully for user '{username}'.")
-        except Exception as e:
-             logger.exception(f"Password hashing error for user '{username}': {e}")
-             self.view.show_error("Password processing error. Please try again.")
-             return
-
-        try:
-            user_id = self.data_model.add_user(username, email, hashed_pw_str)
-
-            if user_id:
-                logger.info(f"User '{username}' registered successfully with ID: {user_id}")
-                self.session_model.login(username, user_id)
-                logger.info(f"User '{username}' automatically logged in after registration.")
-                self.app.screen_manager.current = "ratings"
-            else:
-                logger.error(f"User registration failed for '{username}' - add_user returned no ID.")
-                self.view.show_error("Registration failed unexpectedly. Please try again later.")
-
-        except DatabaseError as e:
-             logger.exception(f"Database error during user insertion for '{username}': {e}")
-             self.view.show_error("Failed to save user data. The username or email might already exist, or there was a server issue.")
-             return
-        except Exception as e:
-             logger.exception(f"Unexpected error during user insertion for '{username}': {e}")
-             self.view.show_error("An unexpected error occurred during registration. Please try again later.")
-             return
+        if self._signup_task is not None and not self._signup_task.done():
+            logger.debug("Signup attempt ignored: the previous one is still running.")
+            return
+        self._signup_task = self.auth_service.submit(
+            self.auth_service.register, username, email, password,
+            on_success=lambda user_id: self._on_registered(username, user_id),
+            on_error=lambda e: self._on_signup_error(username, e))
+
+    def _on_registered(self, username, user_id):
+        logger.info(f"User '{username}' registered successfully with ID: {user_id}")
+        self.session_model.login(username, user_id)
+        logger.info(f"User '{username}' automatically logged in after registration.")
+        self.app.screen_manager.current = "ratings"
+
+    def _on_signup_error(self, username, error):
+        if isinstance(error, AuthError):
+            logger.warning(f"Signup failed for '{username}': {error}")
+            self.view.show_error(str(error))
+        elif isinstance(error, DatabaseError):
+            logger.error(f"Database error during signup for '{username}': {error}")
+            self.view.show_error("Failed to save user data. The username or email might already exist, or there was a server issue.")
+        else:
+            logger.error(f"Unexpected error during signup for '{username}': {error}", exc_info=error)
+            self.view.show_error("An unexpected error occurred during registration. Please try again later.")
 
     def go_to_login(self):
         """Transition to the login screen."""
@@ -0,0 +1,74 @@
+import logging
+
+from kivy.clock import Clock
+
+import startup_profiler
+from model.database_model import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+RETRY_INITIAL_DELAY = 2.0   # Seconds before the first reconnection attempt
+RETRY_MAX_DELAY = 60.0      # Backoff ceiling
+
+class SplashController:
+    """
+    Connects to the database after the first frame: opens the backend (pool and its warm-up
+    connections, or the SQLite file) and loads the criteria catalog on a worker thread.
+    On success it hands over to the app; on failure it shows why and retries with backoff.
+    """
+
+    def __init__(self, models, view, app):
+        self.data_model = models['database']    # Link to DatabaseModel
+        self.db_executor = models['db_executor']  # Link to DatabaseExecutor
+        self.view = view                        # Link to SplashScreen
+        self.app = app                          # Link to the main application class (for navigation)
+        self.ready = False
+        self.attempt = 0
+        self._task = None
+        self._retry_event = None
+        self._retry_delay = RETRY_INITIAL_DELAY
+
+        logger.debug("SplashController initialized.")
+
+    def start(self):
+        """Starts the first connection attempt (no-op once connected or while an attempt runs)."""
+        if self.ready or (self._task is not None and not self._task.done()):
+            return
+        if self._retry_event is not None:
+            self._retry_event.cancel()
+            self._retry_event = None
+        self.attempt += 1
+        logger.info(f"Connecting to the {self.data_model.backend} database (attempt {self.attempt})...")
+        self.view.show_status("Connecting to the database...")
+        self._task = self.db_executor.submit(self._prepare_database, on_success=self._on_ready,
+                                             on_error=self._on_failed)
+
+    def retry_now(self):
+        """Retry button: skips the rest of the backoff wait."""
+        logger.info("Reconnection requested by user.")
+        self.start()
+
+    def _prepare_database(self):
+        """Runs on a worker thread."""
+        with startup_profiler.phase('connect_database'):
+            self.db_executor.connect()
+        with startup_profiler.phase('load_criteria'):
+            self.data_model.criteria_catalog.load()
+
+    def _on_ready(self, result):
+        self.ready = True
+        self._retry_delay = RETRY_INITIAL_DELAY
+        logger.info(f"Database ready after {self.attempt} attempt(s).")
+        self.view.show_status("Connected.")
+        self.app.on_database_ready()
+
+    def _on_failed(self, error):
+        if isinstance(error, DatabaseError):
+            logger.error(f"Database not reachable (attempt {self.attempt}): {error}")
+        else:
+            logger.error(f"Unexpected error while connecting (attempt {self.attempt}): {error}", exc_info=error)
+        delay = self._retry_delay
+        self._retry_delay = min(self._retry_delay * 2, RETRY_MAX_DELAY)
+        self.view.show_status(f"Cannot reach the database: {error}\nRetrying in {delay:.0f} s...",
+                              is_error=True, can_retry=True)
+        self._retry_event = Clock.schedule_once(lambda dt: self.start(), delay)
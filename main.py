@@ -1,29 +1,40 @@
-import os
-import importlib
+import startup_profiler  # First import: times everything below when STARTUP_PROFILE is set
 import logging
+import time
 
-from kivy.core.window import Window
-from kivy.lang import Builder
-from kivymd.app import MDApp
+with startup_profiler.phase('import_ui'):
+    from kivy.clock import Clock
+    from kivy.core.window import Window
+    from kivymd.app import MDApp
 
-from kivy.uix.screenmanager import ScreenManager, NoTransition
-from kivymd.uix.menu import MDDropdownMenu
+    from kivy.uix.screenmanager import NoTransition
+    from kivymd.uix.menu import MDDropdownMenu
 
-from config import BASE_DIR, KV_DIR, VIEW_DIR, CONTROLLER_DIR
+with startup_profiler.phase('import_config'):
+    from config import CHANGE_FEED_ENABLED, DB_METRICS_DUMP_PATH
 
-from model.session_model import SessionModel
-from model.database_model import DatabaseModel, initialize_pool, close_pool
+with startup_profiler.phase('import_models'):
+    from model.session_model import SessionModel
+    from model.backends import create_database_model
+    from model.async_database_model import AsyncDatabaseModel
+    from model.auth_service import AuthService
+    from model.item_events import ItemEventBus
+    from model.change_feed import ChangeFeed
+    from model.db_executor import DatabaseExecutor
+    from view.lazy_screen_manager import LazyScreenManager, ScreenFactory
 
 log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 logging.basicConfig(level=logging.INFO, format=log_format)
 logger = logging.getLogger(__name__)
 
+# Screens are built on first navigation; prefetch names the screens built in idle time once this one is shown.
 SCREENS = {
-    "ratings": "Ratings",
-    "signup": "SignUp",
-    "login": "Login",
-    "profile": "Profile",
-    "add_item": "AddItem",
+    "splash": ScreenFactory("Splash", prefetch=("login", "ratings")),
+    "ratings": ScreenFactory("Ratings", prefetch=("add_item", "profile")),
+    "signup": ScreenFactory("SignUp", prefetch=("ratings",)),
+    "login": ScreenFactory("Login", prefetch=("ratings", "signup")),
+    "profile": ScreenFactory("Profile"),
+    "add_item": ScreenFactory("AddItem"),
 }
 
 class RateSphere(MDApp):
@@ -32,6 +43,7 @@ class RateSphere(MDApp):
 
         self.menu_navigation_data = []
         self.menu_profile_data = []
+        self._startup_profile_done = False
 
         Window.fullscreen = "auto"
         self.icon = "assets/icons/icon.icon"
@@ -39,14 +51,25 @@ class RateSphere(MDApp):
 
     def build(self):
         logger.info("Building the application UI...")
+        build_started = time.perf_counter()
         try:
-            initialize_pool()
+            db_executor = DatabaseExecutor()
+            db_executor.start(connect=False)   # The splash screen connects in the background
+            with startup_profiler.phase('session_model'):
+                session = SessionModel()
+            database = create_database_model()
+            item_events = ItemEventBus()
             self.models = {
-                'session': SessionModel(),
-                'database': DatabaseModel(),
+                'session': session,
+                'database': database,
+                'async_database': AsyncDatabaseModel(database, db_executor),
+                'db_executor': db_executor,
+                'item_events': item_events,
+                'auth': AuthService(database),
+                'change_feed': ChangeFeed(database, db_executor, item_events, session),
             }
         except Exception as e:
-            logger.exception("FATAL: Failed to initialize models or database pool during build!")
+            logger.exception("FATAL: Failed to initialize models during build!")
             raise RuntimeError("Failed to initialize critical components.") from e
 
         saved_theme = self.models['session'].get_preferred_theme_style()
@@ -91,92 +114,52 @@ class RateSphere(MDApp):
             },
         ]
 
-        self.screen_manager = ScreenManager(transition=NoTransition())
-
-        logger.info("--- Loading KV Files ---")
-        for screen_name in SCREENS.keys():
-             kv_file_path = os.path.join(KV_DIR, f"{screen_name}_screen.kv")
-             if os.path.exists(kv_file_path):
-                 try:
-                     Builder.load_file(kv_file_path)
-                     logger.info(f"KV file loaded: {kv_file_path}")
-                 except Exception as e:
-                     logger.exception(f"Loading KV file: {kv_file_path}: {e}")
-             else:
-                 logger.warning(f"KV file not found: {kv_file_path}")
-        logger.info("--- KV Loading Complete ---")
-
-        logger.info("--- Registering Screens ---")
-        created_screens = []
-        for screen_name, class_prefix in SCREENS.items():
-            view_instance = self._register_screen_modules(screen_name, class_prefix)
-            if view_instance:
-                created_screens.append(view_instance)
-        logger.info("--- Screen Module Registration Complete ---")
-
-        logger.info(f"--- Adding {len(created_screens)} screens to ScreenManager (Phase 2) ---")
-        for screen_instance in created_screens:
-             try:
-                 self.screen_manager.add_widget(screen_instance)
-                 logger.info(f"Added screen: {screen_instance.name}")
-             except Exception as e:
-                 logger.exception(f"FAILED to add screen {screen_instance.name} to manager: {e}")
-        logger.info(f"--- ScreenManager final screens: {self.screen_manager.screen_names} ---")
+        self.screen_manager = LazyScreenManager(SCREENS, app=self, transition=NoTransition())
+        logger.info(f"Registered {len(SCREENS)} lazily built screens: {', '.join(SCREENS)}")
 
+        startup_profiler.profiler.record_phase('build', build_started, time.perf_counter())
         logger.info("Build process completed.")
         return self.screen_manager
 
-    def _register_screen_modules(self, screen_name: str, class_prefix: str):
-        """
-        Imports View and Controller, creates their instances, and associates them.
-        Returns the created view_instance or None on failure.
-        Assumes KV file has already been loaded in the build() method.
-        DOES NOT add the widget to the screen manager.
-        """
-        logger.debug(f"Registering modules for: '{screen_name}' (Classes: {class_prefix}...)")
-        view_instance = None
-
-        view_module_name = f"view.screens.{screen_name}_screen"
-        view_class_name = f"{class_prefix}Screen"
-        controller_module_name = f"controller.{screen_name}_controller"
-        controller_class_name = f"{class_prefix}Controller"
-        controller_attr_name = f"{screen_name}_controller"
-
-        try:
-            view_module = importlib.import_module(view_module_name)
-            ViewClass = getattr(view_module, view_class_name)
-            view_instance = ViewClass(name=screen_name)
-            logger.debug(f"View created: {view_class_name}")
-
-            controller_module = importlib.import_module(controller_module_name)
-            ControllerClass = getattr(controller_module, controller_class_name)
-            controller_instance = ControllerClass(
-                models=self.models,
-                view=view_instance,
-                app=self
-            )
-            logger.debug(f"Controller created: {controller_class_name}")
-
-            setattr(self, controller_attr_name, controller_instance)
-            logger.debug(f"Controller available as: app.{controller_attr_name}")
-
-        except ImportError as e:
-            logger.error(f"IMPORT FAILED for screen '{screen_name}': {e}")
-            logger.error(f"Please check: {view_module_name.replace('.', '/')}.py (Class {view_class_name}) or {controller_module_name.replace('.', '/')}.py (Class {controller_class_name})")
-            view_instance = None
-        except AttributeError as e:
-            logger.error(f"ATTRIBUTE ERROR for screen '{screen_name}': {e}")
-            logger.error(f"Check that the classes '{view_class_name}' and '{controller_class_name}' exist in the corresponding files.")
-            view_instance = None
-        except Exception as e:
-            logger.exception(f"  - UNKNOWN ERROR while registering screen modules for '{screen_name}': {e}")
-            view_instance = None
-
-        return view_instance
-
     def on_start(self):
-        """Set the initial screen depending on the login status."""
-        logger.info("Application starting, checking login status...")
+        """Shows the splash screen, which connects to the database and then calls on_database_ready()."""
+        startup_profiler.mark('on_start')
+        logger.info("Application starting, connecting to the database in the background...")
+        self.root.current = "splash"
+        if startup_profiler.profiler.enabled:
+            Window.bind(on_flip=self._on_first_frame)
+            if startup_profiler.profiler.exit_after_report:
+                Clock.schedule_once(lambda dt: self._finish_startup_profile(force=True),
+                                    startup_profiler.EXIT_TIMEOUT)
+
+    def _on_first_frame(self, *args):
+        Window.unbind(on_flip=self._on_first_frame)
+        startup_profiler.mark('first_frame')
+        self._finish_startup_profile()
+
+    def _finish_startup_profile(self, force=False):
+        """Writes the startup report; with STARTUP_PROFILE_EXIT, stops the app once startup is complete."""
+        profiler = startup_profiler.profiler
+        if not profiler.enabled or self._startup_profile_done:
+            return
+        complete = 'first_frame' in profiler.marks and 'database_ready' in profiler.marks
+        profiler.write_report()
+        if complete or force:
+            self._startup_profile_done = True
+            if profiler.exit_after_report:
+                self.stop()
+
+    def on_database_ready(self):
+        """Starts the background services and sets the initial screen depending on the login status."""
+        startup_profiler.mark('database_ready')
+        database = self.models['database']
+        if CHANGE_FEED_ENABLED and database.backend == 'postgresql':
+            self.models['change_feed'].start()
+        if database.backend == 'replica' and 'replica_sync' not in self.models:
+            from model.replica_sync import ReplicaSyncer
+            self.models['replica_sync'] = ReplicaSyncer(database, self.models['item_events'], self.models['session'])
+            self.models['replica_sync'].start()
+
         try:
             session = self.models['session']
             if session.is_logged_in():
@@ -186,17 +169,32 @@ class RateSphere(MDApp):
                 logger.info("No user logged in. Navigating to 'login'.")
                 self.root.current = "login"
         except Exception as e:
-            logger.exception("Error in on_start determining initial screen")
+            logger.exception("Error determining initial screen")
             try:
                 self.root.current = "login"
-                logger.warning("Setting screen to 'login' due to error in on_start.")
+                logger.warning("Setting screen to 'login' due to error determining the initial screen.")
             except Exception as e2:
-                logger.critical(f"Failed to set screen to login after error in on_start: {e2}")
+                logger.critical(f"Failed to set screen to login after error determining the initial screen: {e2}")
+        self._finish_startup_profile()
 
     def on_stop(self):
         logger.info("Application stopping.")
-        close_pool()
-        logger.info("Database connection pool closed.")
+        if hasattr(self, 'models') and 'change_feed' in self.models:
+            self.models['change_feed'].stop()
+        if hasattr(self, 'models') and 'replica_sync' in self.models:
+            self.models['replica_sync'].stop()
+        if hasattr(self, 'models') and 'session' in self.models:
+            self.models['session'].flush()
+        if hasattr(self, 'models') and 'auth' in self.models:
+            self.models['auth'].shutdown()
+        if hasattr(self, 'models') and 'db_executor' in self.models:
+            self.models['db_executor'].shutdown()
+        logger.info("Database connections closed.")
+        if hasattr(self, 'models') and 'database' in self.models:
+            query_metrics = self.models['database'].query_metrics
+            query_metrics.log_summary()
+            if DB_METRICS_DUMP_PATH:
+                query_metrics.dump(DB_METRICS_DUMP_PATH)
 
     def logout(self):
         """Performs user logout: clears the session and goes to the login screen."""
@@ -205,6 +203,8 @@ class RateSphere(MDApp):
             current_user = self.models['session'].get_current_username()
             self.models['session'].logout()
             logger.info(f"User '{current_user}' logged out.")
+        if 'database' in self.models:
+            self.models['database'].criterion_ratings_cache.clear()
 
         if self.root and hasattr(self.root, 'current'):
             self.root.current = 'login'
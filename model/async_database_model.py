@@ -0,0 +1,115 @@
+import logging
+from functools import partial
+
+import asynckivy as ak
+
+from model.database_model import DatabaseModel, SEARCH_RESULTS_LIMIT
+
+logger = logging.getLogger(__name__)
+
+class AsyncDatabaseModel:
+    """
+    Awaitable mirror of the DatabaseModel API for use inside asynckivy tasks.
+    Every call runs the blocking psycopg2 method on the DatabaseExecutor's worker threads and
+    resumes the awaiting task on the Kivy main thread, so independent queries can be awaited
+    together (e.g. with asynckivy.wait_all) instead of back to back.
+    Cancelling the awaiting task drops calls that have not started yet.
+    """
+    data_model: DatabaseModel
+
+    def __init__(self, data_model, db_executor):
+        self.data_model = data_model    # Link to DatabaseModel (does the actual work)
+        self.db_executor = db_executor  # Link to DatabaseExecutor (provides the worker threads)
+
+    async def _run(self, func, *args, **kwargs):
+        return await ak.run_in_executor(self.db_executor.thread_pool, partial(func, *args, **kwargs))
+
+    async def run_in_transaction(self, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) on one worker thread inside data_model.transaction()."""
+        def call():
+            with self.data_model.transaction():
+                return func(*args, **kwargs)
+        return await self._run(call)
+
+    async def execute_query(self, sql, params=None, fetch=None, use_dict_cursor=False):
+        return await self._run(self.data_model.execute_query, sql, params, fetch, use_dict_cursor)
+
+    async def add_user(self, username, email, password_hash):
+        return await self._run(self.data_model.add_user, username, email, password_hash)
+
+    async def add_rated_item(self, user_id, name, item_type, status, alt_name=None, review=None):
+        return await self._run(self.data_model.add_rated_item, user_id, name, item_type, status,
+                               alt_name=alt_name, review=review)
+
+    async def add_or_update_criterion_rating(self, item_id, criterion_id, rating):
+        return await self._run(self.data_model.add_or_update_criterion_rating, item_id, criterion_id, rating)
+
+    async def add_or_update_criterion_ratings(self, item_id, criterion_ratings):
+        return await self._run(self.data_model.add_or_update_criterion_ratings, item_id, criterion_ratings)
+
+    async def get_user_by_username(self, username, use_dict_cursor=False):
+        return await self._run(self.data_model.get_user_by_username, username, use_dict_cursor)
+
+    async def get_user_by_email(self, email, use_dict_cursor=False):
+        return await self._run(self.data_model.get_user_by_email, email, use_dict_cursor)
+
+    async def get_user_items(self, user_id, sort_by='created_at', sort_order='DESC', use_dict_cursor=False,
+                             limit=None, after=None, item_filter=None):
+        return await self._run(self.data_model.get_user_items, user_id, sort_by, sort_order, use_dict_cursor,
+                               limit=limit, after=after, item_filter=item_filter)
+
+    async def search_user_items(self, user_id, query, limit=SEARCH_RESULTS_LIMIT, use_dict_cursor=True,
+                                item_filter=None):
+        return await self._run(self.data_model.search_user_items, user_id, query, limit, use_dict_cursor,
+                               item_filter=item_filter)
+
+    async def get_rated_item(self, item_id, use_dict_cursor=True):
+        return await self._run(self.data_model.get_rated_item, item_id, use_dict_cursor)
+
+    async def get_rated_items(self, item_ids, use_dict_cursor=True):
+        return await self._run(self.data_model.get_rated_items, item_ids, use_dict_cursor)
+
+    async def get_criterion_by_id(self, criterion_id, use_dict_cursor=True):
+        return await self._run(self.data_model.get_criterion_by_id, criterion_id, use_dict_cursor)
+
+    async def get_criterion_by_name(self, name, use_dict_cursor=True):
+        return await self._run(self.data_model.get_criterion_by_name, name, use_dict_cursor)
+
+    async def get_overall_criterion(self, use_dict_cursor=True):
+        return await self._run(self.data_model.get_overall_criterion, use_dict_cursor)
+
+    async def get_all_criteria(self, use_dict_cursor=True):
+        return await self._run(self.data_model.get_all_criteria, use_dict_cursor)
+
+    async def get_suggested_criteria(self, item_type, use_dict_cursor=True):
+        return await self._run(self.data_model.get_suggested_criteria, item_type, use_dict_cursor)
+
+    async def get_criterion_ratings_for_item(self, item_id, use_dict_cursor=True):
+        return await self._run(self.data_model.get_criterion_ratings_for_item, item_id, use_dict_cursor)
+
+    async def get_criterion_ratings_for_items(self, item_ids):
+        return await self._run(self.data_model.get_criterion_ratings_for_items, item_ids)
+
+    async def get_user_details(self, user_id):
+        return await self._run(self.data_model.get_user_details, user_id)
+
+    async def get_user_statistics(self, user_id):
+        return await self._run(self.data_model.get_user_statistics, user_id)
+
+    async def get_user_password_hash(self, user_id):
+        return await self._run(self.data_model.get_user_password_hash, user_id)
+
+    async def update_user_password(self, user_id, new_password_hash):
+        return await self._run(self.data_model.update_user_password, user_id, new_password_hash)
+
+    async def update_rated_item(self, item_id, name, alt_name, item_type, status, review):
+        return await self._run(self.data_model.update_rated_item, item_id, name, alt_name, item_type, status, review)
+
+    async def update_overall_rating(self, item_id, direct_overall_rating=None):
+        return await self._run(self.data_model.update_overall_rating, item_id, direct_overall_rating)
+
+    async def delete_rated_item(self, item_id):
+        return await self._run(self.data_model.delete_rated_item, item_id)
+
+    async def delete_criteria_ratings_except(self, item_id, criteria_ids_to_keep):
+        return await self._run(self.data_model.delete_criteria_ratings_except, item_id, criteria_ids_to_keep)
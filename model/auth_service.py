@@ -0,0 +1,165 @@
+"""
+Password hashing and verification for RateSphere accounts.
+
+bcrypt is deliberately slow (hundreds of milliseconds at a sane cost factor), so AuthService runs every
+check on its own small thread pool and reports back through Clock callbacks. The bcrypt module releases
+the GIL while hashing, so threads hash in parallel and the UI keeps drawing.
+
+To pick BCRYPT_ROUNDS for the current machine:
+
+    python -m model.auth_service --calibrate --target-ms 250
+"""
+import os
+if __name__ == '__main__':
+    # Run as a command: keep Kivy (imported below through model.db_executor) away from our options.
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from config import BCRYPT_ROUNDS, AUTH_WORKERS
+from model.database_model import DatabaseError
+from model.db_executor import submit_with_callbacks
+
+logger = logging.getLogger(__name__)
+
+MIN_ROUNDS = 4      # Lowest cost bcrypt accepts
+MAX_ROUNDS = 31     # Highest cost bcrypt accepts
+DEFAULT_CALIBRATION_TARGET = 0.25   # Seconds one hash should take on the target machine
+
+class AuthError(Exception):
+    """An authentication request was refused (taken username, wrong password...). The message is user-facing."""
+    pass
+
+def hash_cost(password_hash):
+    """Returns the cost factor of a '$2b$12$...' hash, or None if it is not a bcrypt hash."""
+    parts = password_hash.split('$') if password_hash else []
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+def calibrate_rounds(target_seconds=DEFAULT_CALIBRATION_TARGET, min_rounds=10, max_rounds=16):
+    """
+    Returns the highest cost factor in [min_rounds, max_rounds] whose hash takes at most target_seconds here
+    (min_rounds if even that is slower). Each extra round doubles the time, so only one hash is timed.
+    """
+    started = time.perf_counter()
+    bcrypt.hashpw(b'calibration', bcrypt.gensalt(rounds=min_rounds))
+    elapsed = time.perf_counter() - started
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed * 2 <= target_seconds:
+        rounds += 1
+        elapsed *= 2
+    logger.info(f"Calibrated bcrypt cost: {rounds} (about {elapsed * 1000:.0f} ms per hash).")
+    return rounds
+
+class AuthService:
+    """
+    Login, signup and password change on top of DatabaseModel, with bcrypt hashing.
+    The blocking methods (authenticate, register, change_password) run on the calling thread;
+    submit() runs one of them on the auth thread pool and calls on_success(result) or
+    on_error(exception) on the Kivy main thread. Hashes with an outdated cost factor are
+    replaced on the next successful login.
+    """
+
+    def __init__(self, data_model, rounds=BCRYPT_ROUNDS, max_workers=AUTH_WORKERS):
+        if not MIN_ROUNDS <= rounds <= MAX_ROUNDS:
+            raise ValueError(f"BCRYPT_ROUNDS must be between {MIN_ROUNDS} and {MAX_ROUNDS}, got {rounds}.")
+        self.data_model = data_model    # Link to DatabaseModel
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, on_success=None, on_error=None, **kwargs):
+        """Runs func(*args, **kwargs) on the auth thread pool. Returns a DatabaseTask."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="auth-worker")
+            return submit_with_callbacks(self._executor, func, *args,
+                                         on_success=on_success, on_error=on_error, **kwargs)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                logger.info("Auth worker pool stopped.")
+
+    def hash_password(self, password):
+        """Returns the bcrypt hash of password (as str) at the configured cost."""
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=self.rounds)).decode('utf-8')
+
+    def verify_password(self, password, password_hash):
+        """True if password matches password_hash. A malformed stored hash counts as a mismatch."""
+        try:
+            return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        except ValueError as e:
+            logger.error(f"Password check failed, the stored hash is invalid: {e}")
+            return False
+
+    def needs_rehash(self, password_hash):
+        return hash_cost(password_hash) != self.rounds
+
+    def authenticate(self, username, password):
+        """
+        Checks the credentials. Returns the user row, or None if they are wrong.
+        Raises DatabaseError if the user cannot be looked up.
+        """
+        user_data = self.data_model.get_user_by_username(username, use_dict_cursor=True)
+        if not user_data or not self.verify_password(password, user_data['password_hash']):
+            return None
+        if self.needs_rehash(user_data['password_hash']):
+            self._rehash(user_data['user_id'], password, user_data['password_hash'])
+        return user_data
+
+    def _rehash(self, user_id, password, old_hash):
+        """Stores the password again at the current cost. Failing here must not fail the login."""
+        try:
+            self.data_model.update_user_password(user_id, self.hash_password(password))
+            logger.info(f"Rehashed password of user {user_id} from cost {hash_cost(old_hash)} to {self.rounds}.")
+        except DatabaseError as e:
+            logger.warning(f"Could not store the rehashed password of user {user_id}: {e}")
+
+    def register(self, username, email, password):
+        """Creates the account and returns its user_id. Raises AuthError if the username or email is taken."""
+        if self.data_model.get_user_by_username(username):
+            raise AuthError("This username is already taken")
+        if self.data_model.get_user_by_email(email):
+            raise AuthError("This email is already registered")
+        user_id = self.data_model.add_user(username, email, self.hash_password(password))
+        if not user_id:
+            raise DatabaseError(f"add_user returned no ID for '{username}'.")
+        return user_id
+
+    def change_password(self, user_id, current_password, new_password):
+        """Replaces the user's password. Raises AuthError if current_password is wrong."""
+        current_hash = self.data_model.get_user_password_hash(user_id)
+        if not current_hash:
+            raise DatabaseError(f"Could not retrieve the password hash of user {user_id}.")
+        if not self.verify_password(current_password, current_hash):
+            raise AuthError("Incorrect current password.")
+        if not self.data_model.update_user_password(user_id, self.hash_password(new_password)):
+            raise DatabaseError(f"Password update of user {user_id} returned no result.")
+        return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Password hashing utilities for RateSphere.")
+    parser.add_argument('--calibrate', action='store_true', help="Suggest BCRYPT_ROUNDS for this machine.")
+    parser.add_argument('--target-ms', type=float, default=DEFAULT_CALIBRATION_TARGET * 1000,
+                        help="Time one hash should take (default: %(default)s).")
+    args = parser.parse_args()
+    if not args.calibrate:
+        parser.print_help()
+        return
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    rounds = calibrate_rounds(args.target_ms / 1000)
+    print(f"BCRYPT_ROUNDS={rounds}")
+
+if __name__ == '__main__':
+    main()
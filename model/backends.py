@@ -0,0 +1,49 @@
+import logging
+
+from config import DB_BACKEND, SQLITE_PATH, REPLICA_PATH
+from model.database_model import DatabaseModel, DatabaseError, initialize_pool, close_pool, get_pool_stats
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('postgresql', 'sqlite', 'replica')
+
+def _check_backend():
+    if DB_BACKEND not in BACKENDS:
+        raise DatabaseError(f"Unknown DB_BACKEND '{DB_BACKEND}', expected one of: {', '.join(BACKENDS)}.")
+    return DB_BACKEND
+
+def create_database_model():
+    """Returns the DatabaseModel implementation selected by DB_BACKEND."""
+    backend = _check_backend()
+    if backend == 'sqlite':
+        from model.sqlite_database_model import SqliteDatabaseModel
+        return SqliteDatabaseModel(SQLITE_PATH)
+    if backend == 'replica':
+        from model.replica_database_model import ReplicaDatabaseModel
+        return ReplicaDatabaseModel(REPLICA_PATH)
+    return DatabaseModel()
+
+def open_backend():
+    """
+    Connects to the configured backend: creates the PostgreSQL pool or opens the SQLite file. Raises DatabaseError.
+    The replica only opens its local file; the pool is created on the first server query, so startup works offline.
+    """
+    backend = _check_backend()
+    if backend == 'sqlite':
+        from model.sqlite_database_model import initialize_database
+        initialize_database(SQLITE_PATH)
+    elif backend == 'replica':
+        from model.sqlite_database_model import initialize_database
+        from model.replica_database_model import REPLICA_SCHEMA_PATHS
+        initialize_database(REPLICA_PATH, REPLICA_SCHEMA_PATHS)
+    else:
+        initialize_pool()
+
+def close_backend():
+    """Closes every connection opened by open_backend() and the models."""
+    backend = _check_backend()
+    if backend in ('sqlite', 'replica'):
+        from model.sqlite_database_model import close_connections
+        close_connections()
+    if backend == 'postgresql' or get_pool_stats() is not None:
+        close_pool()
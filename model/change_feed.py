@@ -0,0 +1,146 @@
+import json
+import logging
+import select
+import threading
+
+import psycopg2
+from kivy.clock import Clock
+
+from model.database_model import DatabaseError, get_pool_backend_pids, open_dedicated_connection
+
+logger = logging.getLogger(__name__)
+
+CHANGE_FEED_CHANNEL = 'item_changes'
+POLL_TIMEOUT = 1.0          # Seconds between checks of the stop flag while idle
+COALESCE_DELAY = 0.1        # Seconds to keep collecting notifications before handling a batch
+RELOAD_THRESHOLD = 50       # More changed items than this in one batch reload lists instead of patching them
+MAX_RECONNECT_DELAY = 30.0
+
+class ChangeFeed:
+    """
+    Follows the 'item_changes' notifications sent by the triggers in schema_upgrade.sql on a dedicated
+    LISTEN connection, so that changes made by other running clients show up without polling.
+    Notifications sent by this process's own pooled connections are skipped: its controllers have
+    already applied those changes.
+    For the logged-in user's items it drops cached criterion ratings and re-publishes the changed
+    rows on the ItemEventBus, which patches open lists.
+    """
+
+    def __init__(self, data_model, db_executor, item_events, session_model):
+        self.data_model = data_model        # Link to DatabaseModel
+        self.db_executor = db_executor      # Link to DatabaseExecutor (fetches changed rows)
+        self.item_events = item_events      # Link to ItemEventBus
+        self.session_model = session_model  # Link to SessionModel (whose items matter)
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+        self._thread.start()
+        logger.info(f"Change feed started on channel '{CHANGE_FEED_CHANNEL}'.")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=POLL_TIMEOUT + 1)
+            self._thread = None
+        logger.info("Change feed stopped.")
+
+    def _run(self):
+        """Listener thread: (re)connects with backoff and hands batches of notifications over."""
+        reconnect_delay = 1.0
+        while not self._stop.is_set():
+            try:
+                self._conn = open_dedicated_connection()
+                with self._conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CHANGE_FEED_CHANNEL};")
+                logger.debug("Change feed connection is listening.")
+                reconnect_delay = 1.0
+                self._listen()
+            except (DatabaseError, psycopg2.Error, OSError) as e:
+                logger.warning(f"Change feed connection lost: {e}. Reconnecting in {reconnect_delay:.0f}s.")
+                self._stop.wait(reconnect_delay)
+                reconnect_delay = min(reconnect_delay * 2, MAX_RECONNECT_DELAY)
+            finally:
+                if self._conn is not None:
+                    try:
+                        self._conn.close()
+                    except psycopg2.Error:
+                        pass
+                    self._conn = None
+
+    def _listen(self):
+        conn = self._conn
+        while not self._stop.is_set():
+            if select.select([conn], [], [], POLL_TIMEOUT) == ([], [], []):
+                continue
+            conn.poll()
+            # Let a burst (e.g. one transaction touching many items) arrive before handling it.
+            while select.select([conn], [], [], COALESCE_DELAY) != ([], [], []):
+                conn.poll()
+            notifications = list(conn.notifies)
+            conn.notifies.clear()
+            self._handle_batch(notifications)
+
+    def _handle_batch(self, notifications):
+        """Runs on the listener thread."""
+        own_pids = get_pool_backend_pids()
+        changes = []
+        for notification in notifications:
+            if notification.pid in own_pids:
+                continue
+            try:
+                change = json.loads(notification.payload)
+                changes.append((change['table'], change['op'], change['item_id'], change.get('user_id')))
+            except (ValueError, KeyError, TypeError):
+                logger.warning(f"Ignoring malformed change notification: {notification.payload!r}")
+        if not changes:
+            return
+
+        # The ratings cache is thread-safe, so stale entries are dropped right away.
+        self.data_model.criterion_ratings_cache.invalidate(
+            {item_id for _, _, item_id, _ in changes if item_id is not None})
+        logger.debug(f"Change feed received {len(changes)} change(s).")
+        Clock.schedule_once(lambda dt: self._dispatch(changes))
+
+    def _dispatch(self, changes):
+        """Runs on the main thread: turns the changes of the current user into item events."""
+        user_id = self.session_model.get_current_user_id()
+        if not user_id:
+            return
+        if any(op == 'IMPORT' and owner == user_id for _, op, _, owner in changes):
+            logger.info("Items were imported elsewhere, reloading lists.")
+            self.item_events.items_reloaded(user_id)
+            return
+        deleted_ids = {item_id for table, op, item_id, owner in changes
+                       if owner == user_id and table == 'rated_items' and op == 'DELETE'}
+        changed_ids = {item_id for table, op, item_id, owner in changes
+                       if owner == user_id and item_id not in deleted_ids}
+
+        for item_id in deleted_ids:
+            self.item_events.item_deleted(item_id, user_id)
+        if not changed_ids:
+            return
+        if len(changed_ids) > RELOAD_THRESHOLD:
+            logger.info(f"{len(changed_ids)} items changed elsewhere, reloading lists.")
+            self.item_events.items_reloaded(user_id)
+            return
+
+        self.db_executor.submit(
+            self.data_model.get_rated_items, sorted(changed_ids),
+            on_success=lambda rows: self._publish_rows(user_id, changed_ids, rows),
+            on_error=lambda error: logger.warning(f"Could not fetch items changed elsewhere: {error}"),
+        )
+
+    def _publish_rows(self, user_id, changed_ids, rows):
+        found_ids = set()
+        for row in rows:
+            found_ids.add(row['item_id'])
+            self.item_events.item_updated(row)
+        for item_id in changed_ids - found_ids:
+            self.item_events.item_deleted(item_id, user_id)
@@ -0,0 +1,133 @@
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+LOAD_CRITERIA_SQL = """
+    SELECT criterion_id, name, description, default_for_types::text[] AS default_for_types, is_overall
+    FROM criteria
+    ORDER BY name;
+"""
+
+# Changes whenever any criteria row is inserted, updated or deleted.
+CRITERIA_FINGERPRINT_SQL = """
+    SELECT md5(COALESCE(string_agg(c::text, '|' ORDER BY c.criterion_id), ''))
+    FROM criteria c;
+"""
+
+class CriteriaCatalog:
+    """
+    In-memory copy of the small, almost static criteria table.
+    Loaded lazily on first use and indexed by id, name, item type and the overall criterion,
+    so lookups during item saving never touch the database.
+    """
+
+    def __init__(self, data_model, fingerprint_sql=CRITERIA_FINGERPRINT_SQL):
+        self.data_model = data_model    # Link to DatabaseModel (used only to (re)load the table)
+        self.fingerprint_sql = fingerprint_sql
+        self.version = 0                # Incremented on every successful (re)load
+
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._fingerprint = None
+        self._ordered = []
+        self._by_id = {}
+        self._by_name = {}
+        self._by_type = {}
+        self._overall = None
+
+    def load(self):
+        """(Re)loads the whole criteria table and rebuilds the indexes. Raises DatabaseError on failure."""
+        with self._lock:
+            rows = self.data_model.execute_query(LOAD_CRITERIA_SQL, fetch="all", use_dict_cursor=True) or []
+            fingerprint = self._fetch_fingerprint()
+
+            ordered = []
+            by_id, by_name, by_type = {}, {}, {}
+            overall = None
+            for row in rows:
+                criterion = {
+                    'criterion_id': row['criterion_id'],
+                    'name': row['name'],
+                    'description': row['description'],
+                    'default_for_types': self._item_types(row['default_for_types']),
+                    'is_overall': row['is_overall'],
+                }
+                ordered.append(criterion)
+                by_id[criterion['criterion_id']] = criterion
+                by_name[criterion['name']] = criterion
+                for item_type in criterion['default_for_types']:
+                    by_type.setdefault(item_type, []).append(criterion)
+                if criterion['is_overall'] and overall is None:
+                    overall = criterion
+
+            self._ordered = ordered
+            self._by_id = by_id
+            self._by_name = by_name
+            self._by_type = by_type
+            self._overall = overall
+            self._fingerprint = fingerprint
+            self._loaded = True
+            self.version += 1
+            logger.info(f"Criteria catalog loaded: {len(ordered)} criteria (version {self.version}).")
+
+    def invalidate(self):
+        """Drops the cached table; the next lookup reloads it."""
+        with self._lock:
+            self._loaded = False
+            logger.debug("Criteria catalog invalidated.")
+
+    def check_version(self):
+        """
+        Compares the cached table against the database with one cheap fingerprint query
+        and reloads it if it changed. Returns True if a reload happened.
+        """
+        with self._lock:
+            if not self._loaded:
+                self.load()
+                return True
+            if self._fetch_fingerprint() == self._fingerprint:
+                return False
+            logger.info("Criteria table changed in the database, reloading catalog.")
+            self.load()
+            return True
+
+    @staticmethod
+    def _item_types(value):
+        """default_for_types arrives as a list (PostgreSQL array) or as JSON text (SQLite)."""
+        if isinstance(value, str):
+            value = json.loads(value)
+        return list(value or [])
+
+    def _fetch_fingerprint(self):
+        result = self.data_model.execute_query(self.fingerprint_sql, fetch="one")
+        return result[0] if result else None
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load()
+
+    def get_by_id(self, criterion_id):
+        self._ensure_loaded()
+        return self._by_id.get(criterion_id)
+
+    def get_by_name(self, name):
+        self._ensure_loaded()
+        return self._by_name.get(name)
+
+    def get_overall(self):
+        self._ensure_loaded()
+        return self._overall
+
+    def get_all(self):
+        """Returns all criteria ordered by name."""
+        self._ensure_loaded()
+        return list(self._ordered)
+
+    def get_for_type(self, item_type):
+        """Returns criteria suggested for the item type, ordered by name."""
+        self._ensure_loaded()
+        return list(self._by_type.get(item_type, []))
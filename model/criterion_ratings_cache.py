@@ -0,0 +1,64 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from config import CRITERION_RATINGS_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+class CriterionRatingsCache:
+    """
+    Per-session, size-bounded cache of the criterion ratings of items, keyed by item_id.
+    Filled in batches for the rows visible in the ratings list so that the details dialog and
+    the edit screen can open without a database round trip.
+    """
+
+    def __init__(self, max_items=CRITERION_RATINGS_CACHE_SIZE):
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # item_id -> list of rating dicts, least recently used first
+        self._generation = 0            # Incremented on every invalidation
+
+    @property
+    def generation(self):
+        """Take this before querying and pass it to put_many, so results that raced an invalidation are dropped."""
+        return self._generation
+
+    def get(self, item_id):
+        """Returns a copy of the cached ratings of the item, or None if they are not cached."""
+        with self._lock:
+            ratings = self._entries.get(item_id)
+            if ratings is None:
+                return None
+            self._entries.move_to_end(item_id)
+            return list(ratings)
+
+    def missing(self, item_ids):
+        """Returns the ids (in order, without duplicates) whose ratings are not cached."""
+        with self._lock:
+            return [item_id for item_id in dict.fromkeys(item_ids) if item_id not in self._entries]
+
+    def put_many(self, ratings_by_item, generation):
+        """Stores {item_id: [rating dicts]} unless the cache was invalidated since `generation` was taken."""
+        with self._lock:
+            if generation != self._generation:
+                logger.debug("Discarding criterion ratings fetched before an invalidation.")
+                return
+            for item_id, ratings in ratings_by_item.items():
+                self._entries[item_id] = list(ratings)
+                self._entries.move_to_end(item_id)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, item_ids):
+        with self._lock:
+            self._generation += 1
+            for item_id in item_ids:
+                self._entries.pop(item_id, None)
+
+    def clear(self):
+        """Drops everything, e.g. on logout."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            logger.debug("Criterion ratings cache cleared.")
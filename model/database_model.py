@@ -1,104 +1,345 @@
 import psycopg2
-from psycopg2 import pool, extras
+from psycopg2 import extras
 import logging
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
 
-from config import DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+from config import (DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE,
+                    DB_POOL_CHECKOUT_TIMEOUT, DB_POOL_IDLE_TIMEOUT, DB_SLOW_QUERY_MS)
+from model.criteria_catalog import CriteriaCatalog
+from model.criterion_ratings_cache import CriterionRatingsCache
+from model.pool_manager import PoolManager, PoolExhaustedError
+from model.query_metrics import QueryMetrics, format_params
 
 logger = logging.getLogger(__name__)
-connection_pool = None
+connection_pool = None   # Shared PoolManager, created by initialize_pool()
+_pool_lock = threading.Lock()
+
+ALLOWED_SORT_COLUMNS = ['name', 'item_type', 'status', 'rating', 'created_at', 'updated_at']
+NULLABLE_SORT_COLUMNS = {'rating', 'updated_at'}
+SEARCH_RESULTS_LIMIT = 200  # Search returns one ranked page, no pagination
+OVERALL_CRITERION_NAME = "Total score"  # Rating data key of a direct overall rating (see save_item)
+
+# Objects installed by schema_upgrade.sql that the application relies on: without them saving an item would
+# leave its overall rating unset, search and profile statistics would fail and replicas could not sync.
+# (kind, name) pairs, checked once when the pool is created.
+REQUIRED_SCHEMA_OBJECTS = (
+    ('function', 'recalculate_item_ratings(integer[])'),
+    ('trigger', 'item_criterion_ratings.item_criterion_ratings_refresh_insert'),
+    ('trigger', 'item_criterion_ratings.item_criterion_ratings_refresh_update'),
+    ('trigger', 'item_criterion_ratings.item_criterion_ratings_refresh_delete'),
+    ('column', 'rated_items.search_vector'),
+    ('table', 'user_stats'),
+    ('trigger', 'rated_items.rated_items_user_stats_insert_delete'),
+    ('trigger', 'rated_items.rated_items_user_stats_update'),
+    ('trigger', 'rated_items.rated_items_notify_change'),
+    ('column', 'rated_items.row_version'),
+    ('column', 'rated_items.row_xid'),
+    ('trigger', 'rated_items.rated_items_row_version'),
+    ('table', 'rated_item_tombstones'),
+    ('table', 'rated_item_tombstones_pruned'),
+    ('trigger', 'rated_items.rated_items_tombstones'),
+)
+
+MISSING_SCHEMA_OBJECTS_SQL = """
+    SELECT required.kind, required.name
+    FROM unnest(%s::text[], %s::text[]) AS required(kind, name)
+    WHERE NOT CASE required.kind
+        WHEN 'function' THEN to_regprocedure(required.name) IS NOT NULL
+        WHEN 'table' THEN to_regclass(required.name) IS NOT NULL
+        WHEN 'column' THEN EXISTS (
+            SELECT 1 FROM pg_attribute a
+            WHERE a.attrelid = to_regclass(split_part(required.name, '.', 1))
+              AND a.attname = split_part(required.name, '.', 2)
+              AND NOT a.attisdropped)
+        WHEN 'trigger' THEN EXISTS (
+            SELECT 1 FROM pg_trigger t
+            WHERE t.tgrelid = to_regclass(split_part(required.name, '.', 1))
+              AND t.tgname = split_part(required.name, '.', 2))
+    END;
+"""
 
 class DatabaseError(Exception):
     """Custom exception for database operation errors."""
     pass
 
 def initialize_pool():
+    """Creates the shared PoolManager (with its warm-up connections) if it does not exist yet. Thread-safe."""
     global connection_pool
-    if connection_pool is None:
+    with _pool_lock:
+        if connection_pool is not None:
+            return
         logger.info("Creating database connection pool...")
         try:
-            connection_pool = psycopg2.pool.ThreadedConnectionPool(
-                minconn=1,
-                maxconn=10,
+            pool_manager = PoolManager(
+                min_size=DB_POOL_MIN_SIZE,
+                max_size=DB_POOL_MAX_SIZE,
+                checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT,
+                idle_timeout=DB_POOL_IDLE_TIMEOUT,
                 host=DB_HOST,
                 port=DB_PORT,
                 dbname=DB_NAME,
                 user=DB_USER,
                 password=DB_PASSWORD,
-                cursor_factory = extras.DictCursor
             )
-            conn = connection_pool.getconn()
+            pool_manager.open()
+            try:
+                _check_schema(pool_manager)
+            except BaseException:
+                pool_manager.closeall()
+                raise
+            connection_pool = pool_manager
             logger.info(f"Successfully connected to database '{DB_NAME}' on {DB_HOST}:{DB_PORT}")
-            connection_pool.putconn(conn)
-            logger.info("Connection pool created successfully.")
+        except DatabaseError:
+            raise
         except psycopg2.OperationalError as e:
             logger.critical(f"FATAL: Error creating connection pool: {e}", exc_info=True)
-            connection_pool = None
             raise DatabaseError(f"Could not connect to the database: {e}") from e
         except Exception as e:
             logger.critical(f"FATAL: An unexpected error occurred during pool initialization: {e}", exc_info=True)
-            connection_pool = None
             raise DatabaseError(f"Unexpected error initializing database connection: {e}") from e
 
+def _check_schema(pool_manager):
+    """Raises DatabaseError naming the REQUIRED_SCHEMA_OBJECTS missing from the database."""
+    conn = pool_manager.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(MISSING_SCHEMA_OBJECTS_SQL, ([kind for kind, _ in REQUIRED_SCHEMA_OBJECTS],
+                                                     [name for _, name in REQUIRED_SCHEMA_OBJECTS]))
+            missing = cur.fetchall()
+        conn.rollback()
+    finally:
+        pool_manager.putconn(conn)
+    if missing:
+        names = ', '.join(f"{kind} {name}" for kind, name in missing)
+        logger.critical(f"FATAL: Database '{DB_NAME}' is missing {names}. Run schema_upgrade.sql on it.")
+        raise DatabaseError(f"The database schema is out of date (missing {names}). "
+                            f"Run schema_upgrade.sql on it, see 'Upgrading' in README.md.")
+
+def get_pool_stats():
+    """Returns the PoolManager metrics (checkouts, waits, in-use count, errors...), or None without a pool."""
+    pool_manager = connection_pool
+    return pool_manager.stats() if pool_manager is not None else None
+
+def get_pool_backend_pids():
+    """Returns the backend process ids of the pooled connections (empty without a pool)."""
+    pool_manager = connection_pool
+    return pool_manager.backend_pids() if pool_manager is not None else frozenset()
+
+def open_dedicated_connection():
+    """
+    Opens a connection outside the pool, in autocommit mode, for long-lived work such as LISTEN.
+    The caller owns it and must close it. Raises DatabaseError if the database is unreachable.
+    """
+    try:
+        conn = psycopg2.connect(
+            host=DB_HOST,
+            port=DB_PORT,
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+        )
+        conn.set_session(autocommit=True)
+        return conn
+    except psycopg2.Error as e:
+        raise DatabaseError(f"Could not open a dedicated database connection: {e}") from e
+
 def close_pool():
     global connection_pool
-    if connection_pool:
-        logger.info("Closing connection pool...")
-        connection_pool.closeall()
-        connection_pool = None
-    else:
-        logger.warning("Attempted to close connection pool, but it was not initialized.")
+    with _pool_lock:
+        if connection_pool:
+            logger.info("Closing connection pool...")
+            logger.info(f"Connection pool stats at close: {connection_pool.stats()}")
+            connection_pool.closeall()
+            connection_pool = None
+        else:
+            logger.warning("Attempted to close connection pool, but it was not initialized.")
+
+# Both sources expose the same per-bucket shape so STATISTICS_SQL can aggregate either of them.
+# rating_group is ROUND(rating), with 0 standing for unrated items.
+RATED_ITEMS_STATS_SOURCE_SQL = """
+    SELECT item_type, status,
+           COALESCE(ROUND(rating), 0)::SMALLINT AS rating_group,
+           1 AS item_count,
+           (rating IS NOT NULL)::INTEGER AS rated_count,
+           COALESCE(rating, 0) AS rating_sum
+    FROM rated_items
+    WHERE user_id = %s
+"""
+
+USER_STATS_SOURCE_SQL = """
+    SELECT item_type, status, rating_group, item_count, rated_count, rating_sum
+    FROM user_stats
+    WHERE user_id = %s
+"""
+
+STATISTICS_SQL = """
+    SELECT GROUPING(item_type) AS g_type,
+           GROUPING(status) AS g_status,
+           GROUPING(rating_group) AS g_rating,
+           item_type, status, rating_group,
+           SUM(item_count) AS item_count,
+           SUM(rating_sum) / NULLIF(SUM(rated_count), 0) AS avg_rating
+    FROM ({source}) AS buckets
+    GROUP BY GROUPING SETS ((), (item_type), (status), (rating_group));
+"""
+
+# Items matching every typed word as a prefix (full-text, GIN) or resembling the query by trigrams (name/alt_name).
+# Ranked by text rank plus the best word similarity, so exact hits come first and typos still match.
+SEARCH_ITEMS_SQL = """
+    WITH search AS (
+        SELECT to_tsquery('simple', %s) AS tsq, %s::text AS query
+    )
+    SELECT ri.item_id, ri.name, ri.alt_name, ri.item_type, ri.status, ri.rating, ri.review,
+           ri.created_at, ri.updated_at,
+           ts_rank(ri.search_vector, search.tsq)
+               + GREATEST(word_similarity(search.query, ri.name),
+                          word_similarity(search.query, coalesce(ri.alt_name, ''))) AS search_rank
+    FROM rated_items ri, search
+    WHERE ri.user_id = %s{filter_conditions}
+      AND (ri.search_vector @@ search.tsq
+           OR search.query <%% ri.name
+           OR search.query <%% ri.alt_name)
+    ORDER BY search_rank DESC, ri.item_id DESC
+    LIMIT %s;
+"""
+
+CRITERION_RATINGS_SQL = """
+    SELECT
+        icr.rating_id, icr.item_id, icr.criterion_id, icr.rating,
+        c.name as criterion_name, c.is_overall
+    FROM item_criterion_ratings icr
+    JOIN criteria c ON icr.criterion_id = c.criterion_id
+    WHERE icr.item_id = ANY(%s)
+    ORDER BY icr.item_id, c.name;
+"""
+
+RECALCULATE_RATINGS_SQL = "SELECT recalculate_item_ratings(%s::INTEGER[]);"
 
 class DatabaseModel:
-    def execute_query(self, sql, params=None, fetch=None, use_dict_cursor=False):
+    """
+    Data access for the application, implemented on PostgreSQL. Subclasses for other backends
+    (see SqliteDatabaseModel) override the connection handling and the dialect-specific SQL below.
+    """
+    backend = 'postgresql'
+    statistics_sql = STATISTICS_SQL                     # {source} is statistics_source_sql
+    statistics_source_sql = USER_STATS_SOURCE_SQL       # user_stats is created by schema_upgrade.sql
+    recalculate_ratings_sql = RECALCULATE_RATINGS_SQL   # Takes a list of item ids
+
+    def __init__(self):
+        self._local = threading.local()  # Holds the connection of an open transaction() per thread
+        self.criteria_catalog = CriteriaCatalog(self)
+        self.criterion_ratings_cache = CriterionRatingsCache()
+        self.query_metrics = QueryMetrics(slow_query_ms=DB_SLOW_QUERY_MS)
+
+    def execute_query(self, sql, params=None, fetch=None, use_dict_cursor=False, query_name=None, sensitive=False):
         """
         Executes a query using the pool.
         fetch: None, 'one', 'all'
         use_dict_cursor: If True, returns results as dictionaries.
+        query_name: Name the query is recorded under in query_metrics (default: the calling method).
+        sensitive: If True, the parameters (password hashes, e-mail addresses) are never logged.
+        Inside transaction() the query runs on the transaction's connection and is not committed.
         Raises DatabaseError on failure.
         """
-        global connection_pool
-        if not connection_pool:
-            logger.error("Cannot execute query: Connection pool is not available.")
-            try:
-                logger.warning("Attempting to re-initialize pool before query...")
-                initialize_pool()
-            except DatabaseError as init_e:
-                logger.critical("Failed to re-initialize connection pool.")
-                raise init_e
+        return self._execute(sql, params, fetch=fetch, use_dict_cursor=use_dict_cursor,
+                             query_name=query_name or self._caller_name(), sensitive=sensitive)
+
+    def execute_values(self, sql, argslist, template=None, query_name=None, sensitive=False):
+        """
+        Executes an 'INSERT ... VALUES %s' statement for many rows in a single round trip
+        (psycopg2.extras.execute_values). Same connection/commit rules as execute_query.
+        """
+        return self._execute(sql, argslist, template=template, batch=True,
+                             query_name=query_name or self._caller_name(), sensitive=sensitive)
+
+    def copy_expert(self, sql, file, query_name=None):
+        """
+        Runs a COPY ... FROM STDIN statement reading from the file-like object (cursor.copy_expert).
+        Same connection/commit rules as execute_query. Returns the number of rows copied.
+        """
+        return self._execute(sql, copy_file=file, query_name=query_name or self._caller_name())
+
+    @staticmethod
+    def _caller_name():
+        """Qualified name of the function that called execute_query/execute_values, e.g. 'DatabaseModel.get_user_items'."""
+        code = sys._getframe(2).f_code
+        return getattr(code, 'co_qualname', code.co_name)
 
-            if not connection_pool:
-                raise DatabaseError("Database connection pool is not available after re-initialization attempt.")
+    def _get_pool(self):
+        """Returns the connection pool, creating it if needed. Raises DatabaseError."""
+        pool_manager = connection_pool
+        if pool_manager is None:
+            logger.warning("Connection pool is not available, initializing it before the query...")
+            initialize_pool()
+            pool_manager = connection_pool
+            if pool_manager is None:
+                raise DatabaseError("Database connection pool is not available after initialization attempt.")
+        return pool_manager
 
-        conn = None
+    def _execute(self, sql, params=None, fetch=None, use_dict_cursor=False, batch=False, template=None,
+                 copy_file=None, query_name='query', sensitive=False):
+        tx_conn = getattr(self._local, 'conn', None)
+        pool_used = None
+        conn = tx_conn
+        debug = logger.isEnabledFor(logging.DEBUG)
+        started = None
+        rows = 0
+        failed = True
         try:
-            conn = connection_pool.getconn()
+            if conn is None:
+                pool_used = self._get_pool()
+                conn = pool_used.getconn()
             if conn:
                 cursor_factory = extras.DictCursor if use_dict_cursor else None
                 with conn.cursor(cursor_factory=cursor_factory) as cur:
-                    logger.debug(
-                        f"Executing SQL: {cur.mogrify(sql, params).decode('utf-8') if params else sql}")
-                    cur.execute(sql, params)
+                    started = time.perf_counter()
+                    if batch:
+                        if debug:
+                            logger.debug(f"Executing batched SQL '{query_name}' for {len(params)} rows: {sql}")
+                        extras.execute_values(cur, sql, params, template=template, page_size=max(len(params), 1))
+                    elif copy_file is not None:
+                        if debug:
+                            logger.debug(f"Executing COPY '{query_name}': {sql}")
+                        cur.copy_expert(sql, copy_file)
+                    else:
+                        if debug:
+                            logger.debug(f"Executing SQL '{query_name}': {sql} with params {format_params(params, sensitive)}")
+                        cur.execute(sql, params)
 
                     result = None
                     if fetch == "one":
                         result = cur.fetchone()
-                        logger.debug(f"Query fetched one row: {result}")
+                        rows = 1 if result is not None else 0
                     elif fetch == "all":
                         result = cur.fetchall()
-                        logger.debug(f"Query fetched {len(result) if result else 0} rows.")
+                        rows = len(result)
                     else:
-                        logger.debug(f"Query executed, row count: {cur.rowcount}")
+                        rows = max(cur.rowcount, 0)
+                        if copy_file is not None:
+                            result = rows
+                    if debug:
+                        logger.debug(f"Query '{query_name}' returned {rows} row(s).")
 
-                    conn.commit()
+                    if tx_conn is None:
+                        conn.commit()
+                    failed = False
                     return result
             else:
                 logger.error("Failed to get connection from pool (returned None).")
                 raise DatabaseError("Failed to obtain a database connection from the pool.")
 
+        except DatabaseError:
+            raise
+        except PoolExhaustedError as e:
+            raise DatabaseError(f"Database is busy: {e}") from e
         except psycopg2.Error as e:
             logger.error(f"Database error executing query: {e}", exc_info=True)
-            logger.error(f"Failed SQL was likely: {sql} with params {params}")
-            if conn:
+            logger.error(f"Failed SQL was likely: {sql} with params {format_params(params, sensitive)}")
+            if conn and tx_conn is None:
                 try:
                     conn.rollback()
                     logger.warning("Database transaction rolled back due to error.")
@@ -107,21 +348,129 @@ class DatabaseModel:
             raise DatabaseError(f"A database error occurred: {e.pgcode} - {e.pgerror}. Check logs.") from e
         except Exception as e:
             logger.exception(f"An unexpected error occurred during query execution: {e}")
-            if conn:
+            if conn and tx_conn is None:
                 try:
                     conn.rollback()
                 except Exception:
                     pass
             raise DatabaseError(f"An unexpected error occurred: {e}. Check logs.") from e
         finally:
-            if conn:
-                connection_pool.putconn(conn)
+            if started is not None:
+                self.query_metrics.record(query_name, time.perf_counter() - started, rows=rows, failed=failed,
+                                          sql=sql, params=params, sensitive=sensitive)
+            if conn and tx_conn is None:
+                pool_used.putconn(conn)
                 logger.debug("Database connection returned to pool.")
 
+    def stream_query(self, sql, params=None, itersize=2000, query_name=None):
+        """
+        Yields the rows of a query as dicts through a server-side (named) cursor, fetching
+        itersize rows per round trip, so memory use does not grow with the result size.
+        The connection is held until the generator is exhausted or closed. Raises DatabaseError.
+        """
+        query_name = query_name or self._caller_name()
+        tx_conn = getattr(self._local, 'conn', None)
+        pool_used = None
+        conn = tx_conn
+        db_time = 0.0   # Time spent executing and fetching, not in the consumer of the rows
+        rows = 0
+        failed = True
+        try:
+            if conn is None:
+                pool_used = self._get_pool()
+                conn = pool_used.getconn()
+            with conn.cursor(name=f"stream_{threading.get_ident()}_{id(self)}",
+                             cursor_factory=extras.DictCursor) as cur:
+                cur.itersize = itersize
+                started = time.perf_counter()
+                cur.execute(sql, params)
+                row_iterator = iter(cur)
+                while True:
+                    row = next(row_iterator, None)
+                    db_time += time.perf_counter() - started
+                    if row is None:
+                        break
+                    rows += 1
+                    yield row
+                    started = time.perf_counter()
+            failed = False
+        except PoolExhaustedError as e:
+            raise DatabaseError(f"Database is busy: {e}") from e
+        except psycopg2.Error as e:
+            logger.error(f"Database error streaming query '{query_name}': {e}", exc_info=True)
+            raise DatabaseError(f"A database error occurred: {e.pgcode} - {e.pgerror}. Check logs.") from e
+        finally:
+            self.query_metrics.record(query_name, db_time, rows=rows, failed=failed, sql=sql, params=params)
+            if conn is not None and tx_conn is None:
+                try:
+                    conn.rollback()     # Read only; ends the transaction the named cursor lived in
+                except psycopg2.Error:
+                    pass
+                pool_used.putconn(conn)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Unit of work: every query issued by this thread inside the block runs on one pooled
+        connection and is committed once at the end, or rolled back entirely on any exception.
+        Nested blocks join the outer transaction.
+        """
+        if getattr(self._local, 'conn', None) is not None:
+            yield self._local.conn
+            return
+
+        pool_used = self._get_pool()
+        try:
+            conn = pool_used.getconn()
+        except PoolExhaustedError as e:
+            raise DatabaseError(f"Database is busy: {e}") from e
+        except psycopg2.Error as e:
+            raise DatabaseError(f"Could not open a database connection: {e}") from e
+        self._local.conn = conn
+        self._local.touched_items = set()
+        logger.debug("Transaction started.")
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.rollback()
+                logger.warning("Transaction rolled back due to error.")
+            except psycopg2.Error as rb_e:
+                logger.error(f"Error during transaction rollback: {rb_e}", exc_info=True)
+            raise
+        else:
+            try:
+                conn.commit()
+                logger.debug("Transaction committed.")
+            except psycopg2.Error as e:
+                logger.error(f"Database error committing transaction: {e}", exc_info=True)
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    pass
+                raise DatabaseError(f"A database error occurred: {e.pgcode} - {e.pgerror}. Check logs.") from e
+        finally:
+            self._local.conn = None
+            pool_used.putconn(conn)
+            self._invalidate_touched_items()
+
+    def _invalidate_touched_items(self):
+        # Reads that ran while the transaction was open may have cached the old ratings again.
+        touched_items = getattr(self._local, 'touched_items', None)
+        if touched_items:
+            self._local.touched_items = None
+            self.criterion_ratings_cache.invalidate(touched_items)
+
+    def _invalidate_criterion_ratings(self, item_id):
+        """Drops the cached ratings of a written item; inside transaction() this is repeated once it ends."""
+        self.criterion_ratings_cache.invalidate([item_id])
+        if getattr(self._local, 'conn', None) is not None:
+            self._local.touched_items.add(item_id)
+
     def add_user(self, username, email, password_hash):
         sql = "INSERT INTO users (username, email, password_hash) VALUES (%s, %s, %s) RETURNING user_id;"
         try:
-            result = self.execute_query(sql, (username, email, password_hash), fetch="one")
+            result = self.execute_query(sql, (username, email, password_hash), fetch="one", sensitive=True)
             return result[0] if result else None
         except DatabaseError as e:
              logger.error(f"Failed to add user '{username}': {e}")
@@ -165,12 +514,37 @@ class DatabaseModel:
         params = (item_id, criterion_id, rating)
         try:
             self.execute_query(sql, params, fetch=None)
+            self._invalidate_criterion_ratings(item_id)
             logger.debug(f"Successfully added/updated criterion rating for item {item_id}, criterion {criterion_id}.")
             return True
         except DatabaseError as e:
             logger.error(f"Failed to add/update criterion rating for item {item_id}, criterion {criterion_id}: {e}")
             raise
 
+    def add_or_update_criterion_ratings(self, item_id, criterion_ratings):
+        """
+        Adds or updates several criterion ratings of an item with one batched statement.
+        criterion_ratings: iterable of (criterion_id, rating) pairs.
+        """
+        values = [(item_id, criterion_id, rating) for criterion_id, rating in criterion_ratings]
+        if not values:
+            return True
+
+        sql = """
+            INSERT INTO item_criterion_ratings (item_id, criterion_id, rating)
+            VALUES %s
+            ON CONFLICT (item_id, criterion_id)
+            DO UPDATE SET rating = EXCLUDED.rating;
+        """
+        try:
+            self.execute_values(sql, values)
+            self._invalidate_criterion_ratings(item_id)
+            logger.debug(f"Successfully added/updated {len(values)} criterion ratings for item {item_id}.")
+            return True
+        except DatabaseError as e:
+            logger.error(f"Failed to add/update criterion ratings for item {item_id}: {e}")
+            raise
+
     def get_user_by_username(self, username, use_dict_cursor=False):
         sql = "SELECT user_id, username, email, password_hash FROM users WHERE username = %s;"
         try:
@@ -182,103 +556,242 @@ class DatabaseModel:
     def get_user_by_email(self, email, use_dict_cursor=False):
         sql = "SELECT user_id, username, email, password_hash FROM users WHERE email = %s;"
         try:
-            return self.execute_query(sql, (email,), fetch="one", use_dict_cursor=use_dict_cursor)
+            return self.execute_query(sql, (email,), fetch="one", use_dict_cursor=use_dict_cursor, sensitive=True)
         except DatabaseError as e:
              logger.error(f"Failed to get user by email: {e}")
              raise
 
-    def get_user_items(self, user_id, sort_by='created_at', sort_order='DESC', use_dict_cursor=False):
-        """Retrieves all rated items for the user with sorting. Rating is the calculated overall rating."""
-        allowed_sort_columns = ['name', 'item_type', 'status', 'rating', 'created_at', 'updated_at']
-        if sort_by not in allowed_sort_columns:
+    def get_user_items(self, user_id, sort_by='created_at', sort_order='DESC', use_dict_cursor=False,
+                       limit=None, after=None, item_filter=None):
+        """
+        Retrieves rated items for the user with sorting. Rating is the calculated overall rating.
+        If limit is given, returns a single keyset page. Pass the cursor of the last row of the
+        previous page (see items_page_cursor) as `after` to fetch the next one.
+        Rows are ordered by the sort column with item_id as a tie-breaker, NULLs always last,
+        which matches the (user_id, <sort column>, item_id) indexes so no sort step is needed.
+        For a nullable column a page that starts before the NULL tail is read with two index range
+        scans, the rest of the non-NULL rows and then the start of the NULL tail.
+        item_filter: optional ItemFilter restricting the rows.
+        """
+        if sort_by not in ALLOWED_SORT_COLUMNS:
             logger.warning(f"Invalid sort column requested: '{sort_by}'. Defaulting to 'created_at'.")
             sort_by = 'created_at'
 
         if sort_order.upper() not in ['ASC', 'DESC']:
             logger.warning(f"Invalid sort order requested: '{sort_order}'. Defaulting to 'DESC'.")
             sort_order = 'DESC'
+        direction = sort_order.upper()
 
-        order_by_clause = f"ORDER BY {sort_by} {sort_order.upper()}"
+        conditions = ["user_id = %s"]
+        params = [user_id]
+        if item_filter is not None:
+            filter_conditions, filter_params = item_filter.to_sql()
+            conditions.extend(filter_conditions)
+            params.extend(filter_params)
+
+        try:
+            if after is None:
+                return self._select_user_items(conditions, params, sort_by, direction, limit, use_dict_cursor)
+
+            seek_conditions, seek_params = self._build_seek_condition(sort_by, direction, after)
+            items = self._select_user_items(conditions + seek_conditions, params + seek_params,
+                                            sort_by, direction, limit, use_dict_cursor)
+            items = list(items or [])
+            in_null_tail = after[0] is None
+            if sort_by not in NULLABLE_SORT_COLUMNS or in_null_tail or (limit is not None and len(items) >= limit):
+                return items
+            # The non-NULL rows ran out within this page: continue with the NULL tail from its start.
+            remaining = None if limit is None else limit - len(items)
+            null_tail = self._select_user_items(conditions + [f"{sort_by} IS NULL"], params,
+                                                sort_by, direction, remaining, use_dict_cursor)
+            return items + list(null_tail or [])
+        except DatabaseError as e:
+            logger.error(f"Failed to get items for user_id {user_id}: {e}")
+            raise
+
+    def _select_user_items(self, conditions, params, sort_by, direction, limit, use_dict_cursor):
+        """Runs one get_user_items query: conditions are ANDed, rows come in the order described there."""
+        nulls_clause = " NULLS LAST" if sort_by in NULLABLE_SORT_COLUMNS else ""
+        order_by_clause = f"ORDER BY {sort_by} {direction}{nulls_clause}, item_id {direction}"
+
+        params = list(params)
+        limit_clause = ""
+        if limit is not None:
+            limit_clause = "LIMIT %s"
+            params.append(int(limit))
 
         sql = f"""
                 SELECT item_id, name, alt_name, item_type, status, rating, review, created_at, updated_at
                 FROM rated_items
-                WHERE user_id = %s
-                {order_by_clause};
+                WHERE {' AND '.join(conditions)}
+                {order_by_clause}
+                {limit_clause};
                """
+        return self.execute_query(sql, tuple(params), fetch="all", use_dict_cursor=use_dict_cursor,
+                                  query_name='get_user_items')
+
+    def get_rated_items(self, item_ids, use_dict_cursor=True):
+        """Fetches several rated items by ID in one query; IDs that no longer exist are simply missing."""
+        if not item_ids:
+            return []
+        sql = """
+            SELECT item_id, user_id, name, alt_name, item_type, status, rating, review, created_at, updated_at
+            FROM rated_items
+            WHERE item_id = ANY(%s);
+        """
         try:
-            return self.execute_query(sql, (user_id,), fetch="all", use_dict_cursor=use_dict_cursor)
+            return self.execute_query(sql, (list(item_ids),), fetch="all", use_dict_cursor=use_dict_cursor) or []
         except DatabaseError as e:
-            logger.error(f"Failed to get items for user_id {user_id}: {e}")
+            logger.error(f"Failed to get {len(item_ids)} rated items: {e}")
+            raise
+
+    def search_user_items(self, user_id, query, limit=SEARCH_RESULTS_LIMIT, use_dict_cursor=True, item_filter=None):
+        """
+        Searches the user's items by name, alt_name and review, best matches first.
+        Every word of the query is matched as a prefix, and names also match with typos (pg_trgm).
+        Returns the same columns as get_user_items plus search_rank.
+        item_filter: optional ItemFilter restricting the rows.
+        """
+        query = (query or '').strip()
+        if not query:
+            return []
+        words = re.findall(r'\w+', query.lower())
+        tsquery = ' & '.join(f"{word}:*" for word in words)
+
+        filter_conditions, filter_params = item_filter.to_sql(alias='ri') if item_filter is not None else ([], [])
+        sql = SEARCH_ITEMS_SQL.format(filter_conditions=''.join(f" AND {c}" for c in filter_conditions))
+        params = (tsquery, query, user_id, *filter_params, int(limit))
+        try:
+            return self.execute_query(sql, params, fetch="all", use_dict_cursor=use_dict_cursor)
+        except DatabaseError as e:
+            logger.error(f"Failed to search items for user_id {user_id} (query '{query}'): {e}")
+            raise
+
+    @staticmethod
+    def _build_seek_condition(sort_by, direction, after):
+        """
+        Builds the keyset conditions selecting rows that come strictly after the cursor
+        (last sort value, last item_id) in the ORDER BY used by get_user_items.
+        Returns ([condition], [params]). Each is a row comparison or an IS NULL test on the
+        sort column, so it maps onto a single range of the (user_id, <sort column>, item_id) index.
+        For nullable columns with a non-NULL cursor this covers only the non-NULL rows;
+        get_user_items fetches the NULL tail separately.
+        """
+        last_value, last_item_id = after
+        op = '>' if direction == 'ASC' else '<'
+
+        if sort_by not in NULLABLE_SORT_COLUMNS:
+            return [f"({sort_by}, item_id) {op} (%s, %s)"], [last_value, last_item_id]
+
+        # NULLS LAST: once the cursor is inside the NULL tail only item_id decides.
+        if last_value is None:
+            return [f"{sort_by} IS NULL", f"item_id {op} %s"], [last_item_id]
+        return [f"{sort_by} IS NOT NULL", f"({sort_by}, item_id) {op} (%s, %s)"], [last_value, last_item_id]
+
+    @staticmethod
+    def items_page_cursor(row, sort_by):
+        """Returns the keyset cursor (sort value, item_id) for a row returned by get_user_items."""
+        if sort_by not in ALLOWED_SORT_COLUMNS:
+            sort_by = 'created_at'
+        return row[sort_by], row['item_id']
+
+    def get_rated_item(self, item_id, use_dict_cursor=True):
+        """Fetches a single rated item by its ID."""
+        sql = """
+            SELECT item_id, user_id, name, alt_name, item_type, status, rating, review, created_at, updated_at
+            FROM rated_items
+            WHERE item_id = %s;
+        """
+        try:
+            return self.execute_query(sql, (item_id,), fetch="one", use_dict_cursor=use_dict_cursor)
+        except DatabaseError as e:
+            logger.error(f"Failed to get rated item {item_id}: {e}")
             raise
 
     def get_criterion_by_id(self, criterion_id, use_dict_cursor=True):
-        """Gets criterion details by its ID."""
-        sql = "SELECT criterion_id, name, description, default_for_types, is_overall FROM criteria WHERE criterion_id = %s;"
+        """Gets criterion details by its ID (served from the criteria catalog)."""
         try:
-            return self.execute_query(sql, (criterion_id,), fetch="one", use_dict_cursor=use_dict_cursor)
+            return self.criteria_catalog.get_by_id(criterion_id)
         except DatabaseError as e:
             logger.error(f"Failed to get criterion by id {criterion_id}: {e}")
             raise
 
     def get_criterion_by_name(self, name, use_dict_cursor=True):
-        """Gets criterion details by its name."""
-        sql = "SELECT criterion_id, name, description, default_for_types, is_overall FROM criteria WHERE name = %s;"
+        """Gets criterion details by its name (served from the criteria catalog)."""
         try:
-            return self.execute_query(sql, (name,), fetch="one", use_dict_cursor=use_dict_cursor)
+            return self.criteria_catalog.get_by_name(name)
         except DatabaseError as e:
             logger.error(f"Failed to get criterion by name '{name}': {e}")
             raise
 
     def get_overall_criterion(self, use_dict_cursor=True):
-        """Gets the special 'overall' criterion details."""
-        sql = "SELECT criterion_id, name, description, default_for_types, is_overall FROM criteria WHERE is_overall = TRUE LIMIT 1;"
+        """Gets the special 'overall' criterion details (served from the criteria catalog)."""
         try:
-            return self.execute_query(sql, fetch="one", use_dict_cursor=use_dict_cursor)
+            return self.criteria_catalog.get_overall()
         except DatabaseError as e:
             logger.error(f"Failed to get the overall criterion: {e}")
             raise
 
     def get_all_criteria(self, use_dict_cursor=True):
-        """Gets all defined criteria, ordered by name."""
-        sql = "SELECT criterion_id, name, description, default_for_types, is_overall FROM criteria ORDER BY name;"
+        """Gets all defined criteria, ordered by name (served from the criteria catalog)."""
         try:
-            return self.execute_query(sql, fetch="all", use_dict_cursor=use_dict_cursor)
+            return self.criteria_catalog.get_all()
         except DatabaseError as e:
             logger.error(f"Failed to get all criteria: {e}")
             raise
 
     def get_suggested_criteria(self, item_type, use_dict_cursor=True):
-        """Gets criteria suggested for a specific item type."""
-        sql = """
-            SELECT criterion_id, name, description, default_for_types, is_overall
-            FROM criteria
-            WHERE %s = ANY(default_for_types)
-            ORDER BY name;
-        """
+        """Gets criteria suggested for a specific item type (served from the criteria catalog)."""
         try:
-            return self.execute_query(sql, (item_type,), fetch="all", use_dict_cursor=use_dict_cursor)
+            return self.criteria_catalog.get_for_type(item_type)
         except DatabaseError as e:
             logger.error(f"Failed to get suggested criteria for type '{item_type}': {e}")
             raise
 
     def get_criterion_ratings_for_item(self, item_id, use_dict_cursor=True):
-        """Gets all criterion ratings for a specific item, joining with criteria names."""
-        sql = """
-            SELECT
-                icr.rating_id, icr.item_id, icr.criterion_id, icr.rating,
-                c.name as criterion_name, c.is_overall
-            FROM item_criterion_ratings icr
-            JOIN criteria c ON icr.criterion_id = c.criterion_id
-            WHERE icr.item_id = %s
-            ORDER BY c.name;
-        """
+        """Gets all criterion ratings for a specific item, joining with criteria names (served from the cache if present)."""
+        if use_dict_cursor:
+            return self.get_criterion_ratings_for_items([item_id]).get(item_id, [])
         try:
-            return self.execute_query(sql, (item_id,), fetch="all", use_dict_cursor=use_dict_cursor)
+            return self.execute_query(CRITERION_RATINGS_SQL, ([item_id],), fetch="all")
         except DatabaseError as e:
             logger.error(f"Failed to get criterion ratings for item {item_id}: {e}")
             raise
 
+    def get_criterion_ratings_for_items(self, item_ids):
+        """
+        Gets the criterion ratings of several items, fetching all uncached ones in a single query.
+        Returns {item_id: [rating dicts ordered by criterion name]}; items without ratings map to [].
+        """
+        cache = self.criterion_ratings_cache
+        ratings_by_item = {}
+        for item_id in item_ids:
+            cached = cache.get(item_id)
+            if cached is not None:
+                ratings_by_item[item_id] = cached
+
+        missing = [item_id for item_id in dict.fromkeys(item_ids) if item_id not in ratings_by_item]
+        if not missing:
+            return ratings_by_item
+
+        generation = cache.generation
+        try:
+            rows = self.execute_query(CRITERION_RATINGS_SQL, (missing,), fetch="all", use_dict_cursor=True) or []
+        except DatabaseError as e:
+            logger.error(f"Failed to get criterion ratings for {len(missing)} items: {e}")
+            raise
+
+        fetched = {item_id: [] for item_id in missing}
+        for row in rows:
+            fetched[row['item_id']].append(dict(row))
+        # Uncommitted reads inside a transaction must not leak into the cache.
+        if getattr(self._local, 'conn', None) is None:
+            cache.put_many(fetched, generation)
+        logger.debug(f"Fetched criterion ratings for {len(missing)} items in one query.")
+
+        ratings_by_item.update(fetched)
+        return ratings_by_item
+
     def get_user_details(self, user_id):
         """Fetches user details (email, created_at) by user_id."""
         sql = "SELECT email, created_at FROM users WHERE user_id = %s;"
@@ -292,7 +805,10 @@ class DatabaseModel:
             raise DatabaseError(f"Unexpected error getting user details: {e}") from e
 
     def get_user_statistics(self, user_id):
-        """Calculates and returns various statistics for a user."""
+        """
+        Calculates and returns various statistics for a user in a single query.
+        Reads the trigger-maintained user_stats summary (statistics_source_sql).
+        """
         stats = {
             'total_items': 0,
             'count_by_type': {},  # {'Movie': 10, 'Game': 5, ...}
@@ -302,67 +818,30 @@ class DatabaseModel:
             'rating_distribution': {}
         }
         try:
-            sql_total_avg = """
-                            SELECT COUNT(*), AVG(rating)
-                            FROM rated_items
-                            WHERE user_id = %s; \
-                            """
-            result_total_avg = self.execute_query(sql_total_avg, (user_id,), fetch="one")
-            if result_total_avg:
-                stats['total_items'] = result_total_avg['count']
-                if result_total_avg['avg'] is not None:
-                    stats['average_rating'] = round(float(result_total_avg['avg']), 2)
-
-            sql_by_type = """
-                          SELECT item_type, COUNT(*) as count
-                          FROM rated_items
-                          WHERE user_id = %s
-                          GROUP BY item_type
-                          ORDER BY count DESC; \
-                          """
-            result_by_type = self.execute_query(sql_by_type, (user_id,), fetch="all")
-            if result_by_type:
-                stats['count_by_type'] = {row['item_type']: row['count'] for row in result_by_type}
-
-            sql_by_status = """
-                            SELECT status, COUNT(*) as count
-                            FROM rated_items
-                            WHERE user_id = %s
-                            GROUP BY status
-                            ORDER BY count DESC; \
-                            """
-            result_by_status = self.execute_query(sql_by_status, (user_id,), fetch="all")
-            if result_by_status:
-                stats['count_by_status'] = {row['status']: row['count'] for row in result_by_status}
-
-            sql_avg_by_type = """
-                              SELECT item_type, AVG(rating) as avg_rating
-                              FROM rated_items
-                              WHERE user_id = %s \
-                                AND rating IS NOT NULL
-                              GROUP BY item_type
-                              ORDER BY item_type; \
-                              """
-            result_avg_by_type = self.execute_query(sql_avg_by_type, (user_id,), fetch="all")
-            if result_avg_by_type:
-                stats['avg_rating_by_type'] = {
-                    row['item_type']: round(float(row['avg_rating']), 1)
-                    for row in result_avg_by_type
-                }
-
-            sql_dist = """
-                       SELECT ROUND(rating) as rating_group, COUNT(*) as count
-                       FROM rated_items
-                       WHERE user_id = %s AND rating IS NOT NULL
-                       GROUP BY rating_group
-                       ORDER BY rating_group DESC;
-                       """
-            result_dist = self.execute_query(sql_dist, (user_id,), fetch="all")
-            if result_dist:
-                stats['rating_distribution'] = {
-                    int(row['rating_group']): row['count']
-                    for row in result_dist if row['rating_group'] is not None
-                }
+            sql = self.statistics_sql.format(source=self.statistics_source_sql)
+            rows = self.execute_query(sql, (user_id,), fetch="all", use_dict_cursor=True) or []
+
+            count_by_type, count_by_status, avg_by_type, distribution = [], [], {}, []
+            for row in rows:
+                item_count = int(row['item_count'] or 0)
+                if row['g_type'] == 0:
+                    count_by_type.append((row['item_type'], item_count))
+                    if row['avg_rating'] is not None:
+                        avg_by_type[row['item_type']] = round(float(row['avg_rating']), 1)
+                elif row['g_status'] == 0:
+                    count_by_status.append((row['status'], item_count))
+                elif row['g_rating'] == 0:
+                    if row['rating_group']:  # 0 groups unrated items
+                        distribution.append((int(row['rating_group']), item_count))
+                else:
+                    stats['total_items'] = item_count
+                    if row['avg_rating'] is not None:
+                        stats['average_rating'] = round(float(row['avg_rating']), 2)
+
+            stats['count_by_type'] = dict(sorted(count_by_type, key=lambda entry: entry[1], reverse=True))
+            stats['count_by_status'] = dict(sorted(count_by_status, key=lambda entry: entry[1], reverse=True))
+            stats['avg_rating_by_type'] = dict(sorted(avg_by_type.items()))
+            stats['rating_distribution'] = dict(sorted(distribution, reverse=True))
 
             logger.info(f"Statistics calculated successfully for user_id {user_id}")
             return stats
@@ -374,6 +853,20 @@ class DatabaseModel:
             logger.exception(f"Unexpected error calculating statistics for {user_id}: {e}")
             return stats
 
+    def rebuild_user_stats(self, user_id):
+        """
+        Recomputes the user_stats rows of one user from rated_items in one statement, e.g. after
+        a bulk import that skipped the per-row triggers.
+        """
+        self.execute_query("DELETE FROM user_stats WHERE user_id = %s;", (user_id,))
+        self.execute_query(f"""
+            INSERT INTO user_stats (user_id, item_type, status, rating_group, item_count, rated_count, rating_sum)
+            SELECT %s, item_type, status, rating_group, SUM(item_count), SUM(rated_count), SUM(rating_sum)
+            FROM ({RATED_ITEMS_STATS_SOURCE_SQL}) AS buckets
+            GROUP BY item_type, status, rating_group;
+        """, (user_id, user_id))
+        logger.info(f"Rebuilt statistics summary for user {user_id}.")
+
     def get_user_password_hash(self, user_id):
         """Fetches only the password hash for a user."""
         sql = "SELECT password_hash FROM users WHERE user_id = %s;"
@@ -389,7 +882,7 @@ class DatabaseModel:
         sql = "UPDATE users SET password_hash = %s WHERE user_id = %s;"
         params = (new_password_hash, user_id)
         try:
-            self.execute_query(sql, params, fetch=None)
+            self.execute_query(sql, params, fetch=None, sensitive=True)
             logger.info(f"Password updated successfully for user_id {user_id}.")
             return True
         except DatabaseError as e:
@@ -421,12 +914,11 @@ class DatabaseModel:
 
     def update_overall_rating(self, item_id, direct_overall_rating=None):
         """
-        Calculates and updates the overall rating in rated_items.
-        If direct_overall_rating is provided, uses it directly.
-        Otherwise, calculates the average from item_criterion_ratings (excluding the 'overall' criterion).
+        Updates the overall rating in rated_items.
+        The rating is normally maintained by triggers on item_criterion_ratings; this method is kept
+        for maintenance and backfills. If direct_overall_rating is provided, it is written directly.
+        Otherwise, the database recalculates it from item_criterion_ratings (recalculate_ratings_sql).
         """
-        final_rating = None
-
         try:
             if direct_overall_rating is not None:
                 try:
@@ -439,38 +931,13 @@ class DatabaseModel:
                     logger.error(
                         f"Invalid direct overall rating value '{direct_overall_rating}' for item {item_id}. Setting to NULL.")
                     final_rating = None
-                logger.info(f"Using direct overall rating {final_rating} for item {item_id}.")
 
+                sql_update = "UPDATE rated_items SET rating = %s WHERE item_id = %s;"
+                self.execute_query(sql_update, (final_rating, item_id), fetch=None)
+                logger.info(f"Updated overall rating for item {item_id} to {final_rating}.")
             else:
-                logger.debug(f"Calculating average rating for item {item_id} from criteria...")
-                overall_criterion = self.get_overall_criterion(use_dict_cursor=True)
-                overall_criterion_id = overall_criterion['criterion_id'] if overall_criterion else None
-
-                if overall_criterion_id is None:
-                    logger.error("Cannot calculate average rating: 'Overall' criterion not found in DB.")
-                    return False
-
-                sql_avg = """
-                    SELECT rating FROM item_criterion_ratings
-                    WHERE item_id = %s AND criterion_id != %s;
-                """
-                params_avg = (item_id, overall_criterion_id)
-                ratings_list = self.execute_query(sql_avg, params_avg, fetch="all", use_dict_cursor=False)
-
-                if ratings_list:
-                    total = sum(r[0] for r in ratings_list)
-                    count = len(ratings_list)
-                    average = round(total / count, 2)
-                    final_rating = average
-                    logger.info(f"Calculated average rating {final_rating} from {count} criteria for item {item_id}.")
-                else:
-                    logger.info(f"No specific criteria rated for item {item_id}. Overall rating will be NULL.")
-                    final_rating = None
-
-            sql_update = "UPDATE rated_items SET rating = %s WHERE item_id = %s;"
-            params_update = (final_rating, item_id)
-            self.execute_query(sql_update, params_update, fetch=None)
-            logger.info(f"Updated overall rating for item {item_id} to {final_rating}.")
+                self.execute_query(self.recalculate_ratings_sql, ([item_id],), fetch=None)
+                logger.info(f"Recalculated overall rating for item {item_id} from criteria.")
             return True
 
         except DatabaseError as e:
@@ -486,6 +953,7 @@ class DatabaseModel:
         params = (item_id,)
         try:
             self.execute_query(sql, params, fetch=None)
+            self._invalidate_criterion_ratings(item_id)
             logger.info(f"Successfully deleted rated item with id {item_id}.")
             return True
         except DatabaseError as e:
@@ -495,8 +963,101 @@ class DatabaseModel:
             logger.exception(f"Unexpected error deleting item {item_id}: {e}")
             raise DatabaseError(f"Unexpected error deleting item: {e}") from e
 
+    def save_item(self, user_id, name, alt_name, item_type, status, review, rating_data, item_id=None):
+        """
+        Saves an item and its ratings in one transaction: adds a new item of user_id, or updates item_id
+        when it is given. rating_data maps criterion names to ratings; a 'Total score' entry is a direct
+        overall rating instead (on update, ratings of criteria not in rating_data are removed).
+        Returns the stored row, read after commit so the rating computed by the triggers is included
+        (None if an updated item no longer exists). Raises DatabaseError, or ValueError for an invalid Total score.
+        """
+        with self.transaction():
+            if item_id is None:
+                item_id = self.add_rated_item(
+                    user_id=user_id, name=name, alt_name=alt_name,
+                    item_type=item_type, status=status, review=review
+                )
+                if not item_id: raise DatabaseError("Failed to get item_id after insertion.")
+            else:
+                self.update_rated_item(
+                    item_id=item_id, name=name, alt_name=alt_name,
+                    item_type=item_type, status=status, review=review
+                )
+                logger.info(f"Basic info for item {item_id} updated.")
+
+                # The Total score row is kept only when it is part of the new rating data,
+                # so switching to criteria drops the direct override.
+                criteria_ids_to_keep = set()
+                for criterion_name in rating_data.keys():
+                    criterion = self.get_criterion_by_name(criterion_name, use_dict_cursor=True)
+                    if criterion:
+                        criteria_ids_to_keep.add(criterion['criterion_id'])
+                self.delete_criteria_ratings_except(item_id, list(criteria_ids_to_keep))
+
+            self._save_item_ratings(item_id, rating_data)
+        return self.get_rated_item(item_id)
+
+    def _save_item_ratings(self, item_id, rating_data):
+        """
+        Processes rating_data (overall or criteria) and saves individual criterion ratings in one batch.
+        The overall rating in rated_items is kept current by database triggers.
+        Expected to run inside transaction(). Raises DatabaseError on failure.
+        """
+        if not rating_data:
+            logger.warning(f"No rating data provided for item {item_id}. Overall rating might become NULL.")
+            return
+
+        overall_rating_value = rating_data.get(OVERALL_CRITERION_NAME)
+
+        if overall_rating_value is not None:
+            logger.info(f"Processing direct overall rating for item {item_id}.")
+            overall_criterion = self.get_overall_criterion()
+            if not overall_criterion:
+                logger.error(f"Cannot save overall rating: '{OVERALL_CRITERION_NAME}' criterion not found!")
+                raise DatabaseError(f"'{OVERALL_CRITERION_NAME}' criterion definition missing.")
+
+            overall_criterion_id = overall_criterion['criterion_id']
+            try:
+                rating_val = float(overall_rating_value)
+                if not (1.0 <= rating_val <= 10.0):
+                    raise ValueError("Rating out of range")
+            except (ValueError, TypeError):
+                logger.error(f"Invalid value '{overall_rating_value}' provided for {OVERALL_CRITERION_NAME}.")
+                raise ValueError(f"Invalid value for {OVERALL_CRITERION_NAME}.")
+
+            self.add_or_update_criterion_rating(item_id, overall_criterion_id, rating_val)
+            logger.info(f"Saved direct overall rating {rating_val} for item {item_id}.")
+
+        else:
+            logger.info(f"Processing criteria ratings for item {item_id}.")
+            if not isinstance(rating_data, dict) or not rating_data:
+                logger.warning(
+                    f"No valid criteria ratings provided for item {item_id}. Updating overall rating (might become NULL).")
+            else:
+                criterion_ratings = []
+                for criterion_name, criterion_rating in rating_data.items():
+                    if criterion_rating is None: continue
+                    try:
+                        rating_val = float(criterion_rating)
+                        if not (1.0 <= rating_val <= 10.0): continue
+                    except (ValueError, TypeError):
+                        continue
+
+                    criterion = self.get_criterion_by_name(criterion_name)
+                    if criterion:
+                        criterion_ratings.append((criterion['criterion_id'], rating_val))
+                    else:
+                        logger.warning(
+                            f"Criterion '{criterion_name}' not found in DB. Skipping rating for item {item_id}.")
+
+                self.add_or_update_criterion_ratings(item_id, criterion_ratings)
+                logger.info(f"Saved/Updated {len(criterion_ratings)} criteria ratings for item {item_id}.")
+
     def delete_criteria_ratings_except(self, item_id, criteria_ids_to_keep):
-        """Deletes criterion ratings for an item that are NOT in the provided list of IDs to keep."""
+        """
+        Deletes criterion ratings for an item that are NOT in the provided list of IDs to keep.
+        The 'overall' criterion is not special-cased: keep it explicitly to preserve a direct Total score.
+        """
         if not criteria_ids_to_keep:
             logger.warning(
                 f"delete_criteria_ratings_except called with empty keep list for item {item_id}. No ratings deleted.")
@@ -504,19 +1065,16 @@ class DatabaseModel:
 
         ids_tuple = tuple(criteria_ids_to_keep)
 
-        overall_criterion = self.get_overall_criterion()
-        overall_id = overall_criterion['criterion_id'] if overall_criterion else -1
-
         sql = """
             DELETE FROM item_criterion_ratings
             WHERE item_id = %s
-              AND criterion_id != %s
               AND criterion_id NOT IN %s;
         """
-        params = (item_id, overall_id, ids_tuple)
+        params = (item_id, ids_tuple)
 
         try:
             result = self.execute_query(sql, params, fetch=None)
+            self._invalidate_criterion_ratings(item_id)
             logger.info(f"Executed deletion of criteria ratings for item {item_id} not in {criteria_ids_to_keep}.")
             return True
         except DatabaseError as e:
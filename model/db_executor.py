@@ -0,0 +1,158 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+from kivy.clock import Clock
+
+from config import DB_EXECUTOR_WORKERS
+from model.backends import open_backend, close_backend
+
+logger = logging.getLogger(__name__)
+
+class DatabaseTask:
+    """Handle of a call submitted to DatabaseExecutor. Its callbacks always run on the Kivy main thread."""
+
+    def __init__(self, future, name, on_success=None, on_error=None):
+        self.name = name
+        self.on_success = on_success
+        self.on_error = on_error
+        self._future = future
+        self._cancelled = False
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def done(self):
+        return self._future.done()
+
+    def cancel(self):
+        """
+        Drops the task's callbacks. A call that has not started yet is not run at all;
+        one already running finishes in the background and its result is discarded.
+        """
+        self._cancelled = True
+        self._future.cancel()
+
+def submit_with_callbacks(executor, func, *args, on_success=None, on_error=None, **kwargs):
+    """
+    Runs func(*args, **kwargs) on a concurrent.futures executor.
+    on_success(result) or on_error(exception) is then called on the main thread,
+    unless the returned task was cancelled in the meantime.
+    """
+    future = executor.submit(func, *args, **kwargs)
+    task = DatabaseTask(future, getattr(func, '__name__', repr(func)), on_success, on_error)
+    future.add_done_callback(lambda f: Clock.schedule_once(lambda dt: _deliver(task, f)))
+    return task
+
+def _deliver(task, future):
+    """Runs on the main thread once the call has finished."""
+    if task.cancelled:
+        logger.debug(f"Discarding result of cancelled task '{task.name}'.")
+        return
+    try:
+        result = future.result()
+    except CancelledError:
+        return
+    except Exception as e:
+        if task.on_error:
+            task.on_error(e)
+        else:
+            logger.error(f"Unhandled error in task '{task.name}': {e}", exc_info=e)
+        return
+    if task.on_success:
+        task.on_success(result)
+
+class TaskGroup:
+    """Tracks the tasks a controller submitted so they can all be cancelled when its screen is left."""
+
+    def __init__(self, executor):
+        self.executor = executor
+        self._tasks = []
+
+    def submit(self, func, *args, on_success=None, on_error=None, **kwargs):
+        self._tasks = [task for task in self._tasks if not task.done()]
+        task = self.executor.submit(func, *args, on_success=on_success, on_error=on_error, **kwargs)
+        self._tasks.append(task)
+        return task
+
+    def cancel_all(self):
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            logger.debug(f"Cancelled {len(self._tasks)} pending database task(s).")
+        self._tasks = []
+
+    def has_pending(self):
+        return any(not task.done() and not task.cancelled for task in self._tasks)
+
+class DatabaseExecutor:
+    """
+    Runs blocking DatabaseModel calls on a small thread pool so Kivy's UI thread never waits on the database.
+    Owns the lifetime of the database connections (see model.backends). Results and errors are delivered back
+    through kivy.clock.Clock callbacks.
+    """
+
+    def __init__(self, max_workers=DB_EXECUTOR_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._shut_down = False
+        self._lock = threading.Lock()
+
+    def start(self, connect=True):
+        """
+        Creates the worker threads and, unless connect is False, connects to the database first.
+        Raises DatabaseError if the database is unreachable.
+        """
+        if connect:
+            self.connect()
+        with self._lock:
+            self._shut_down = False
+            if self._executor is None:
+                self._ensure_executor()
+                logger.info(f"Database executor started with {self.max_workers} worker(s).")
+
+    def connect(self):
+        """Opens the database connections (see model.backends.open_backend). Can be retried after a DatabaseError."""
+        open_backend()
+
+    def shutdown(self):
+        """
+        Stops accepting work, drops queued calls and closes the database connections.
+        Later submit() calls raise RuntimeError until start() is called again.
+        """
+        with self._lock:
+            self._shut_down = True
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                logger.info("Database executor stopped.")
+            close_backend()
+
+    @property
+    def thread_pool(self):
+        """The underlying ThreadPoolExecutor, e.g. for asynckivy.run_in_executor."""
+        with self._lock:
+            return self._ensure_executor()
+
+    def _ensure_executor(self):
+        if self._shut_down:
+            raise RuntimeError("DatabaseExecutor has been shut down.")
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db-worker")
+        return self._executor
+
+    def group(self):
+        """Returns a new TaskGroup bound to this executor."""
+        return TaskGroup(self)
+
+    def submit(self, func, *args, on_success=None, on_error=None, **kwargs):
+        """
+        Runs func(*args, **kwargs) on a worker thread.
+        on_success(result) or on_error(exception) is then called on the main thread,
+        unless the returned task was cancelled in the meantime.
+        Raises RuntimeError after shutdown().
+        """
+        with self._lock:
+            return submit_with_callbacks(self._ensure_executor(), func, *args,
+                                         on_success=on_success, on_error=on_error, **kwargs)
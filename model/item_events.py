@@ -0,0 +1,61 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+ITEM_INSERTED = 'inserted'
+ITEM_UPDATED = 'updated'
+ITEM_DELETED = 'deleted'
+ITEMS_RELOAD = 'reload'     # Too many changes to patch one by one; item_id is None
+
+class ItemEvent:
+    """A change to one rated item. item is the stored row as a dict (None for deletions)."""
+
+    def __init__(self, kind, item_id, item=None, user_id=None):
+        self.kind = kind
+        self.item_id = item_id
+        self.item = item
+        self.user_id = user_id
+
+    def __repr__(self):
+        return f"ItemEvent({self.kind}, item_id={self.item_id})"
+
+class ItemEventBus:
+    """
+    Publishes item changes to whoever shows items, so lists can be patched instead of reloaded.
+    Publish and subscriber callbacks run on the Kivy main thread.
+    """
+
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        """callback(event) is called for every published ItemEvent."""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def publish(self, event):
+        logger.debug(f"Publishing {event}")
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.exception(f"Item event subscriber failed on {event}: {e}")
+
+    def item_inserted(self, item):
+        """item: the stored rated_items row (including user_id)."""
+        item = dict(item)
+        self.publish(ItemEvent(ITEM_INSERTED, item['item_id'], item, item.get('user_id')))
+
+    def item_updated(self, item):
+        item = dict(item)
+        self.publish(ItemEvent(ITEM_UPDATED, item['item_id'], item, item.get('user_id')))
+
+    def item_deleted(self, item_id, user_id=None):
+        self.publish(ItemEvent(ITEM_DELETED, item_id, None, user_id))
+
+    def items_reloaded(self, user_id=None):
+        self.publish(ItemEvent(ITEMS_RELOAD, None, None, user_id))
@@ -0,0 +1,165 @@
+import csv
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    'csv': ('.csv', "CSV (one row per score)"),
+    'jsonl': ('.jsonl', "JSON lines"),
+    'wide_csv': ('.csv', "CSV (one column per criterion)"),
+}
+PROGRESS_EVERY = 500    # Rows between progress callbacks
+FETCH_SIZE = 2000       # Rows fetched per round trip by the server-side cursor
+
+ITEM_COLUMNS = ['item_id', 'name', 'alt_name', 'item_type', 'status', 'overall_rating', 'review',
+                'created_at', 'updated_at']
+
+COUNT_ITEMS_SQL = "SELECT COUNT(*) FROM rated_items WHERE user_id = %s;"
+
+# One row per item with its scores as a JSON object {"criterion name": score}, in item_id order.
+EXPORT_ITEMS_SQL = """
+    SELECT ri.item_id, ri.name, ri.alt_name, ri.item_type::text AS item_type, ri.status::text AS status,
+           ri.rating AS overall_rating, ri.review, ri.created_at, ri.updated_at,
+           COALESCE(scores.ratings, '{}'::json) AS ratings
+    FROM rated_items ri
+    LEFT JOIN LATERAL (
+        SELECT json_object_agg(c.name, icr.rating ORDER BY c.name) AS ratings
+        FROM item_criterion_ratings icr
+        JOIN criteria c ON c.criterion_id = icr.criterion_id
+        WHERE icr.item_id = ri.item_id
+    ) AS scores ON TRUE
+    WHERE ri.user_id = %s
+    ORDER BY ri.item_id;
+"""
+
+# SQLite: no LATERAL or ordered json_object_agg; the scores come back as JSON text.
+SQLITE_EXPORT_ITEMS_SQL = """
+    SELECT ri.item_id, ri.name, ri.alt_name, ri.item_type, ri.status,
+           ri.rating AS overall_rating, ri.review, ri.created_at, ri.updated_at,
+           (SELECT json_group_object(c.name, icr.rating)
+            FROM item_criterion_ratings icr
+            JOIN criteria c ON c.criterion_id = icr.criterion_id
+            WHERE icr.item_id = ri.item_id) AS ratings
+    FROM rated_items ri
+    WHERE ri.user_id = %s
+    ORDER BY ri.item_id;
+"""
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+def _number(value):
+    return float(value) if value is not None else None
+
+def _scores(row):
+    """{criterion name: score} of an exported row, ordered by criterion name."""
+    scores = row['ratings'] or {}
+    if isinstance(scores, str):
+        scores = dict(sorted(json.loads(scores).items()))
+    return scores
+
+class ItemExporter:
+    """
+    Streams a user's library to a file, reading through a server-side cursor so memory use
+    stays flat however large the library is. Formats:
+      csv:      one row per item and criterion score (items without scores get one row)
+      jsonl:    one JSON object per item with a "ratings" object
+      wide_csv: one row per item with one column per criterion
+    jsonl and wide_csv files can be imported again with ItemImporter.
+    """
+
+    def __init__(self, data_model):
+        self.data_model = data_model    # Link to DatabaseModel
+
+    def export(self, user_id, path, export_format='csv', progress=None):
+        """
+        Writes the export to path and returns the number of items written.
+        progress(done, total) is called every PROGRESS_EVERY items and at the end, on the calling thread.
+        The file is written under a temporary name and only renamed to path when complete.
+        Raises DatabaseError or OSError.
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{export_format}'.")
+        started = time.perf_counter()
+        total = self.data_model.execute_query(COUNT_ITEMS_SQL, (user_id,), fetch="one")[0]
+        sql = EXPORT_ITEMS_SQL if self.data_model.backend == 'postgresql' else SQLITE_EXPORT_ITEMS_SQL
+        rows = self.data_model.stream_query(sql, (user_id,), itersize=FETCH_SIZE)
+
+        report = self._reporter(total, progress)
+        partial_path = path + '.part'
+        try:
+            with open(partial_path, 'w', newline='', encoding='utf-8') as f:
+                if export_format == 'jsonl':
+                    written = self._write_json_lines(f, rows, report)
+                elif export_format == 'wide_csv':
+                    written = self._write_wide_csv(f, rows, report)
+                else:
+                    written = self._write_csv(f, rows, report)
+            os.replace(partial_path, path)
+        except BaseException:
+            rows.close()
+            try:
+                os.remove(partial_path)
+            except OSError:
+                pass
+            raise
+        report(written, force=True)
+
+        logger.info(f"Exported {written} items of user {user_id} to '{path}' ({export_format}) "
+                    f"in {time.perf_counter() - started:.1f}s.")
+        return written
+
+    @staticmethod
+    def _reporter(total, progress):
+        def report(done, force=False):
+            if progress is not None and (force or done % PROGRESS_EVERY == 0):
+                progress(done, total)
+        return report
+
+    @staticmethod
+    def _item_values(row):
+        return [row['item_id'], row['name'], row['alt_name'], row['item_type'], row['status'],
+                _number(row['overall_rating']), row['review'],
+                _isoformat(row['created_at']), _isoformat(row['updated_at'])]
+
+    def _write_csv(self, f, rows, report):
+        writer = csv.writer(f)
+        writer.writerow(ITEM_COLUMNS + ['criterion', 'score'])
+        written = 0
+        for row in rows:
+            values = self._item_values(row)
+            scores = _scores(row)
+            if scores:
+                writer.writerows(values + [criterion, score] for criterion, score in scores.items())
+            else:
+                writer.writerow(values + [None, None])
+            written += 1
+            report(written)
+        return written
+
+    def _write_json_lines(self, f, rows, report):
+        written = 0
+        for row in rows:
+            record = dict(zip(ITEM_COLUMNS, self._item_values(row)))
+            record['ratings'] = _scores(row)
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            written += 1
+            report(written)
+        return written
+
+    def _write_wide_csv(self, f, rows, report):
+        # The header needs every criterion up front; the catalog is small and already in memory.
+        criteria = [criterion['name'] for criterion in self.data_model.criteria_catalog.get_all()]
+        writer = csv.writer(f)
+        writer.writerow(ITEM_COLUMNS + criteria)
+        written = 0
+        for row in rows:
+            scores = _scores(row)
+            writer.writerow(self._item_values(row) + [scores.get(name) for name in criteria])
+            written += 1
+            report(written)
+        return written
@@ -0,0 +1,89 @@
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+def _precedes(timestamp, bound):
+    """timestamp < bound, where bound may be a plain date (compared as midnight)."""
+    if not isinstance(bound, datetime):
+        return timestamp.date() < bound
+    return timestamp < bound
+
+class ItemFilter:
+    """
+    Filter applied to a user's rated items, e.g. "only Games, Completed, rating >= 8".
+    Every part is optional; an unset part does not restrict the result.
+      item_types:   collection of item_content_type_enum values
+      statuses:     collection of item_status_enum values
+      min_rating / max_rating:     inclusive bounds on the overall rating (unrated items never match)
+      created_from / created_to:   created_at range, from inclusive, to exclusive (date or datetime)
+    """
+
+    def __init__(self, item_types=None, statuses=None, min_rating=None, max_rating=None,
+                 created_from=None, created_to=None):
+        self.item_types = frozenset(item_types or ())
+        self.statuses = frozenset(statuses or ())
+        self.min_rating = float(min_rating) if min_rating is not None else None
+        self.max_rating = float(max_rating) if max_rating is not None else None
+        self.created_from = created_from
+        self.created_to = created_to
+
+    def is_empty(self):
+        return not (self.item_types or self.statuses
+                    or self.min_rating is not None or self.max_rating is not None
+                    or self.created_from is not None or self.created_to is not None)
+
+    def to_sql(self, alias=None):
+        """
+        Returns (conditions, params): SQL conditions to AND into a WHERE clause and their parameters.
+        alias is the rated_items table alias used by the query, if any.
+        """
+        prefix = f"{alias}." if alias else ""
+        conditions = []
+        params = []
+        if self.item_types:
+            conditions.append(f"{prefix}item_type = ANY(%s::item_content_type_enum[])")
+            params.append(sorted(self.item_types))
+        if self.statuses:
+            conditions.append(f"{prefix}status = ANY(%s::item_status_enum[])")
+            params.append(sorted(self.statuses))
+        if self.min_rating is not None:
+            conditions.append(f"{prefix}rating >= %s")
+            params.append(self.min_rating)
+        if self.max_rating is not None:
+            conditions.append(f"{prefix}rating <= %s")
+            params.append(self.max_rating)
+        if self.created_from is not None:
+            conditions.append(f"{prefix}created_at >= %s")
+            params.append(self.created_from)
+        if self.created_to is not None:
+            conditions.append(f"{prefix}created_at < %s")
+            params.append(self.created_to)
+        return conditions, params
+
+    def matches(self, item):
+        """Python version of to_sql() for a single item dict, used to patch already loaded lists."""
+        if self.item_types and item.get('item_type') not in self.item_types:
+            return False
+        if self.statuses and item.get('status') not in self.statuses:
+            return False
+        rating = item.get('rating')
+        if self.min_rating is not None and (rating is None or float(rating) < self.min_rating):
+            return False
+        if self.max_rating is not None and (rating is None or float(rating) > self.max_rating):
+            return False
+        created_at = item.get('created_at')
+        if self.created_from is not None and (created_at is None or _precedes(created_at, self.created_from)):
+            return False
+        if self.created_to is not None and (created_at is None or not _precedes(created_at, self.created_to)):
+            return False
+        return True
+
+    def __eq__(self, other):
+        if not isinstance(other, ItemFilter):
+            return NotImplemented
+        return vars(self) == vars(other)
+
+    def __repr__(self):
+        parts = [f"{key}={value!r}" for key, value in vars(self).items() if value not in (None, frozenset())]
+        return f"ItemFilter({', '.join(parts)})"
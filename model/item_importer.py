@@ -0,0 +1,330 @@
+import csv
+import io
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+from model.item_store import ITEM_TYPE_ORDER, ITEM_STATUS_ORDER
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_ROWS = 10000     # Validated rows buffered in memory before they are sent with COPY
+MAX_REPORTED_ERRORS = 10000 # Row errors kept for the report (all of them are counted)
+MAX_NAME_LENGTH = 255
+OVERALL_CRITERION_NAME = "Total score"
+
+ITEM_FIELDS = ('name', 'alt_name', 'item_type', 'status', 'review', 'created_at', 'updated_at')
+RATING_FIELD = 'rating'     # Shortcut column for the overall (Total score) rating
+RATINGS_FIELD = 'ratings'   # JSON lines: {"criterion name": score, ...}
+IGNORED_FIELDS = ('item_id', 'overall_rating')  # Written by ItemExporter; derived, so not imported
+
+CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE import_items (
+        line_no INTEGER NOT NULL,
+        item_id INTEGER NOT NULL DEFAULT nextval(pg_get_serial_sequence('rated_items', 'item_id')),
+        name TEXT NOT NULL,
+        alt_name TEXT,
+        item_type item_content_type_enum NOT NULL,
+        status item_status_enum NOT NULL,
+        review TEXT,
+        created_at TIMESTAMP WITH TIME ZONE,
+        updated_at TIMESTAMP WITH TIME ZONE
+    ) ON COMMIT DROP;
+    CREATE TEMP TABLE import_ratings (
+        line_no INTEGER NOT NULL,
+        criterion_id INTEGER NOT NULL,
+        rating NUMERIC(4, 2) NOT NULL
+    ) ON COMMIT DROP;
+"""
+COPY_ITEMS_SQL = """
+    COPY import_items (line_no, name, alt_name, item_type, status, review, created_at, updated_at) FROM STDIN
+"""
+COPY_RATINGS_SQL = "COPY import_ratings (line_no, criterion_id, rating) FROM STDIN"
+INSERT_ITEMS_SQL = """
+    INSERT INTO rated_items (item_id, user_id, name, alt_name, item_type, status, review, created_at, updated_at)
+    SELECT item_id, %s, name, alt_name, item_type, status, review, COALESCE(created_at, CURRENT_TIMESTAMP), updated_at
+    FROM import_items
+    ORDER BY line_no;
+"""
+INSERT_RATINGS_SQL = """
+    INSERT INTO item_criterion_ratings (item_id, criterion_id, rating)
+    SELECT i.item_id, r.criterion_id, r.rating
+    FROM import_ratings r
+    JOIN import_items i ON i.line_no = r.line_no;
+"""
+NOTIFY_IMPORT_SQL = """
+    SELECT pg_notify('item_changes', json_build_object(
+        'table', 'rated_items', 'op', 'IMPORT', 'item_id', NULL, 'user_id', %s::integer)::text);
+"""
+
+# Backends without COPY (SQLite): rows are inserted directly with ids reserved up front.
+NEXT_ITEM_ID_SQL = """
+    SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'rated_items'), 0),
+               COALESCE((SELECT MAX(item_id) FROM rated_items), 0)) + 1;
+"""
+INSERT_ITEM_ROWS_SQL = """
+    INSERT INTO rated_items (item_id, user_id, name, alt_name, item_type, status, review, created_at, updated_at)
+    VALUES %s;
+"""
+INSERT_RATING_ROWS_SQL = "INSERT INTO item_criterion_ratings (item_id, criterion_id, rating) VALUES %s;"
+
+def _copy_text(value):
+    """Formats one value for COPY's text format."""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+class RowError(ValueError):
+    """A problem with one input row; the row is skipped and reported."""
+    pass
+
+class ImportReport:
+    """Outcome of one import: counters plus the rejected rows as (line number, message)."""
+
+    def __init__(self, source):
+        self.source = source
+        self.rows_read = 0
+        self.items_imported = 0
+        self.ratings_imported = 0
+        self.error_count = 0
+        self.errors = []
+        self.duration = 0.0
+
+    def add_error(self, line_no, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_no, message))
+
+    def summary(self):
+        text = f"Imported {self.items_imported} of {self.rows_read} items ({self.ratings_imported} ratings)"
+        if self.error_count:
+            text += f", {self.error_count} row{'s' if self.error_count != 1 else ''} rejected"
+        return text + "."
+
+    def write_errors(self, path):
+        """Writes the rejected rows as CSV (line, error)."""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['line', 'error'])
+            writer.writerows(self.errors)
+            if self.error_count > len(self.errors):
+                writer.writerow(['', f"... {self.error_count - len(self.errors)} more errors not listed"])
+
+class ItemImporter:
+    """
+    Bulk import of a user's library from CSV or JSON lines (one object per line).
+    Fields: name, item_type and status (required), alt_name, review, created_at, updated_at (ISO dates),
+    rating (overall score) and one score per criterion: CSV columns named after the criterion,
+    or a "ratings" object in JSON lines.
+
+    The file is streamed and validated row by row; valid rows are sent in chunks with COPY into
+    temporary staging tables and then moved into rated_items and item_criterion_ratings with one
+    INSERT ... SELECT each, all in one transaction. Invalid rows are skipped and listed in the report.
+    On SQLite the chunks are inserted directly with batched INSERTs instead.
+    """
+
+    def __init__(self, data_model):
+        self.data_model = data_model    # Link to DatabaseModel
+        self._types = {value.casefold(): value for value in ITEM_TYPE_ORDER}
+        self._statuses = {value.casefold(): value for value in ITEM_STATUS_ORDER}
+        self._criteria = None           # casefolded criterion name -> criterion_id
+
+    def import_file(self, path, user_id, file_format=None):
+        """
+        Imports the file for the user and returns an ImportReport.
+        file_format: 'csv' or 'jsonl'; guessed from the file extension if not given.
+        Raises DatabaseError if the load fails (nothing is imported then) and OSError/ValueError for unreadable files.
+        """
+        file_format = file_format or self._guess_format(path)
+        report = ImportReport(path)
+        started = time.perf_counter()
+        self._criteria = {c['name'].casefold(): c['criterion_id'] for c in self.data_model.criteria_catalog.get_all()}
+
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            records = self._read_csv(f) if file_format == 'csv' else self._read_json_lines(f)
+            self._load(records, user_id, report)
+
+        report.duration = time.perf_counter() - started
+        logger.info(f"Import of '{path}' for user {user_id}: {report.summary()} ({report.duration:.1f}s)")
+        return report
+
+    @staticmethod
+    def _guess_format(path):
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            return 'csv'
+        if extension in ('.jsonl', '.ndjson'):
+            return 'jsonl'
+        raise ValueError(f"Unsupported import file type '{extension}', expected .csv or .jsonl.")
+
+    def _read_csv(self, f):
+        """Yields (line number, record); criterion columns are gathered into record['ratings']."""
+        reader = csv.DictReader(f)
+        if not reader.fieldnames:
+            return
+        criterion_columns = [column for column in reader.fieldnames
+                             if column and column.strip().lower() not in ITEM_FIELDS + (RATING_FIELD,) + IGNORED_FIELDS]
+        for row in reader:
+            record = {key.strip().lower(): value for key, value in row.items()
+                      if key and key not in criterion_columns}
+            record[RATINGS_FIELD] = {column: row.get(column) for column in criterion_columns}
+            yield reader.line_num, record
+
+    @staticmethod
+    def _read_json_lines(f):
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, RowError(f"Invalid JSON: {e}")
+                continue
+            yield line_no, record if isinstance(record, dict) else RowError("Expected a JSON object.")
+
+    def _valid_rows(self, records, report):
+        """Yields (line number, item tuple, {criterion_id: rating}) for the valid records; reports the others."""
+        for line_no, record in records:
+            report.rows_read += 1
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                item, ratings = self._validate(record)
+            except RowError as e:
+                report.add_error(line_no, str(e))
+                continue
+            yield line_no, item, ratings
+
+    def _load(self, records, user_id, report):
+        if self.data_model.backend != 'postgresql':
+            return self._load_batched(records, user_id, report)
+        items_buffer, ratings_buffer = io.StringIO(), io.StringIO()
+        buffered = 0
+
+        with self.data_model.transaction():
+            # Per-row triggers stand down for the load; statistics and notifications are done once below.
+            self.data_model.execute_query("SELECT set_config('ratesphere.bulk_load', 'on', true);")
+            self.data_model.execute_query(CREATE_STAGING_SQL)
+
+            for line_no, item, ratings in self._valid_rows(records, report):
+                items_buffer.write('\t'.join(_copy_text(value) for value in (line_no,) + item) + '\n')
+                for criterion_id, rating in ratings.items():
+                    ratings_buffer.write(f"{line_no}\t{criterion_id}\t{rating}\n")
+                buffered += 1
+                if buffered >= COPY_CHUNK_ROWS:
+                    self._copy(items_buffer, ratings_buffer, report)
+                    items_buffer, ratings_buffer = io.StringIO(), io.StringIO()
+                    buffered = 0
+            if buffered:
+                self._copy(items_buffer, ratings_buffer, report)
+
+            if not report.items_imported:
+                return
+            self.data_model.execute_query("ANALYZE import_items, import_ratings;")
+            self.data_model.execute_query(INSERT_ITEMS_SQL, (user_id,))
+            self.data_model.execute_query(INSERT_RATINGS_SQL)
+            self.data_model.execute_query("SELECT set_config('ratesphere.bulk_load', 'off', true);")
+            self.data_model.rebuild_user_stats(user_id)
+            self.data_model.execute_query(NOTIFY_IMPORT_SQL, (user_id,))
+
+    def _load_batched(self, records, user_id, report):
+        """Same load for backends without COPY or staging tables: batched INSERTs in one transaction."""
+        now = datetime.now(timezone.utc)
+        items, ratings = [], []
+
+        with self.data_model.transaction():
+            self.data_model.execute_query("SELECT set_config('ratesphere.bulk_load', 'on', true);")
+            next_item_id = self.data_model.execute_query(NEXT_ITEM_ID_SQL, fetch="one")[0]
+
+            for _, item, item_ratings in self._valid_rows(records, report):
+                name, alt_name, item_type, status, review, created_at, updated_at = item
+                items.append((next_item_id, user_id, name, alt_name, item_type, status, review,
+                              created_at or now, updated_at))
+                ratings.extend((next_item_id, criterion_id, rating) for criterion_id, rating in item_ratings.items())
+                next_item_id += 1
+                if len(items) >= COPY_CHUNK_ROWS:
+                    self._insert_batch(items, ratings, report)
+                    items, ratings = [], []
+            if items:
+                self._insert_batch(items, ratings, report)
+            self.data_model.execute_query("SELECT set_config('ratesphere.bulk_load', 'off', true);")
+
+    def _insert_batch(self, items, ratings, report):
+        self.data_model.execute_values(INSERT_ITEM_ROWS_SQL, items)
+        report.items_imported += len(items)
+        if ratings:
+            self.data_model.execute_values(INSERT_RATING_ROWS_SQL, ratings)
+            report.ratings_imported += len(ratings)
+
+    def _copy(self, items_buffer, ratings_buffer, report):
+        items_buffer.seek(0)
+        report.items_imported += self.data_model.copy_expert(COPY_ITEMS_SQL, items_buffer)
+        if ratings_buffer.tell():
+            ratings_buffer.seek(0)
+            report.ratings_imported += self.data_model.copy_expert(COPY_RATINGS_SQL, ratings_buffer)
+
+    def _validate(self, record):
+        """Returns ((name, alt_name, item_type, status, review, created_at, updated_at), {criterion_id: rating})."""
+        name = self._text(record.get('name'))
+        if not name:
+            raise RowError("Name is required.")
+        if len(name) > MAX_NAME_LENGTH:
+            raise RowError(f"Name is longer than {MAX_NAME_LENGTH} characters.")
+        alt_name = self._text(record.get('alt_name'))
+        if alt_name and len(alt_name) > MAX_NAME_LENGTH:
+            raise RowError(f"Alternative name is longer than {MAX_NAME_LENGTH} characters.")
+
+        item_type = self._types.get((self._text(record.get('item_type')) or '').casefold())
+        if item_type is None:
+            raise RowError(f"Unknown item type {record.get('item_type')!r}.")
+        status = self._statuses.get((self._text(record.get('status')) or '').casefold())
+        if status is None:
+            raise RowError(f"Unknown status {record.get('status')!r}.")
+
+        item = (name, alt_name, item_type, status, self._text(record.get('review')),
+                self._timestamp(record.get('created_at'), 'created_at'),
+                self._timestamp(record.get('updated_at'), 'updated_at'))
+
+        ratings = {}
+        if not isinstance(record.get(RATINGS_FIELD) or {}, dict):
+            raise RowError("'ratings' must be an object of criterion name -> score.")
+        scores = dict(record.get(RATINGS_FIELD) or {})
+        if record.get(RATING_FIELD) not in (None, ''):
+            scores.setdefault(OVERALL_CRITERION_NAME, record.get(RATING_FIELD))
+        for criterion_name, score in scores.items():
+            if score is None or (isinstance(score, str) and not score.strip()):
+                continue
+            criterion_id = self._criteria.get(str(criterion_name).strip().casefold())
+            if criterion_id is None:
+                raise RowError(f"Unknown criterion '{criterion_name}'.")
+            ratings[criterion_id] = self._score(score, criterion_name)
+        return item, ratings
+
+    @staticmethod
+    def _text(value):
+        if value is None:
+            return None
+        text = str(value).strip()
+        return text or None
+
+    @staticmethod
+    def _timestamp(value, field):
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return None
+        try:
+            return datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+        except ValueError:
+            raise RowError(f"Invalid {field} {value!r}, expected an ISO date such as 2024-05-31.")
+
+    @staticmethod
+    def _score(value, criterion_name):
+        try:
+            score = float(str(value).strip().replace(',', '.'))
+        except ValueError:
+            raise RowError(f"Score for '{criterion_name}' is not a number: {value!r}.")
+        if not 1.0 <= score <= 10.0:
+            raise RowError(f"Score for '{criterion_name}' must be between 1 and 10, got {value!r}.")
+        return round(score, 2)
@@ -0,0 +1,187 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Declaration order of the PostgreSQL enums in schema.sql, which is the order ORDER BY uses.
+ITEM_TYPE_ORDER = ['Movie', 'Book', 'Manga', 'Game', 'Anime', 'Manhwa', 'Manhua', 'Cartoon', 'Series', 'Board game']
+ITEM_STATUS_ORDER = ['Completed', 'In Progress', 'Planned', 'Dropped', 'Ongoing']
+
+_TYPE_ORDINALS = {value: index for index, value in enumerate(ITEM_TYPE_ORDER)}
+_STATUS_ORDINALS = {value: index for index, value in enumerate(ITEM_STATUS_ORDER)}
+
+def _enum_key(ordinals):
+    def key(value):
+        if value is None:
+            return None
+        return ordinals.get(str(value), len(ordinals))
+    return key
+
+def _numeric_key(value):
+    return float(value) if value is not None else None
+
+def _identity_key(value):
+    return value
+
+# Columns the client can order exactly like the database. Names are missing on purpose: they are
+# ordered by the database collation (accents, punctuation, locale rules), which Python cannot reproduce.
+SORT_KEY_FUNCTIONS = {
+    'item_type': _enum_key(_TYPE_ORDINALS),
+    'status': _enum_key(_STATUS_ORDINALS),
+    'rating': _numeric_key,
+    'created_at': _identity_key,
+    'updated_at': _identity_key,
+}
+
+class ItemStore:
+    """
+    In-memory copy of the items shown in the ratings list, with a sort key precomputed per row
+    for every sortable column. Once every page has been loaded (complete), the list can be
+    re-ordered without asking the database, and single items can be inserted, replaced or removed
+    at their sorted position with a binary search. This holds for the columns in SORT_KEY_FUNCTIONS,
+    ordered like get_user_items: sort column, then item_id in the same direction, NULLs last.
+    A list sorted by name keeps the database's order: items can be replaced or removed in place,
+    but not inserted or moved (see orders_in_memory).
+    """
+
+    def __init__(self):
+        self.complete = False       # True when the store holds every item of the current list
+        self.sort_column = None     # Column the entries are ordered by; None for ranked search results
+        self.sort_order = 'ASC'
+        self._entries = []          # (item dict, {column: sort key}) in display order
+        self._entries_by_id = {}    # item_id -> entry, to binary-search for a stored item
+
+    def __len__(self):
+        return len(self._entries)
+
+    def replace(self, items, complete, sort_column=None, sort_order='ASC'):
+        """Replaces the contents with a freshly loaded first page (or full result) in the given order."""
+        self._entries = [self._make_entry(item) for item in items]
+        self._entries_by_id = {entry[0]['item_id']: entry for entry in self._entries}
+        self.complete = complete
+        self.sort_column = sort_column
+        self.sort_order = sort_order.upper()
+
+    def extend(self, items, complete):
+        """Appends the next loaded page."""
+        for item in items:
+            entry = self._make_entry(item)
+            self._entries.append(entry)
+            self._entries_by_id[item['item_id']] = entry
+        self.complete = complete
+
+    def clear(self):
+        self._entries = []
+        self._entries_by_id = {}
+        self.complete = False
+
+    def items(self):
+        return [item for item, _ in self._entries]
+
+    def get(self, item_id):
+        """Returns the stored item dictionary, or None."""
+        entry = self._entries_by_id.get(item_id)
+        return entry[0] if entry is not None else None
+
+    def orders_in_memory(self, column=None):
+        """True if items can be sorted and positioned by column (default: the current sort column) in memory."""
+        return (column or self.sort_column) in SORT_KEY_FUNCTIONS
+
+    def sort(self, column, order):
+        """Re-orders the stored items in place and returns them."""
+        if column not in SORT_KEY_FUNCTIONS:
+            raise ValueError(f"Cannot sort by '{column}' in memory.")
+        descending = order.upper() == 'DESC'
+
+        present = [entry for entry in self._entries if entry[1][column] is not None]
+        missing = [entry for entry in self._entries if entry[1][column] is None]
+        present.sort(key=lambda entry: (entry[1][column], entry[0]['item_id']), reverse=descending)
+        missing.sort(key=lambda entry: entry[0]['item_id'], reverse=descending)
+        self._entries = present + missing
+        self.sort_column = column
+        self.sort_order = order.upper()
+
+        logger.debug(f"Re-sorted {len(self._entries)} items in memory by {column} {order}.")
+        return self.items()
+
+    def index_of(self, item_id):
+        """Returns the position of the item, or None if it is not stored."""
+        entry = self._entries_by_id.get(item_id)
+        if entry is None:
+            return None
+        if self.orders_in_memory():
+            index = self._insertion_index(entry)
+            if index < len(self._entries) and self._entries[index] is entry:
+                return index
+        # Ranked results or a name-sorted list.
+        for index, candidate in enumerate(self._entries):
+            if candidate is entry:
+                return index
+        return None
+
+    def insert(self, item):
+        """
+        Inserts an item at its sorted position and returns that index.
+        Returns None if the item sorts past the loaded part of an incomplete list
+        (a later page will bring it) or if the list is not ordered in memory.
+        """
+        if not self.orders_in_memory():
+            return None
+        entry = self._make_entry(item)
+        index = self._insertion_index(entry)
+        if index == len(self._entries) and not self.complete:
+            return None
+        self._entries.insert(index, entry)
+        self._entries_by_id[item['item_id']] = entry
+        return index
+
+    def remove(self, item_id):
+        """Removes an item and returns the index it had, or None if it was not stored."""
+        index = self.index_of(item_id)
+        if index is not None:
+            del self._entries[index]
+            del self._entries_by_id[item_id]
+        return index
+
+    def update(self, item):
+        """
+        Replaces a stored item, moving it if its sort position changed (in place if the list is not ordered in memory).
+        Returns (old_index, new_index); either is None if the item was not / is no longer stored.
+        """
+        old_index = self.index_of(item['item_id'])
+        if old_index is None:
+            return None, None
+        if not self.orders_in_memory():
+            entry = self._make_entry(item)
+            self._entries[old_index] = entry
+            self._entries_by_id[item['item_id']] = entry
+            return old_index, old_index
+        self.remove(item['item_id'])
+        return old_index, self.insert(item)
+
+    def _comes_before(self, a, b):
+        """True if entry a is ordered before entry b under the current sort."""
+        column = self.sort_column
+        descending = self.sort_order == 'DESC'
+        a_key, b_key = a[1][column], b[1][column]
+        if a_key is None or b_key is None:
+            if a_key is None and b_key is None:
+                return (a[0]['item_id'] > b[0]['item_id']) if descending else (a[0]['item_id'] < b[0]['item_id'])
+            return b_key is None
+        if a_key != b_key:
+            return (a_key > b_key) if descending else (a_key < b_key)
+        return (a[0]['item_id'] > b[0]['item_id']) if descending else (a[0]['item_id'] < b[0]['item_id'])
+
+    def _insertion_index(self, entry):
+        low, high = 0, len(self._entries)
+        while low < high:
+            middle = (low + high) // 2
+            if self._comes_before(self._entries[middle], entry):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    @staticmethod
+    def _make_entry(item):
+        keys = {column: key_function(item.get(column)) for column, key_function in SORT_KEY_FUNCTIONS.items()}
+        return item, keys
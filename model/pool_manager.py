@@ -0,0 +1,261 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions, extras
+
+logger = logging.getLogger(__name__)
+
+PING_AFTER_IDLE = 30.0      # Seconds idle after which a connection is pinged before it is handed out
+REAPER_INTERVAL = 60.0      # Seconds between idle reaper runs
+
+class PoolExhaustedError(Exception):
+    """Raised by PoolManager.getconn when no connection became free within the checkout timeout."""
+    pass
+
+class PoolMetrics:
+    """Counters describing pool usage. Updated under the pool lock; read with PoolManager.stats()."""
+
+    def __init__(self):
+        self.checkouts = 0              # Successful getconn calls
+        self.waits = 0                  # Checkouts that had to wait for a free connection
+        self.wait_time_total = 0.0      # Seconds spent waiting, summed over all checkouts
+        self.wait_time_max = 0.0
+        self.timeouts = 0               # Checkouts that gave up (PoolExhaustedError)
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.connection_errors = 0      # Failed connects, failed pings and broken connections returned
+        self.max_in_use = 0             # High-water mark of concurrently checked-out connections
+
+class PoolManager:
+    """
+    Thread-safe PostgreSQL connection pool with the getconn/putconn interface of psycopg2's pools.
+      - opens min_size connections up front (warm-up) and never more than max_size
+      - checks a connection is alive before handing it out, replacing dead ones
+      - waits up to checkout_timeout for a free connection instead of failing immediately
+      - closes connections idle for longer than idle_timeout, down to min_size (idle reaper)
+      - counts checkouts, wait time, in-use connections and connection errors (see stats())
+    """
+
+    def __init__(self, min_size, max_size, checkout_timeout, idle_timeout, **connect_kwargs):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError(f"Invalid pool size: min={min_size}, max={max_size}")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.metrics = PoolMetrics()
+
+        self._connect_kwargs = connect_kwargs
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle = deque()            # (connection, time it was returned), most recently used on the right
+        self._in_use = set()
+        self._backend_pids = {}         # Open connection -> PostgreSQL backend process id
+        self._opening = 0               # Connections being opened outside the lock
+        self._closed = False
+        self._reaper_stop = threading.Event()
+        self._reaper = None
+
+    def open(self):
+        """
+        Opens the warm-up connections and starts the idle reaper. Raises psycopg2.Error if a connect fails,
+        after closing the connections already opened, so a failed attempt can be retried without leaking them.
+        """
+        warm = []
+        try:
+            for _ in range(max(self.min_size, 1)):
+                warm.append(self._connect())
+        except BaseException:
+            for conn in warm:
+                self._close_quietly(conn)
+            with self._lock:
+                self.metrics.connections_closed += len(warm)
+            raise
+        with self._lock:
+            now = time.monotonic()
+            self._idle.extend((conn, now) for conn in warm)
+        self._reaper = threading.Thread(target=self._reap_loop, name="db-pool-reaper", daemon=True)
+        self._reaper.start()
+        logger.info(f"Connection pool opened with {len(warm)} warm connection(s) (max {self.max_size}).")
+
+    def getconn(self, timeout=None):
+        """
+        Checks out a live connection, waiting up to timeout (default checkout_timeout) seconds
+        for one to be returned if max_size connections are in use. Raises PoolExhaustedError on timeout.
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+
+        while True:
+            with self._lock:
+                while True:
+                    if self._closed:
+                        raise PoolExhaustedError("Connection pool is closed.")
+                    if self._idle:
+                        conn, returned_at = self._idle.pop()
+                        self._in_use.add(conn)
+                        break
+                    if len(self._in_use) + self._opening < self.max_size:
+                        self._opening += 1
+                        conn, returned_at = None, None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.metrics.timeouts += 1
+                        logger.warning(f"Connection pool exhausted: {len(self._in_use)} connection(s) in use, "
+                                       f"gave up after {timeout:.1f}s.")
+                        raise PoolExhaustedError(f"No database connection became free within {timeout:.1f}s.")
+                    waited = True
+                    self._available.wait(remaining)
+
+            if conn is None:
+                conn = self._open_reserved()
+            elif not self._is_alive(conn, returned_at):
+                self._discard(conn)
+                continue
+
+            with self._lock:
+                wait_time = time.monotonic() - started
+                self.metrics.checkouts += 1
+                if waited:
+                    self.metrics.waits += 1
+                    self.metrics.wait_time_total += wait_time
+                    self.metrics.wait_time_max = max(self.metrics.wait_time_max, wait_time)
+                self.metrics.max_in_use = max(self.metrics.max_in_use, len(self._in_use))
+            if waited:
+                logger.debug(f"Waited {wait_time * 1000:.0f} ms for a database connection.")
+            return conn
+
+    def putconn(self, conn, close=False):
+        """Returns a connection. Broken connections (or close=True) are closed instead of kept."""
+        broken = conn.closed != 0
+        if not broken and not close:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                broken = True
+
+        with self._lock:
+            self._in_use.discard(conn)
+            keep = not (broken or close or self._closed)
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                if broken:
+                    self.metrics.connection_errors += 1
+                self.metrics.connections_closed += 1
+            self._available.notify()
+        if not keep:
+            self._close_quietly(conn)
+
+    def closeall(self):
+        self._reaper_stop.set()
+        with self._lock:
+            self._closed = True
+            connections = [conn for conn, _ in self._idle] + list(self._in_use)
+            self._idle.clear()
+            self._in_use.clear()
+            self.metrics.connections_closed += len(connections)
+            self._available.notify_all()
+        for conn in connections:
+            self._close_quietly(conn)
+        logger.info("Connection pool closed.")
+
+    def stats(self):
+        """Snapshot of the pool state and metrics as a dict."""
+        with self._lock:
+            metrics = vars(self.metrics).copy()
+            metrics.update(
+                in_use=len(self._in_use),
+                idle=len(self._idle),
+                min_size=self.min_size,
+                max_size=self.max_size,
+                wait_time_avg=(self.metrics.wait_time_total / self.metrics.waits) if self.metrics.waits else 0.0,
+            )
+            return metrics
+
+    def backend_pids(self):
+        """Backend process ids of the open connections, e.g. to recognise this process's own notifications."""
+        with self._lock:
+            return frozenset(self._backend_pids.values())
+
+    def _connect(self):
+        try:
+            conn = psycopg2.connect(cursor_factory=extras.DictCursor, **self._connect_kwargs)
+        except psycopg2.Error:
+            with self._lock:
+                self.metrics.connection_errors += 1
+            raise
+        with self._lock:
+            self.metrics.connections_opened += 1
+            self._backend_pids[conn] = conn.get_backend_pid()
+        return conn
+
+    def _open_reserved(self):
+        """Opens a connection for a slot reserved under the lock (self._opening)."""
+        try:
+            conn = self._connect()
+        except psycopg2.Error:
+            with self._lock:
+                self._opening -= 1
+                self._available.notify()
+            raise
+        with self._lock:
+            self._opening -= 1
+            self._in_use.add(conn)
+        return conn
+
+    def _is_alive(self, conn, returned_at):
+        if conn.closed != 0:
+            return False
+        if time.monotonic() - returned_at < PING_AFTER_IDLE:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Discarding dead pooled connection: {e}")
+            return False
+
+    def _discard(self, conn):
+        with self._lock:
+            self._in_use.discard(conn)
+            self.metrics.connection_errors += 1
+            self.metrics.connections_closed += 1
+            self._available.notify()
+        self._close_quietly(conn)
+
+    def _reap_loop(self):
+        while not self._reaper_stop.wait(REAPER_INTERVAL):
+            self.reap_idle()
+
+    def reap_idle(self):
+        """Closes connections idle for longer than idle_timeout, keeping at least min_size open."""
+        expired = []
+        with self._lock:
+            now = time.monotonic()
+            # The least recently used connections are on the left.
+            while (self._idle and len(self._idle) + len(self._in_use) > self.min_size
+                   and now - self._idle[0][1] > self.idle_timeout):
+                expired.append(self._idle.popleft()[0])
+            self.metrics.connections_closed += len(expired)
+        for conn in expired:
+            self._close_quietly(conn)
+        if expired:
+            logger.debug(f"Idle reaper closed {len(expired)} connection(s).")
+
+    def _close_quietly(self, conn):
+        with self._lock:
+            self._backend_pids.pop(conn, None)
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
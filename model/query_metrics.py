@@ -0,0 +1,145 @@
+import json
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is +Inf.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SAMPLES_KEPT = 1024     # Most recent latencies kept per query for the percentiles
+
+def format_params(params, sensitive=False, limit=500):
+    """
+    Text of query parameters for log messages. Parameters of sensitive queries (password hashes,
+    e-mail addresses) are replaced by their count.
+    """
+    if sensitive and params is not None:
+        return f"<{len(params)} redacted>"
+    text = repr(params)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+class QueryStats:
+    """Timing and row counts of one named query."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.recent = deque(maxlen=SAMPLES_KEPT)
+
+    def record(self, duration, rows, failed):
+        self.calls += 1
+        if failed:
+            self.errors += 1
+        self.rows += rows
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        self.recent.append(duration)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                self.bucket_counts[index] += 1
+                break
+        else:
+            self.bucket_counts[-1] += 1
+
+    def percentile(self, fraction):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'rows': self.rows,
+            'total_ms': round(self.total_time * 1000, 3),
+            'mean_ms': round(self.total_time / self.calls * 1000, 3) if self.calls else 0.0,
+            'p50_ms': round(self.percentile(0.50) * 1000, 3),
+            'p95_ms': round(self.percentile(0.95) * 1000, 3),
+            'p99_ms': round(self.percentile(0.99) * 1000, 3),
+            'max_ms': round(self.max_time * 1000, 3),
+        }
+
+class QueryMetrics:
+    """
+    Per-query instrumentation for DatabaseModel: call counts, latency histograms and percentiles,
+    rows returned and errors, keyed by query name (the DatabaseModel method that issued it).
+    Queries slower than slow_query_ms (0 or None disables this) are logged with their parameters,
+    unless the query was marked sensitive.
+    """
+
+    def __init__(self, slow_query_ms):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name, duration, rows=0, failed=False, sql=None, params=None, sensitive=False):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = QueryStats()
+            stats.record(duration, rows, failed)
+
+        if self.slow_query_ms and duration * 1000 >= self.slow_query_ms:
+            logger.warning(f"Slow query '{name}' took {duration * 1000:.1f} ms "
+                           f"(threshold {self.slow_query_ms} ms): {' '.join((sql or '').split())} "
+                           f"params={format_params(params, sensitive)}")
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def snapshot(self):
+        """Returns {query name: summary dict}, slowest total time first."""
+        with self._lock:
+            summaries = {name: stats.summary() for name, stats in self._stats.items()}
+        return dict(sorted(summaries.items(), key=lambda item: item[1]['total_ms'], reverse=True))
+
+    def to_json(self, indent=2):
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self):
+        """Renders the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            items = sorted(self._stats.items())
+            lines = [
+                "# HELP ratesphere_db_query_duration_seconds Latency of DatabaseModel queries.",
+                "# TYPE ratesphere_db_query_duration_seconds histogram",
+            ]
+            for name, stats in items:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, stats.bucket_counts):
+                    cumulative += count
+                    lines.append(f'ratesphere_db_query_duration_seconds_bucket{{query="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'ratesphere_db_query_duration_seconds_bucket{{query="{name}",le="+Inf"}} {stats.calls}')
+                lines.append(f'ratesphere_db_query_duration_seconds_sum{{query="{name}"}} {stats.total_time:.6f}')
+                lines.append(f'ratesphere_db_query_duration_seconds_count{{query="{name}"}} {stats.calls}')
+            lines.append("# HELP ratesphere_db_query_rows_total Rows returned or affected by DatabaseModel queries.")
+            lines.append("# TYPE ratesphere_db_query_rows_total counter")
+            for name, stats in items:
+                lines.append(f'ratesphere_db_query_rows_total{{query="{name}"}} {stats.rows}')
+            lines.append("# HELP ratesphere_db_query_errors_total Failed DatabaseModel queries.")
+            lines.append("# TYPE ratesphere_db_query_errors_total counter")
+            for name, stats in items:
+                lines.append(f'ratesphere_db_query_errors_total{{query="{name}"}} {stats.errors}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Writes the metrics to path: Prometheus text for a .prom file, JSON otherwise."""
+        text = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            logger.info(f"Query metrics written to {path}.")
+        except OSError as e:
+            logger.error(f"Could not write query metrics to {path}: {e}")
+
+    def log_summary(self, top=10):
+        for name, summary in list(self.snapshot().items())[:top]:
+            logger.info(f"Query '{name}': {summary['calls']} calls, p50 {summary['p50_ms']} ms, "
+                        f"p95 {summary['p95_ms']} ms, p99 {summary['p99_ms']} ms, {summary['rows']} rows")
@@ -0,0 +1,69 @@
+import logging
+import os
+
+from config import BASE_DIR, REPLICA_PATH
+from model.database_model import DatabaseModel, DatabaseError
+from model.sqlite_database_model import SqliteDatabaseModel, SCHEMA_PATHS
+
+logger = logging.getLogger(__name__)
+
+REPLICA_SCHEMA_PATH = os.path.join(BASE_DIR, 'schema_replica.sql')
+REPLICA_SCHEMA_PATHS = SCHEMA_PATHS + (REPLICA_SCHEMA_PATH,)
+LOCAL_ID_BASE = 2 ** 31     # Items with ids from here up were created locally and are not on the server yet
+
+class ReplicaDatabaseModel(SqliteDatabaseModel):
+    """
+    Offline-first DatabaseModel (DB_BACKEND=replica). Items, criterion ratings and criteria are
+    read from and written to a local SQLite replica, so screens keep working while PostgreSQL is
+    slow or down; triggers in schema_replica.sql queue every local write and ReplicaSyncer pushes
+    the queue to the server and pulls remote changes. Accounts stay on the server: the user
+    methods below go to upstream, and a logged-in user's row is mirrored locally.
+    """
+    backend = 'replica'
+    schema_paths = REPLICA_SCHEMA_PATHS
+
+    def __init__(self, path=REPLICA_PATH, upstream=None):
+        super().__init__(path)
+        self.upstream = upstream or DatabaseModel()     # Link to the PostgreSQL DatabaseModel
+
+    def mirror_user(self, user_id, username, email, created_at=None):
+        """Stores the user's row in the replica, which the local items reference."""
+        self.execute_query("""
+            INSERT INTO users (user_id, username, email, password_hash, created_at)
+            VALUES (%s, %s, %s, '', COALESCE(%s, strftime('%%Y-%%m-%%d %%H:%%M:%%f000+00:00', 'now')))
+            ON CONFLICT (user_id) DO UPDATE SET username = excluded.username, email = excluded.email;
+        """, (user_id, username, email, created_at), sensitive=True)
+
+    def add_user(self, username, email, password_hash):
+        user_id = self.upstream.add_user(username, email, password_hash)
+        if user_id:
+            self.mirror_user(user_id, username, email)
+        return user_id
+
+    def get_user_by_username(self, username, use_dict_cursor=False):
+        user = self.upstream.get_user_by_username(username, use_dict_cursor=use_dict_cursor)
+        if user is not None:
+            self.mirror_user(user[0], user[1], user[2])
+        return user
+
+    def get_user_by_email(self, email, use_dict_cursor=False):
+        return self.upstream.get_user_by_email(email, use_dict_cursor=use_dict_cursor)
+
+    def get_user_password_hash(self, user_id):
+        return self.upstream.get_user_password_hash(user_id)
+
+    def update_user_password(self, user_id, new_password_hash):
+        return self.upstream.update_user_password(user_id, new_password_hash)
+
+    def get_user_details(self, user_id):
+        """Fetches user details from the server, or from the mirrored row while it is unreachable."""
+        try:
+            return self.upstream.get_user_details(user_id)
+        except DatabaseError as e:
+            logger.warning(f"Server unavailable, reading details of user {user_id} from the replica: {e}")
+            return super().get_user_details(user_id)
+
+    def pending_changes(self, user_id):
+        """Number of the user's items with local changes not yet pushed to the server."""
+        result = self.execute_query("SELECT COUNT(*) FROM sync_queue WHERE user_id = %s;", (user_id,), fetch="one")
+        return result[0] if result else 0
@@ -0,0 +1,486 @@
+import json
+import logging
+import threading
+import time
+
+from kivy.clock import Clock
+
+from config import SYNC_PUSH_INTERVAL, SYNC_PULL_INTERVAL, SYNC_BATCH_SIZE
+from model.change_feed import RELOAD_THRESHOLD
+from model.database_model import DatabaseError, CRITERION_RATINGS_SQL
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY = 60.0
+
+ITEM_COLUMNS = "item_id, user_id, name, alt_name, item_type, status, rating, review, created_at, updated_at"
+
+QUEUE_SQL = """
+    SELECT q.item_id, q.op, q.version, s.remote_version, s.item_id IS NOT NULL AS on_server
+    FROM sync_queue q
+    LEFT JOIN sync_items s ON s.item_id = q.item_id
+    WHERE q.user_id = %s
+    ORDER BY q.queued_at, q.item_id
+    LIMIT %s;
+"""
+
+REMOTE_VERSION_SQL = """
+    SELECT row_version FROM rated_items
+    WHERE item_id = %s AND user_id = %s
+    FOR UPDATE;
+"""
+
+# Oldest transaction still running on the server. Rows committed after this query, or by transactions
+# running now, have a row_xid at least this large, so it is the watermark for the next pull.
+SNAPSHOT_XMIN_SQL = "SELECT txid_snapshot_xmin(txid_current_snapshot());"
+
+# Keyset pages over (row_xid, item_id), starting at (watermark, 0).
+PULL_ITEMS_SQL = f"""
+    SELECT {ITEM_COLUMNS}, row_version AS remote_version, row_xid
+    FROM rated_items
+    WHERE user_id = %s
+      AND (row_xid, item_id) > (%s, %s)
+    ORDER BY row_xid, item_id
+    LIMIT %s;
+"""
+
+# Newest row_xid of the tombstones pruned on the server; a watermark not above it may have missed deletions.
+PRUNED_TOMBSTONES_SQL = "SELECT row_xid FROM rated_item_tombstones_pruned;"
+
+SYNCED_ITEMS_SQL = """
+    SELECT s.item_id FROM sync_items s
+    JOIN rated_items ri ON ri.item_id = s.item_id
+    WHERE ri.user_id = %s;
+"""
+
+PULL_TOMBSTONES_SQL = """
+    SELECT item_id, row_xid
+    FROM rated_item_tombstones
+    WHERE user_id = %s
+      AND (row_xid, item_id) > (%s, %s)
+    ORDER BY row_xid, item_id
+    LIMIT %s;
+"""
+
+APPLY_ITEMS_SQL = """
+    INSERT INTO rated_items (item_id, user_id, name, alt_name, item_type, status, review, created_at, updated_at)
+    VALUES %s
+    ON CONFLICT (item_id) DO UPDATE
+    SET user_id = excluded.user_id, name = excluded.name, alt_name = excluded.alt_name,
+        item_type = excluded.item_type, status = excluded.status, review = excluded.review,
+        created_at = excluded.created_at, updated_at = excluded.updated_at;
+"""
+
+class ReplicaSyncer:
+    """
+    Keeps a ReplicaDatabaseModel in step with PostgreSQL on a background thread.
+    Push: queued local changes are sent in batches of batch_size items, one server transaction per batch.
+    An item changed on the server since it was last synced (its row_version moved) is a conflict:
+    the server version wins and the local one is saved in sync_conflicts.
+    Pull: server rows and deletion tombstones written by transactions from the user's watermark on
+    (see the change tracking in schema_upgrade.sql) are applied to the replica. Without a watermark, or when
+    tombstones it needs were pruned, all items are pulled and synced items missing on the server are removed.
+    The server being unreachable only delays syncing; attempts are retried with backoff.
+    """
+
+    def __init__(self, replica, item_events, session_model, push_interval=SYNC_PUSH_INTERVAL,
+                 pull_interval=SYNC_PULL_INTERVAL, batch_size=SYNC_BATCH_SIZE):
+        self.replica = replica              # Link to ReplicaDatabaseModel (local)
+        self.upstream = replica.upstream    # Link to DatabaseModel (PostgreSQL)
+        self.item_events = item_events      # Link to ItemEventBus
+        self.session_model = session_model  # Link to SessionModel (whose items are synced)
+        self.push_interval = push_interval
+        self.pull_interval = pull_interval
+        self.batch_size = batch_size
+
+        self.last_sync = None       # time.time() of the last successful pull
+        self.last_error = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._mirrored_user = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-sync", daemon=True)
+        self._thread.start()
+        logger.info(f"Replica sync started (push every {self.push_interval}s, pull every {self.pull_interval}s).")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        logger.info("Replica sync stopped.")
+
+    def sync_now(self):
+        """Asks the sync thread to push and pull right away."""
+        self._wake.set()
+
+    def _run(self):
+        retry_delay = self.push_interval
+        next_pull = 0.0
+        while not self._stop.is_set():
+            user_id = self.session_model.get_current_user_id()
+            wait = self.push_interval
+            if user_id:
+                try:
+                    self._ensure_user(user_id)
+                    self.push(user_id)
+                    if time.monotonic() >= next_pull or self._wake.is_set():
+                        self.pull(user_id)
+                        next_pull = time.monotonic() + self.pull_interval
+                        self.last_sync = time.time()
+                    self.last_error = None
+                    retry_delay = self.push_interval
+                except DatabaseError as e:
+                    self.last_error = str(e)
+                    logger.warning(f"Replica sync failed: {e}. Retrying in {retry_delay:.0f}s.")
+                    wait = retry_delay
+                    retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def _ensure_user(self, user_id):
+        if self._mirrored_user == user_id:
+            return
+        row = self.upstream.execute_query(
+            "SELECT user_id, username, email, created_at FROM users WHERE user_id = %s;", (user_id,), fetch="one")
+        if row is not None:
+            self.replica.mirror_user(*row)
+        self._mirrored_user = user_id
+
+    # Push
+
+    def push(self, user_id):
+        """Sends every queued change of the user to the server. Returns the number of items pushed."""
+        pushed = 0
+        while not self._stop.is_set():
+            entries = self.replica.execute_query(QUEUE_SQL, (user_id, self.batch_size), fetch="all",
+                                                 use_dict_cursor=True)
+            if not entries:
+                break
+            pushed += self._push_batch(user_id, entries)
+        if pushed:
+            logger.info(f"Pushed {pushed} changed item(s) to the server.")
+        return pushed
+
+    def _push_batch(self, user_id, entries):
+        item_ids = [entry['item_id'] for entry in entries]
+        items = {row['item_id']: row for row in self.replica.get_rated_items(item_ids)}
+        ratings = {item_id: [] for item_id in item_ids}
+        for row in self.replica.execute_query(CRITERION_RATINGS_SQL, (item_ids,), fetch="all", use_dict_cursor=True):
+            ratings[row['item_id']].append(row)
+
+        try:
+            with self.upstream.transaction():
+                outcomes = [self._push_entry(user_id, entry, items.get(entry['item_id']), ratings[entry['item_id']])
+                            for entry in entries]
+        except DatabaseError as e:
+            if len(entries) > 1:
+                # Find the entry the server refuses by retrying one item per transaction.
+                return sum(self._push_batch(user_id, [entry]) for entry in entries)
+            self.upstream.execute_query("SELECT 1;")    # Raises again if the server is simply unreachable
+            entry = entries[0]
+            logger.error(f"Server rejected the local change of item {entry['item_id']}: {e}")
+            outcomes = [('rejected', None, None, str(e))]
+
+        self._apply_outcomes(user_id, entries, items, ratings, outcomes)
+        return len(entries)
+
+    def _push_entry(self, user_id, entry, item, ratings):
+        """
+        Writes one queued item to the server (inside the batch transaction).
+        Returns (outcome, remote item_id, remote version, reason), outcome one of
+        'pushed', 'deleted', 'dropped' or 'conflict'.
+        """
+        item_id = entry['item_id']
+        if item is None or entry['op'] == 'delete':
+            if not entry['on_server']:
+                return 'dropped', None, None, None      # Created and deleted before it was ever pushed
+            remote = self.upstream.execute_query(REMOTE_VERSION_SQL, (item_id, user_id), fetch="one")
+            if remote is not None and remote[0] != entry['remote_version']:
+                return 'conflict', item_id, None, "Deleted locally but changed on the server."
+            if remote is not None:
+                self.upstream.delete_rated_item(item_id)
+            return 'deleted', item_id, None, None
+
+        if not entry['on_server']:
+            remote_id = self.upstream.add_rated_item(user_id, item['name'], item['item_type'], item['status'],
+                                                     alt_name=item['alt_name'], review=item['review'])
+        else:
+            remote = self.upstream.execute_query(REMOTE_VERSION_SQL, (item_id, user_id), fetch="one")
+            if remote is None:
+                return 'conflict', item_id, None, "Changed locally but deleted on the server."
+            if remote[0] != entry['remote_version']:
+                return 'conflict', item_id, None, "Changed both locally and on the server."
+            remote_id = item_id
+            self.upstream.update_rated_item(remote_id, item['name'], item['alt_name'], item['item_type'],
+                                            item['status'], item['review'])
+
+        keep_ids = [row['criterion_id'] for row in ratings]
+        if keep_ids:
+            self.upstream.delete_criteria_ratings_except(remote_id, keep_ids)
+            self.upstream.add_or_update_criterion_ratings(
+                remote_id, [(row['criterion_id'], row['rating']) for row in ratings])
+        else:
+            self.upstream.execute_query("DELETE FROM item_criterion_ratings WHERE item_id = %s;", (remote_id,))
+        # A Total score set directly (without criteria) is not derived by the triggers.
+        self.upstream.execute_query(
+            "UPDATE rated_items SET rating = %s WHERE item_id = %s AND rating IS DISTINCT FROM %s;",
+            (item['rating'], remote_id, item['rating']))
+        row = self.upstream.execute_query(
+            "SELECT row_version FROM rated_items WHERE item_id = %s;", (remote_id,), fetch="one")
+        return 'pushed', remote_id, row[0], None
+
+    def _apply_outcomes(self, user_id, entries, items, ratings, outcomes):
+        """Records the push results in the replica; conflicting items are then refreshed from the server."""
+        remapped = {}
+        refresh_ids = []
+        with self.replica.transaction():
+            self._begin_apply()
+            for entry, (outcome, remote_id, remote_version, reason) in zip(entries, outcomes):
+                item_id = entry['item_id']
+                if outcome in ('conflict', 'rejected'):
+                    self._record_conflict(user_id, entry, items.get(item_id), ratings.get(item_id), reason)
+                if outcome == 'pushed':
+                    if remote_id != item_id:
+                        self._remap_item(item_id, remote_id)
+                        remapped[item_id] = remote_id
+                    self.replica.execute_query(
+                        "INSERT OR REPLACE INTO sync_items (item_id, remote_version) VALUES (%s, %s);",
+                        (remote_id, remote_version))
+                elif outcome == 'deleted':
+                    self.replica.execute_query("DELETE FROM sync_items WHERE item_id = %s;", (item_id,))
+                elif outcome == 'conflict':
+                    refresh_ids.append(item_id)
+                # Changes made while the push was running stay queued for the next round.
+                self.replica.execute_query("DELETE FROM sync_queue WHERE item_id = %s AND version = %s;",
+                                           (remote_id if outcome == 'pushed' else item_id, entry['version']))
+                if outcome == 'rejected' and entry['on_server']:
+                    refresh_ids.append(item_id)
+
+        if remapped:
+            self.replica.criterion_ratings_cache.invalidate(list(remapped))
+            logger.info(f"{len(remapped)} item(s) created offline received their server ids.")
+            Clock.schedule_once(lambda dt: self.item_events.items_reloaded(user_id))
+        if refresh_ids:
+            self.refresh_items(user_id, refresh_ids)
+
+    def _remap_item(self, local_id, remote_id):
+        """Moves an item created offline (and its ratings and queue entry) to the id the server assigned."""
+        self.replica.execute_query("PRAGMA defer_foreign_keys = ON;")
+        for table in ('rated_items', 'item_criterion_ratings', 'sync_queue'):
+            self.replica.execute_query(f"UPDATE {table} SET item_id = %s WHERE item_id = %s;", (remote_id, local_id))
+
+    def _record_conflict(self, user_id, entry, item, ratings, reason):
+        local_item = None
+        if item is not None:
+            local_item = dict(item)
+            local_item['ratings'] = {row['criterion_name']: row['rating'] for row in ratings or []}
+        self.replica.execute_query("""
+            INSERT INTO sync_conflicts (item_id, user_id, op, reason, local_item) VALUES (%s, %s, %s, %s, %s);
+        """, (entry['item_id'], user_id, entry['op'], reason,
+              json.dumps(local_item, default=str, ensure_ascii=False) if local_item else None))
+        logger.warning(f"Sync conflict on item {entry['item_id']}: {reason} The server version was kept.")
+
+    def _begin_apply(self):
+        """Inside a replica transaction: the writes below are server state, so they are not queued."""
+        self.replica.execute_query("SELECT set_config('ratesphere.sync_apply', 'on', true);")
+        self.replica.execute_query("SELECT set_config('ratesphere.bulk_load', 'on', true);")
+
+    # Pull
+
+    def pull(self, user_id):
+        """Copies the user's items changed on the server since the last pull and removes those deleted there."""
+        self._pull_criteria()
+        since = self._load_watermark(user_id) or 0
+        next_watermark = self.upstream.execute_query(SNAPSHOT_XMIN_SQL, fetch="one")[0]
+        pulled, deleted = [], []
+        if since:
+            for rows in self._remote_pages(PULL_ITEMS_SQL, user_id, since):
+                pulled.extend(self._apply_remote_items(user_id, rows))
+            for rows in self._remote_pages(PULL_TOMBSTONES_SQL, user_id, since):
+                deleted.extend(self._apply_remote_deletions([row['item_id'] for row in rows]))
+            # Checked after reading the tombstones, so that one pruned in the meantime is not missed either.
+            if since <= self.upstream.execute_query(PRUNED_TOMBSTONES_SQL, fetch="one")[0]:
+                logger.info("Deletions since the last pull were pruned on the server, pulling all items again.")
+                since = 0
+        if not since:
+            all_pulled, all_deleted = self._pull_all(user_id)
+            pulled = sorted(set(pulled).union(all_pulled))
+            deleted = sorted(set(deleted).union(all_deleted))
+        if not self._stop.is_set():
+            self._save_watermark(user_id, next_watermark)
+        if pulled or deleted:
+            logger.info(f"Pulled {len(pulled)} changed and {len(deleted)} deleted item(s) from the server.")
+            self._publish(user_id, pulled, deleted)
+        return len(pulled) + len(deleted)
+
+    def _pull_all(self, user_id):
+        """
+        Pulls every server item of the user and removes the synced ones the server no longer has,
+        for replicas without a usable watermark. Returns (pulled ids, deleted ids).
+        """
+        pulled, remote_ids = [], set()
+        for rows in self._remote_pages(PULL_ITEMS_SQL, user_id, 0):
+            remote_ids.update(row['item_id'] for row in rows)
+            pulled.extend(self._apply_remote_items(user_id, rows))
+        if self._stop.is_set():
+            return pulled, []
+        synced_ids = {row[0] for row in self.replica.execute_query(SYNCED_ITEMS_SQL, (user_id,), fetch="all")}
+        return pulled, self._apply_remote_deletions(synced_ids - remote_ids)
+
+    def _remote_pages(self, sql, user_id, since):
+        """Yields the rows of a PULL_*_SQL query in keyset pages of batch_size."""
+        after = (since, 0)
+        while not self._stop.is_set():
+            rows = self.upstream.execute_query(sql, (user_id, after[0], after[1], self.batch_size),
+                                               fetch="all", use_dict_cursor=True)
+            if not rows:
+                return
+            yield rows
+            if len(rows) < self.batch_size:
+                return
+            after = (rows[-1]['row_xid'], rows[-1]['item_id'])
+
+    def refresh_items(self, user_id, item_ids):
+        """Replaces the replica's copy of the items with the server's (removing those gone there)."""
+        rows = self.upstream.execute_query(
+            f"SELECT {ITEM_COLUMNS}, row_version AS remote_version "
+            f"FROM rated_items WHERE item_id = ANY(%s) AND user_id = %s;",
+            (list(item_ids), user_id), fetch="all", use_dict_cursor=True)
+        pulled = self._apply_remote_items(user_id, rows, force=True)
+        gone = sorted(set(item_ids) - {row['item_id'] for row in rows})
+        if gone:
+            self._delete_local(gone)
+        self._publish(user_id, pulled, gone)
+
+    def _apply_remote_items(self, user_id, rows, force=False):
+        """
+        Writes server rows and their ratings into the replica. Items with unpushed local changes,
+        or already at that version, are skipped. Returns the ids written.
+        """
+        item_ids = [row['item_id'] for row in rows]
+        versions = {row['item_id']: row['remote_version'] for row in rows}
+        remote_ratings = []
+        if rows:
+            remote_ratings = self.upstream.execute_query(CRITERION_RATINGS_SQL, (item_ids,), fetch="all",
+                                                         use_dict_cursor=True)
+        with self.replica.transaction():
+            self._begin_apply()
+            skipped = set()
+            if not force and item_ids:
+                skipped = {row[0] for row in self.replica.execute_query(
+                    "SELECT item_id FROM sync_queue WHERE item_id = ANY(%s);", (item_ids,), fetch="all")}
+                # Rows already applied, e.g. this replica's own pushes.
+                skipped.update(row[0] for row in self.replica.execute_query(
+                    "SELECT item_id, remote_version FROM sync_items WHERE item_id = ANY(%s);", (item_ids,), fetch="all")
+                    if row[1] == versions[row[0]])
+            rows = [row for row in rows if row['item_id'] not in skipped]
+            if not rows:
+                return []
+            apply_ids = [row['item_id'] for row in rows]
+            self.replica.execute_values(APPLY_ITEMS_SQL, [
+                (row['item_id'], row['user_id'], row['name'], row['alt_name'], row['item_type'], row['status'],
+                 row['review'], row['created_at'], row['updated_at']) for row in rows])
+            self.replica.execute_query("DELETE FROM item_criterion_ratings WHERE item_id = ANY(%s);", (apply_ids,))
+            self.replica.execute_values(
+                "INSERT INTO item_criterion_ratings (item_id, criterion_id, rating) VALUES %s;",
+                [(row['item_id'], row['criterion_id'], row['rating']) for row in remote_ratings
+                 if row['item_id'] not in skipped])
+            # The server's rating may be a direct Total score, so it is copied rather than recomputed.
+            for row in rows:
+                self.replica.execute_query(
+                    "UPDATE rated_items SET rating = %s WHERE item_id = %s AND rating IS NOT %s;",
+                    (row['rating'], row['item_id'], row['rating']))
+            self.replica.execute_values(
+                "INSERT OR REPLACE INTO sync_items (item_id, remote_version) VALUES %s;",
+                [(row['item_id'], row['remote_version']) for row in rows])
+            if force:
+                self.replica.execute_query("DELETE FROM sync_queue WHERE item_id = ANY(%s);", (apply_ids,))
+        self.replica.criterion_ratings_cache.invalidate(apply_ids)
+        return apply_ids
+
+    def _apply_remote_deletions(self, item_ids):
+        """Removes the synced, locally unchanged items among those deleted on the server. Returns their ids."""
+        deleted = sorted(row[0] for row in self.replica.execute_query("""
+            SELECT s.item_id FROM sync_items s
+            WHERE s.item_id = ANY(%s)
+              AND NOT EXISTS (SELECT 1 FROM sync_queue q WHERE q.item_id = s.item_id);
+        """, (list(item_ids),), fetch="all"))
+        if deleted:
+            self._delete_local(deleted)
+        return deleted
+
+    def _delete_local(self, item_ids):
+        with self.replica.transaction():
+            self._begin_apply()
+            self.replica.execute_query("DELETE FROM rated_items WHERE item_id = ANY(%s);", (list(item_ids),))
+            self.replica.execute_query("DELETE FROM sync_items WHERE item_id = ANY(%s);", (list(item_ids),))
+            self.replica.execute_query("DELETE FROM sync_queue WHERE item_id = ANY(%s);", (list(item_ids),))
+        self.replica.criterion_ratings_cache.invalidate(item_ids)
+
+    def _pull_criteria(self):
+        """Makes the replica's criteria table an exact copy of the server's when they differ."""
+        self.upstream.criteria_catalog.check_version()
+        remote = self.upstream.criteria_catalog.get_all()
+        if remote == self.replica.criteria_catalog.get_all():
+            return
+        with self.replica.transaction():
+            self._begin_apply()
+            for criterion in remote:
+                # Frees the name if a different local row holds it, so the upsert cannot collide.
+                self.replica.execute_query(
+                    "UPDATE criteria SET name = name || ' #' || criterion_id WHERE name = %s AND criterion_id <> %s;",
+                    (criterion['name'], criterion['criterion_id']))
+                self.replica.execute_query("""
+                    INSERT INTO criteria (criterion_id, name, description, default_for_types, is_overall)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (criterion_id) DO UPDATE
+                    SET name = excluded.name, description = excluded.description,
+                        default_for_types = excluded.default_for_types, is_overall = excluded.is_overall;
+                """, (criterion['criterion_id'], criterion['name'], criterion['description'],
+                      json.dumps(criterion['default_for_types']), criterion['is_overall']))
+            self.replica.execute_query("""
+                DELETE FROM criteria
+                WHERE criterion_id NOT IN %s
+                  AND NOT EXISTS (SELECT 1 FROM item_criterion_ratings icr
+                                  WHERE icr.criterion_id = criteria.criterion_id);
+            """, (tuple(criterion['criterion_id'] for criterion in remote),))
+        self.replica.criteria_catalog.invalidate()
+        logger.info(f"Copied {len(remote)} criteria from the server into the replica.")
+
+    def _load_watermark(self, user_id):
+        row = self.replica.execute_query("SELECT value FROM sync_state WHERE key = %s;",
+                                         (f"watermark:{user_id}",), fetch="one")
+        if row is None:
+            return None
+        watermark = json.loads(row[0])
+        if not isinstance(watermark, int):
+            logger.info("Replica watermark has an old format, pulling all items again.")
+            return None
+        return watermark
+
+    def _save_watermark(self, user_id, watermark):
+        self.replica.execute_query("INSERT OR REPLACE INTO sync_state (key, value) VALUES (%s, %s);",
+                                   (f"watermark:{user_id}", json.dumps(int(watermark))))
+
+    def _publish(self, user_id, pulled, deleted):
+        """Hands the pulled changes to the ItemEventBus on the main thread."""
+        if not pulled and not deleted:
+            return
+        if len(pulled) + len(deleted) > RELOAD_THRESHOLD:
+            Clock.schedule_once(lambda dt: self.item_events.items_reloaded(user_id))
+            return
+        rows = self.replica.get_rated_items(pulled) if pulled else []
+
+        def publish(dt):
+            for item_id in deleted:
+                self.item_events.item_deleted(item_id, user_id)
+            for row in rows:
+                self.item_events.item_updated(row)
+        Clock.schedule_once(publish)
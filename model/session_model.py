@@ -1,9 +1,10 @@
 import os
 import logging
 
-from kivy.storage.jsonstore import JsonStore
 from kivy.app import App
 
+from model.settings_store import SettingsStore
+
 logger = logging.getLogger(__name__)
 
 SETTINGS_KEY = 'user_settings'
@@ -40,8 +41,8 @@ class SessionModel:
 
                 store_path = os.path.join(user_data_dir, 'session.json')
                 logger.debug(f"Session store path: {store_path}")
-                logger.debug("Initializing JsonStore...")
-                self.store = JsonStore(store_path)
+                logger.debug("Initializing SettingsStore...")
+                self.store = SettingsStore(store_path)
                 logger.info(f"Session store initialized at: {store_path}")
                 self._load_session()
                 self._load_theme_preference()
@@ -167,6 +168,11 @@ class SessionModel:
             logger.exception("Error saving settings to store.")
             return False
 
+    def flush(self):
+        """Writes pending session and settings changes to disk now (call before exiting)."""
+        if self.store is not None:
+            self.store.flush()
+
     def get_preferred_theme_style(self):
         """Returns the loaded or default theme style."""
         return self.preferred_theme_style
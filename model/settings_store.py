@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from copy import deepcopy
+
+from kivy.clock import Clock
+
+from config import SETTINGS_FLUSH_DELAY
+
+logger = logging.getLogger(__name__)
+
+class SettingsStore:
+    """
+    Drop-in replacement for kivy's JsonStore (same file format and exists/get/put/delete API) that keeps
+    the data in memory. Changes are coalesced and written flush_delay seconds after the last one, on a
+    background thread, by writing a temporary file and renaming it over the old one, so a crash never
+    leaves a half-written file. Call flush() before exiting to write pending changes synchronously.
+    """
+
+    def __init__(self, filename, flush_delay=SETTINGS_FLUSH_DELAY):
+        self.filename = filename
+        self.flush_delay = flush_delay
+        self._lock = threading.Lock()           # Guards _data and _dirty
+        self._write_lock = threading.Lock()     # One writer at a time, so an older snapshot never wins
+        self._data = self._read()
+        self._dirty = False
+        self._flush_trigger = Clock.create_trigger(lambda dt: self._flush_in_background(), flush_delay)
+
+    def _read(self):
+        if not os.path.exists(self.filename):
+            return {}
+        try:
+            with open(self.filename, encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data
+            logger.error(f"Settings file {self.filename} does not hold a JSON object, starting empty.")
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read settings file {self.filename}, starting empty: {e}")
+        return {}
+
+    def exists(self, key):
+        with self._lock:
+            return key in self._data
+
+    def get(self, key):
+        """Returns a copy of the values stored under key. Raises KeyError if there are none."""
+        with self._lock:
+            return deepcopy(self._data[key])
+
+    def keys(self):
+        with self._lock:
+            return list(self._data)
+
+    def put(self, key, **values):
+        """Replaces the values stored under key (like JsonStore.put). The write happens later."""
+        with self._lock:
+            if self._data.get(key) == values:
+                return True
+            self._data[key] = deepcopy(values)
+            self._dirty = True
+        self._flush_trigger()
+        return True
+
+    def delete(self, key):
+        """Removes key. Raises KeyError if it does not exist."""
+        with self._lock:
+            del self._data[key]
+            self._dirty = True
+        self._flush_trigger()
+
+    def _flush_in_background(self):
+        threading.Thread(target=self.flush, name="settings-writer", daemon=True).start()
+
+    def flush(self):
+        """Writes pending changes now. Returns False if writing failed (the changes stay pending)."""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return True
+                payload = json.dumps(self._data, indent=2)
+                self._dirty = False
+            try:
+                self._write_atomically(payload)
+                logger.debug(f"Settings written to {self.filename}.")
+                return True
+            except OSError as e:
+                logger.error(f"Could not write settings file {self.filename}: {e}")
+                with self._lock:
+                    self._dirty = True
+                return False
+
+    def _write_atomically(self, payload):
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        fd, temp_path = tempfile.mkstemp(prefix='.settings-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.filename)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
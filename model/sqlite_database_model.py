@@ -0,0 +1,427 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from config import BASE_DIR, SQLITE_PATH
+from model.criteria_catalog import CriteriaCatalog
+from model.database_model import DatabaseModel, DatabaseError, SEARCH_RESULTS_LIMIT, RATED_ITEMS_STATS_SOURCE_SQL
+from model.query_metrics import format_params
+from model.item_store import ITEM_TYPE_ORDER, ITEM_STATUS_ORDER
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_PATH = os.path.join(BASE_DIR, 'schema_sqlite.sql')
+SCHEMA_PATHS = (SCHEMA_PATH,)
+BUSY_TIMEOUT = 10.0     # Seconds a writer waits for another connection's write transaction
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f+00:00'  # Must match the column defaults in schema_sqlite.sql
+
+_init_lock = threading.Lock()
+_initialized_paths = set()  # Database files the schema has been applied to
+_connections_lock = threading.Lock()
+_connections = []           # Every open connection, so close_connections() can close them all
+_thread_local = threading.local()
+
+# PostgreSQL-style SQL is translated on the fly: casts are dropped, %s becomes ?,
+# "= ANY(%s)" with a list becomes "IN (?, ?, ...)" and a tuple parameter expands to "(?, ?, ...)".
+_CAST_RE = re.compile(r"::\s*[A-Za-z_]+(?:\[\])?")
+_PLACEHOLDER_RE = re.compile(r"=\s*ANY\(\s*%s\s*\)|%s|%%")
+
+def _adapt_datetime(value):
+    if value.tzinfo is None:
+        value = value.astimezone()  # Naive values are local time, as in a PostgreSQL session
+    return value.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+def _convert_timestamp(raw):
+    return datetime.fromisoformat(raw.decode('utf-8'))
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_converter('TIMESTAMP', _convert_timestamp)
+sqlite3.register_converter('BOOLEAN', lambda raw: raw not in (b'0', b''))
+
+def _enum_collation(values):
+    """Orders TEXT values by their position in values (unknown values last), like a PostgreSQL enum."""
+    ordinals = {value: index for index, value in enumerate(values)}
+
+    def compare(left, right):
+        left_key = (ordinals.get(left, len(ordinals)), left)
+        right_key = (ordinals.get(right, len(ordinals)), right)
+        return (left_key > right_key) - (left_key < right_key)
+    return compare
+
+def _casefold(value):
+    return value.casefold() if isinstance(value, str) else value
+
+class SqliteRow(list):
+    """A result row readable by position and by column name, like psycopg2's DictRow."""
+    __slots__ = ('_index',)
+
+    def __init__(self, index, values):
+        super().__init__(values)
+        self._index = index
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._index[key]
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except (KeyError, IndexError):
+            return default
+
+    def keys(self):
+        return self._index.keys()
+
+    def values(self):
+        return list(self)
+
+    def items(self):
+        return [(key, self[index]) for key, index in self._index.items()]
+
+    @staticmethod
+    def factory(cursor, values):
+        return SqliteRow({column[0]: index for index, column in enumerate(cursor.description)}, values)
+
+class SqliteConnection(sqlite3.Connection):
+    """Connection with the session settings read by current_setting() in the schema's triggers."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.settings = {}      # Cleared when a transaction ends, like SET LOCAL
+        self.closed = False
+
+    def set_config(self, name, value, is_local=True):
+        self.settings[name] = value
+        return value
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, detect_types=sqlite3.PARSE_DECLTYPES,
+                           isolation_level=None, check_same_thread=False, factory=SqliteConnection)
+    conn.row_factory = SqliteRow.factory
+    conn.create_collation('item_type_order', _enum_collation(ITEM_TYPE_ORDER))
+    conn.create_collation('item_status_order', _enum_collation(ITEM_STATUS_ORDER))
+    conn.create_function('current_setting', -1, lambda name, *missing_ok: conn.settings.get(name))
+    conn.create_function('set_config', 3, conn.set_config)
+    conn.create_function('casefold', 1, _casefold, deterministic=True)
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute("PRAGMA synchronous = NORMAL;")    # Durable enough with WAL, and much faster
+    return conn
+
+def initialize_database(path=SQLITE_PATH, schema_paths=SCHEMA_PATHS):
+    """
+    Creates the database file if needed, switches it to WAL mode and applies the schema files
+    (schema_sqlite.sql by default). Runs once per process and path. Thread-safe. Raises DatabaseError.
+    """
+    with _init_lock:
+        if path in _initialized_paths:
+            return
+        logger.info(f"Opening SQLite database '{path}'...")
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            conn = _connect(path)
+            try:
+                journal_mode = conn.execute("PRAGMA journal_mode = WAL;").fetchone()[0]
+                for schema_path in schema_paths:
+                    with open(schema_path, encoding='utf-8') as f:
+                        conn.executescript(f.read())
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            logger.critical(f"FATAL: Could not open SQLite database '{path}': {e}", exc_info=True)
+            raise DatabaseError(f"Could not open the SQLite database: {e}") from e
+        _initialized_paths.add(path)
+        logger.info(f"SQLite database ready (SQLite {sqlite3.sqlite_version}, journal mode {journal_mode}).")
+
+def get_connection(path=SQLITE_PATH, schema_paths=SCHEMA_PATHS):
+    """Returns this thread's connection to the database file, opening it on first use. Raises DatabaseError."""
+    connections = getattr(_thread_local, 'connections', None)
+    if connections is None:
+        connections = _thread_local.connections = {}
+    conn = connections.get(path)
+    if conn is not None and not conn.closed:
+        return conn
+    initialize_database(path, schema_paths)
+    try:
+        conn = _connect(path)
+    except sqlite3.Error as e:
+        raise DatabaseError(f"Could not open the SQLite database: {e}") from e
+    connections[path] = conn
+    with _connections_lock:
+        _connections.append(conn)
+    return conn
+
+def close_connections():
+    """Closes the connections of every thread; threads reopen theirs on the next query."""
+    with _connections_lock:
+        connections = list(_connections)
+        _connections.clear()
+    for conn in connections:
+        try:
+            conn.closed = True
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Error closing SQLite connection: {e}")
+    if connections:
+        logger.info(f"Closed {len(connections)} SQLite connection(s).")
+
+def _translate(sql, params):
+    """Returns (sqlite sql, params) for a PostgreSQL-style statement with %s placeholders."""
+    sql = _CAST_RE.sub('', sql)
+    if params is None:
+        return sql, ()
+    values = iter(params)
+    translated_params = []
+
+    def replace(match):
+        token = match.group(0)
+        if token == '%%':
+            return '%'
+        value = next(values)
+        if token != '%s':
+            value = list(value)
+            translated_params.extend(value)
+            return f"IN ({', '.join('?' * len(value))})"
+        if isinstance(value, (list, tuple)):
+            translated_params.extend(value)
+            return f"({', '.join('?' * len(value))})"
+        translated_params.append(value)
+        return '?'
+
+    return _PLACEHOLDER_RE.sub(replace, sql), translated_params
+
+def _translate_batch(sql, argslist):
+    """'INSERT ... VALUES %s' -> 'INSERT ... VALUES (?, ?, ...)' for executemany."""
+    row_placeholders = f"({', '.join('?' * len(argslist[0]))})"
+    return _CAST_RE.sub('', sql).replace('%s', row_placeholders, 1)
+
+# GROUPING SETS does not exist in SQLite: the same four groupings as separate branches.
+STATISTICS_SQL = """
+    WITH buckets AS ({source})
+    SELECT 1 AS g_type, 1 AS g_status, 1 AS g_rating,
+           NULL AS item_type, NULL AS status, NULL AS rating_group,
+           SUM(item_count) AS item_count,
+           CAST(SUM(rating_sum) AS REAL) / NULLIF(SUM(rated_count), 0) AS avg_rating
+    FROM buckets
+    UNION ALL
+    SELECT 0, 1, 1, item_type, NULL, NULL, SUM(item_count), CAST(SUM(rating_sum) AS REAL) / NULLIF(SUM(rated_count), 0)
+    FROM buckets GROUP BY item_type
+    UNION ALL
+    SELECT 1, 0, 1, NULL, status, NULL, SUM(item_count), CAST(SUM(rating_sum) AS REAL) / NULLIF(SUM(rated_count), 0)
+    FROM buckets GROUP BY status
+    UNION ALL
+    SELECT 1, 1, 0, NULL, NULL, rating_group, SUM(item_count), CAST(SUM(rating_sum) AS REAL) / NULLIF(SUM(rated_count), 0)
+    FROM buckets GROUP BY rating_group;
+"""
+
+RECALCULATE_RATINGS_SQL = """
+    UPDATE rated_items
+    SET rating = (SELECT calc.rating FROM item_rating_calc calc WHERE calc.item_id = rated_items.item_id)
+    WHERE item_id = ANY(%s)
+      AND rating IS NOT (SELECT calc.rating FROM item_rating_calc calc WHERE calc.item_id = rated_items.item_id);
+"""
+
+CRITERIA_FINGERPRINT_SQL = """
+    SELECT group_concat(criterion_id || ':' || name || ':' || COALESCE(description, '') || ':'
+                        || COALESCE(default_for_types, '') || ':' || is_overall, '|')
+    FROM (SELECT * FROM criteria ORDER BY criterion_id);
+"""
+
+# No full-text or trigram index here: every word must occur in name, alt_name or review
+# (case-insensitive substring), and names that equal or start with the query rank first.
+SEARCH_ITEMS_SQL = """
+    SELECT ri.item_id, ri.name, ri.alt_name, ri.item_type, ri.status, ri.rating, ri.review,
+           ri.created_at, ri.updated_at,
+           CASE WHEN casefold(ri.name) = %s THEN 3
+                WHEN instr(casefold(ri.name), %s) = 1 THEN 2
+                WHEN instr(casefold(ri.name), %s) > 0 THEN 1
+                WHEN instr(casefold(ri.alt_name), %s) > 0 THEN 0.5
+                ELSE 0 END AS search_rank
+    FROM rated_items ri
+    WHERE ri.user_id = %s{filter_conditions}{word_conditions}
+    ORDER BY search_rank DESC, ri.item_id DESC
+    LIMIT %s;
+"""
+SEARCH_WORD_CONDITION = """
+      AND (instr(casefold(ri.name), %s) > 0
+           OR instr(casefold(ri.alt_name), %s) > 0
+           OR instr(casefold(ri.review), %s) > 0)"""
+
+class SqliteDatabaseModel(DatabaseModel):
+    """
+    DatabaseModel on an embedded SQLite file (DB_BACKEND=sqlite), for single-user installs that
+    have no PostgreSQL server. Every thread keeps its own connection to the WAL-mode database,
+    and the PostgreSQL-style SQL of DatabaseModel is translated per call (see _translate).
+    Not available: COPY (the importer uses batched inserts instead), user_stats and the change feed.
+    """
+    backend = 'sqlite'
+    schema_paths = SCHEMA_PATHS
+    statistics_sql = STATISTICS_SQL
+    statistics_source_sql = RATED_ITEMS_STATS_SOURCE_SQL  # No user_stats summary; aggregating locally is fast enough
+    recalculate_ratings_sql = RECALCULATE_RATINGS_SQL
+
+    def __init__(self, path=SQLITE_PATH):
+        super().__init__()
+        self.path = path
+        self.criteria_catalog = CriteriaCatalog(self, fingerprint_sql=CRITERIA_FINGERPRINT_SQL)
+
+    def _execute(self, sql, params=None, fetch=None, use_dict_cursor=False, batch=False, template=None,
+                 copy_file=None, query_name='query', sensitive=False):
+        if copy_file is not None:
+            raise DatabaseError("COPY is not supported by the SQLite backend.")
+        if batch and not params:
+            return None
+        tx_conn = getattr(self._local, 'conn', None)
+        conn = tx_conn
+        debug = logger.isEnabledFor(logging.DEBUG)
+        started = None
+        rows = 0
+        failed = True
+        try:
+            if conn is None:
+                conn = get_connection(self.path, self.schema_paths)
+            started = time.perf_counter()
+            if batch:
+                if debug:
+                    logger.debug(f"Executing batched SQL '{query_name}' for {len(params)} rows: {sql}")
+                cur = conn.executemany(_translate_batch(sql, params), params)
+            else:
+                if debug:
+                    logger.debug(f"Executing SQL '{query_name}': {sql} with params {format_params(params, sensitive)}")
+                cur = conn.execute(*_translate(sql, params))
+
+            result = None
+            if fetch == "one":
+                result = cur.fetchone()
+                rows = 1 if result is not None else 0
+            elif fetch == "all":
+                result = cur.fetchall()
+                rows = len(result)
+            else:
+                rows = max(cur.rowcount, 0)
+            cur.close()
+            if debug:
+                logger.debug(f"Query '{query_name}' returned {rows} row(s).")
+            failed = False
+            return result
+
+        except DatabaseError:
+            raise
+        except sqlite3.Error as e:
+            logger.error(f"Database error executing query: {e}", exc_info=True)
+            logger.error(f"Failed SQL was likely: {sql} with params {format_params(params, sensitive)}")
+            raise DatabaseError(f"A database error occurred: {e}. Check logs.") from e
+        except Exception as e:
+            logger.exception(f"An unexpected error occurred during query execution: {e}")
+            raise DatabaseError(f"An unexpected error occurred: {e}. Check logs.") from e
+        finally:
+            if started is not None:
+                self.query_metrics.record(query_name, time.perf_counter() - started, rows=rows, failed=failed,
+                                          sql=sql, params=params, sensitive=sensitive)
+
+    def stream_query(self, sql, params=None, itersize=2000, query_name=None):
+        """Yields the rows of a query, fetching itersize rows at a time. Raises DatabaseError."""
+        query_name = query_name or self._caller_name()
+        conn = getattr(self._local, 'conn', None) or get_connection(self.path, self.schema_paths)
+        cur = None
+        db_time = 0.0   # Time spent executing and fetching, not in the consumer of the rows
+        rows = 0
+        failed = True
+        try:
+            started = time.perf_counter()
+            cur = conn.execute(*_translate(sql, params))
+            while True:
+                batch = cur.fetchmany(itersize)
+                db_time += time.perf_counter() - started
+                if not batch:
+                    break
+                for row in batch:
+                    rows += 1
+                    yield row
+                started = time.perf_counter()
+            failed = False
+        except sqlite3.Error as e:
+            logger.error(f"Database error streaming query '{query_name}': {e}", exc_info=True)
+            raise DatabaseError(f"A database error occurred: {e}. Check logs.") from e
+        finally:
+            if cur is not None:
+                cur.close()
+            self.query_metrics.record(query_name, db_time, rows=rows, failed=failed, sql=sql, params=params)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Unit of work on this thread's connection, as DatabaseModel.transaction. The write lock is
+        taken at BEGIN (IMMEDIATE), so concurrent writers wait up to BUSY_TIMEOUT instead of failing midway.
+        """
+        if getattr(self._local, 'conn', None) is not None:
+            yield self._local.conn
+            return
+
+        conn = get_connection(self.path, self.schema_paths)
+        try:
+            conn.execute("BEGIN IMMEDIATE;")
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Could not start a transaction: {e}") from e
+        self._local.conn = conn
+        self._local.touched_items = set()
+        logger.debug("Transaction started.")
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.execute("ROLLBACK;")
+                logger.warning("Transaction rolled back due to error.")
+            except sqlite3.Error as rb_e:
+                logger.error(f"Error during transaction rollback: {rb_e}", exc_info=True)
+            raise
+        else:
+            try:
+                conn.execute("COMMIT;")
+                logger.debug("Transaction committed.")
+            except sqlite3.Error as e:
+                logger.error(f"Database error committing transaction: {e}", exc_info=True)
+                try:
+                    conn.execute("ROLLBACK;")
+                except sqlite3.Error:
+                    pass
+                raise DatabaseError(f"A database error occurred: {e}. Check logs.") from e
+        finally:
+            self._local.conn = None
+            conn.settings.clear()
+            self._invalidate_touched_items()
+
+    def rebuild_user_stats(self, user_id):
+        """The SQLite schema has no user_stats summary, so there is nothing to rebuild."""
+
+    def search_user_items(self, user_id, query, limit=SEARCH_RESULTS_LIMIT, use_dict_cursor=True, item_filter=None):
+        """
+        Searches the user's items by name, alt_name and review, best matches first.
+        Every word of the query must occur in one of them (no typo tolerance without pg_trgm).
+        Returns the same columns as get_user_items plus search_rank.
+        """
+        query = (query or '').strip()
+        if not query:
+            return []
+        folded = query.casefold()
+        words = re.findall(r'\w+', folded)
+
+        filter_conditions, filter_params = item_filter.to_sql(alias='ri') if item_filter is not None else ([], [])
+        sql = SEARCH_ITEMS_SQL.format(filter_conditions=''.join(f" AND {c}" for c in filter_conditions),
+                                      word_conditions=SEARCH_WORD_CONDITION * len(words))
+        params = (folded, folded, folded, folded, user_id, *filter_params,
+                  *(word for word in words for _ in range(3)), int(limit))
+        try:
+            return self.execute_query(sql, params, fetch="all", use_dict_cursor=use_dict_cursor)
+        except DatabaseError as e:
+            logger.error(f"Failed to search items for user_id {user_id} (query '{query}'): {e}")
+            raise
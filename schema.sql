@@ -1,3 +1,7 @@
+-- Creates the tables of a new RateSphere database and the predefined criteria.
+-- Indexes, functions and triggers are installed by schema_upgrade.sql: run it right after this script,
+-- and again on existing databases after every update (see "Upgrading" in README.md).
+
 CREATE TABLE users (
     user_id SERIAL PRIMARY KEY,
     username VARCHAR(50) UNIQUE NOT NULL,
@@ -50,28 +54,6 @@ CREATE TABLE rated_items (
         ON DELETE CASCADE
 );
 
-CREATE INDEX idx_rated_items_user_id ON rated_items (user_id);
-CREATE INDEX idx_rated_items_item_type ON rated_items (item_type);
-CREATE INDEX idx_rated_items_status ON rated_items (status);
-CREATE INDEX idx_rated_items_rating ON rated_items (rating);
-
-CREATE OR REPLACE FUNCTION update_updated_at_column()
-RETURNS TRIGGER AS $$
-BEGIN
-   NEW.updated_at = CURRENT_TIMESTAMP;
-   RETURN NEW;
-END;
-$$ language 'plpgsql';
-
-CREATE TRIGGER update_item_updated_at
-BEFORE UPDATE ON rated_items
-FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
-
-CREATE TRIGGER update_user_updated_at
-BEFORE UPDATE ON users
-FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
-
-
 CREATE TABLE criteria (
     criterion_id SERIAL PRIMARY KEY,
     name VARCHAR(100) UNIQUE NOT NULL,
@@ -0,0 +1,110 @@
+-- Local replica of the logged-in user's PostgreSQL data (DB_BACKEND=replica), applied after schema_sqlite.sql.
+-- Every local write to rated_items or item_criterion_ratings queues its item in sync_queue;
+-- ReplicaSyncer pushes the queue to the server and applies pulled rows with
+-- set_config('ratesphere.sync_apply', 'on', true), which keeps them out of the queue.
+
+-- One entry per changed item; repeated edits before a push only bump version.
+CREATE TABLE IF NOT EXISTS sync_queue (
+    item_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    op TEXT NOT NULL CHECK (op IN ('upsert', 'delete')),
+    version INTEGER NOT NULL DEFAULT 1,
+    queued_at TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f000+00:00', 'now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_queue_user_queued_at ON sync_queue (user_id, queued_at);
+
+-- Server version (rated_items.row_version) of every item known to exist on the server.
+-- A push is a conflict when the server row no longer has this version.
+CREATE TABLE IF NOT EXISTS sync_items (
+    item_id INTEGER PRIMARY KEY,
+    remote_version INTEGER
+);
+
+-- Pull watermarks and other syncer state, as JSON values.
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+-- Local changes that lost against the server (or were rejected by it), kept for the user.
+CREATE TABLE IF NOT EXISTS sync_conflicts (
+    conflict_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    op TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    local_item TEXT,    -- JSON of the discarded local version, with its criterion ratings
+    detected_at TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f000+00:00', 'now'))
+);
+
+-- Items created locally get ids from 2^31 up, beyond any PostgreSQL SERIAL value,
+-- until the syncer replaces them with the id the server assigned.
+INSERT INTO sqlite_sequence (name, seq)
+SELECT 'rated_items', 2147483647
+WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'rated_items');
+UPDATE sqlite_sequence SET seq = 2147483647 WHERE name = 'rated_items' AND seq < 2147483647;
+
+CREATE TRIGGER IF NOT EXISTS sync_queue_item_insert
+AFTER INSERT ON rated_items
+FOR EACH ROW
+WHEN current_setting('ratesphere.sync_apply') IS NOT 'on'
+BEGIN
+    INSERT INTO sync_queue (item_id, user_id, op) VALUES (NEW.item_id, NEW.user_id, 'upsert')
+    ON CONFLICT (item_id) DO UPDATE
+    SET op = 'upsert', version = version + 1, queued_at = excluded.queued_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS sync_queue_item_update
+AFTER UPDATE ON rated_items
+FOR EACH ROW
+WHEN current_setting('ratesphere.sync_apply') IS NOT 'on'
+BEGIN
+    INSERT INTO sync_queue (item_id, user_id, op) VALUES (NEW.item_id, NEW.user_id, 'upsert')
+    ON CONFLICT (item_id) DO UPDATE
+    SET op = 'upsert', version = version + 1, queued_at = excluded.queued_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS sync_queue_item_delete
+AFTER DELETE ON rated_items
+FOR EACH ROW
+WHEN current_setting('ratesphere.sync_apply') IS NOT 'on'
+BEGIN
+    INSERT INTO sync_queue (item_id, user_id, op) VALUES (OLD.item_id, OLD.user_id, 'delete')
+    ON CONFLICT (item_id) DO UPDATE
+    SET op = 'delete', version = version + 1, queued_at = excluded.queued_at;
+END;
+
+-- Ratings queue their item, unless the item itself is being deleted (ON DELETE CASCADE).
+CREATE TRIGGER IF NOT EXISTS sync_queue_rating_insert
+AFTER INSERT ON item_criterion_ratings
+FOR EACH ROW
+WHEN current_setting('ratesphere.sync_apply') IS NOT 'on'
+BEGIN
+    INSERT INTO sync_queue (item_id, user_id, op)
+    SELECT item_id, user_id, 'upsert' FROM rated_items WHERE item_id = NEW.item_id
+    ON CONFLICT (item_id) DO UPDATE
+    SET op = 'upsert', version = version + 1, queued_at = excluded.queued_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS sync_queue_rating_update
+AFTER UPDATE ON item_criterion_ratings
+FOR EACH ROW
+WHEN current_setting('ratesphere.sync_apply') IS NOT 'on'
+BEGIN
+    INSERT INTO sync_queue (item_id, user_id, op)
+    SELECT item_id, user_id, 'upsert' FROM rated_items WHERE item_id IN (OLD.item_id, NEW.item_id)
+    ON CONFLICT (item_id) DO UPDATE
+    SET op = 'upsert', version = version + 1, queued_at = excluded.queued_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS sync_queue_rating_delete
+AFTER DELETE ON item_criterion_ratings
+FOR EACH ROW
+WHEN current_setting('ratesphere.sync_apply') IS NOT 'on'
+BEGIN
+    INSERT INTO sync_queue (item_id, user_id, op)
+    SELECT item_id, user_id, 'upsert' FROM rated_items WHERE item_id = OLD.item_id
+    ON CONFLICT (item_id) DO UPDATE
+    SET op = 'upsert', version = version + 1, queued_at = excluded.queued_at;
+END;
@@ -0,0 +1,159 @@
+-- SQLite schema for single-user installs (DB_BACKEND=sqlite). Applied automatically at startup,
+-- so every statement must be safe to run again on an existing database.
+-- Needs SQLite 3.35+ (RETURNING, NULLS LAST, aggregate FILTER) and a connection opened by
+-- model/sqlite_database_model.py, which registers the collations and functions used below:
+--   item_type_order / item_status_order: sort enum-like columns in declaration order, like the PostgreSQL enums
+--   current_setting(name): per-transaction settings, see ratesphere.bulk_load
+-- Timestamps are stored as UTC text 'YYYY-MM-DD HH:MM:SS.ffffff+00:00', the format the connection writes.
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE NOT NULL CHECK (length(username) <= 50),
+    email TEXT UNIQUE NOT NULL CHECK (length(email) <= 255),
+    password_hash TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f000+00:00', 'now')),
+    updated_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS rated_items (
+    item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+
+    name TEXT NOT NULL COLLATE NOCASE CHECK (length(name) <= 255),
+    alt_name TEXT CHECK (length(alt_name) <= 255),
+    item_type TEXT NOT NULL COLLATE item_type_order CHECK (item_type IN (
+        'Movie', 'Book', 'Manga', 'Game', 'Anime', 'Manhwa', 'Manhua', 'Cartoon', 'Series', 'Board game')),
+    status TEXT NOT NULL COLLATE item_status_order CHECK (status IN (
+        'Completed', 'In Progress', 'Planned', 'Dropped', 'Ongoing')),
+    rating REAL CHECK (rating >= 1 AND rating <= 10) NULL,
+    review TEXT,
+
+    created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f000+00:00', 'now')),
+    updated_at TIMESTAMP
+);
+
+-- Same sort indexes as schema_upgrade.sql. SQLite indexes cannot declare NULLS LAST, so the nullable
+-- columns get one index that is read in either direction.
+CREATE INDEX IF NOT EXISTS idx_rated_items_user_name ON rated_items (user_id, name, item_id);
+CREATE INDEX IF NOT EXISTS idx_rated_items_user_item_type ON rated_items (user_id, item_type, item_id);
+CREATE INDEX IF NOT EXISTS idx_rated_items_user_status ON rated_items (user_id, status, item_id);
+CREATE INDEX IF NOT EXISTS idx_rated_items_user_created_at ON rated_items (user_id, created_at, item_id);
+CREATE INDEX IF NOT EXISTS idx_rated_items_user_rating ON rated_items (user_id, rating, item_id);
+CREATE INDEX IF NOT EXISTS idx_rated_items_user_updated_at ON rated_items (user_id, updated_at, item_id);
+
+-- Bulk loads (the item importer) run with set_config('ratesphere.bulk_load', 'on'): imported
+-- updated_at values are then kept instead of being overwritten by the rating triggers.
+CREATE TRIGGER IF NOT EXISTS update_item_updated_at
+AFTER UPDATE ON rated_items
+FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at AND current_setting('ratesphere.bulk_load') IS NOT 'on'
+BEGIN
+    UPDATE rated_items SET updated_at = strftime('%Y-%m-%d %H:%M:%f000+00:00', 'now')
+    WHERE item_id = NEW.item_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS update_user_updated_at
+AFTER UPDATE ON users
+FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE users SET updated_at = strftime('%Y-%m-%d %H:%M:%f000+00:00', 'now')
+    WHERE user_id = NEW.user_id;
+END;
+
+CREATE TABLE IF NOT EXISTS criteria (
+    criterion_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL CHECK (length(name) <= 100),
+    description TEXT NULL,
+    default_for_types TEXT NULL,   -- JSON array of item types
+    is_overall BOOLEAN NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_criteria_is_overall ON criteria (is_overall);
+
+CREATE TABLE IF NOT EXISTS item_criterion_ratings (
+    rating_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_id INTEGER NOT NULL REFERENCES rated_items (item_id) ON DELETE CASCADE,
+    criterion_id INTEGER NOT NULL REFERENCES criteria (criterion_id) ON DELETE RESTRICT,
+    rating REAL NOT NULL CHECK (rating >= 1.0 AND rating <= 10.0),
+
+    UNIQUE (item_id, criterion_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_item_criterion_ratings_criterion_id ON item_criterion_ratings (criterion_id);
+
+-- rated_items.rating is derived from the criterion ratings: the 'overall' criterion (Total score)
+-- is a direct override, otherwise it is the average of the other criteria (NULL if none).
+CREATE VIEW IF NOT EXISTS item_rating_calc AS
+SELECT icr.item_id,
+       COALESCE(
+           MAX(icr.rating) FILTER (WHERE c.is_overall),
+           ROUND(AVG(icr.rating) FILTER (WHERE NOT c.is_overall), 2)
+       ) AS rating
+FROM item_criterion_ratings icr
+JOIN criteria c ON c.criterion_id = icr.criterion_id
+GROUP BY icr.item_id;
+
+-- SQLite only has row-level triggers, so each written rating recalculates its item.
+CREATE TRIGGER IF NOT EXISTS item_criterion_ratings_refresh_insert
+AFTER INSERT ON item_criterion_ratings
+FOR EACH ROW
+BEGIN
+    UPDATE rated_items
+    SET rating = (SELECT calc.rating FROM item_rating_calc calc WHERE calc.item_id = rated_items.item_id)
+    WHERE item_id = NEW.item_id
+      AND rating IS NOT (SELECT calc.rating FROM item_rating_calc calc WHERE calc.item_id = rated_items.item_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS item_criterion_ratings_refresh_update
+AFTER UPDATE ON item_criterion_ratings
+FOR EACH ROW
+BEGIN
+    UPDATE rated_items
+    SET rating = (SELECT calc.rating FROM item_rating_calc calc WHERE calc.item_id = rated_items.item_id)
+    WHERE item_id IN (OLD.item_id, NEW.item_id)
+      AND rating IS NOT (SELECT calc.rating FROM item_rating_calc calc WHERE calc.item_id = rated_items.item_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS item_criterion_ratings_refresh_delete
+AFTER DELETE ON item_criterion_ratings
+FOR EACH ROW
+BEGIN
+    UPDATE rated_items
+    SET rating = (SELECT calc.rating FROM item_rating_calc calc WHERE calc.item_id = rated_items.item_id)
+    WHERE item_id = OLD.item_id
+      AND rating IS NOT (SELECT calc.rating FROM item_rating_calc calc WHERE calc.item_id = rated_items.item_id);
+END;
+
+INSERT OR IGNORE INTO criteria (name, is_overall) VALUES ('Total score', 1);
+
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Gameplay', 'Interesting, engaging, variety of mechanics.', '["Game", "Board game"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Graphics', 'Quality of visual design, style.', '["Movie", "Game", "Anime", "Cartoon", "Series"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Characters', 'Elaboration, development, charisma.', '["Movie", "Book", "Manga", "Manhwa", "Manhua"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Optimization', 'Performance, stability, bug free.', '["Game"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Music and sound', 'Soundtrack, voice-over, soundtrack.', '["Movie", "Game", "Anime", "Cartoon", "Series"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Replayability', 'Repeatability, variability.', '["Game", "Board game"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Revisability', 'Look again.', '["Movie", "Anime", "Cartoon", "Series"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Re-readability', 'The possibility of rereading.', '["Book", "Manga", "Manhwa", "Manhua"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Difficulty level', 'Balance between challenge and comfort.', '["Game", "Board game"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Social aspects', 'Opportunities for cooperative play or interaction.', '["Game", "Board game"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Directing', 'Shooting style, frame work, overall vision.', '["Movie", "Game", "Anime", "Cartoon", "Series"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Acting', 'Emotional authenticity, charisma.', '["Movie", "Book", "Manga", "Game", "Anime", "Manhwa", "Manhua", "Cartoon", "Series"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Dialogues', 'Realistic, interesting, deep.', '["Movie", "Book", "Manga", "Game", "Anime", "Manhwa", "Manhua", "Cartoon", "Series"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Visual aesthetics', 'Cameraman work, special effects, scenery.', '["Movie", "Game", "Anime", "Cartoon", "Series"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Themes and ideas', 'Philosophical depth, relevance of the issues.', '["Movie", "Book", "Manga", "Game", "Anime", "Manhwa", "Manhua", "Cartoon", "Series"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Final', 'How satisfactory and logical it is.', '["Movie", "Book", "Manga", "Game", "Anime", "Manhwa", "Manhua", "Cartoon", "Series"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Animation', 'Quality, attention to detail, style.', '["Anime", "Cartoon"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Rules', 'Simple, intuitive, logical.', '["Game", "Board game"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Depth of strategy', 'Ability to build tactics and plan.', '["Game", "Board game"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Components', 'Quality of materials, visual style.', '["Book", "Manga", "Board game"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Balance', 'Equal chances to win, no dominant strategy.', '["Game", "Board game"]');
+INSERT OR IGNORE INTO criteria (name, description, default_for_types) VALUES ('Accessibility', 'Is it suitable for beginners.', '["Game", "Board game"]');
+
+INSERT OR IGNORE INTO criteria (name, description) VALUES ('Plot', 'Interesting, logical, unexpected twists and turns.');
+INSERT OR IGNORE INTO criteria (name, description) VALUES ('Pace of narration', 'Dynamism, no drawn out moments.');
+INSERT OR IGNORE INTO criteria (name, description) VALUES ('Originality', 'Uniqueness of concept or pitch.');
+INSERT OR IGNORE INTO criteria (name, description) VALUES ('Emotional response', 'A ability to evoke emotion.');
+INSERT OR IGNORE INTO criteria (name, description) VALUES ('Atmosphere', 'How addictive the world is.');
+INSERT OR IGNORE INTO criteria (name, description) VALUES ('World', 'Elaboration, immersion, uniqueness.');
+INSERT OR IGNORE INTO criteria (name, description) VALUES ('Duration', 'Optimal batch duration.');
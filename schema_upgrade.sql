@@ -0,0 +1,326 @@
+-- Brings a RateSphere database up to date: indexes, derived columns, functions and triggers.
+-- Run it after schema.sql on a new database, and again after every update of the application:
+--     psql -d ratesphere_db -f schema_upgrade.sql
+-- Every statement can be rerun, so the script is safe on a database that is already up to date.
+-- The application checks for the objects created here when it connects (see REQUIRED_SCHEMA_OBJECTS
+-- in model/database_model.py) and refuses to start without them.
+
+BEGIN;
+
+-- Single-column indexes of the first schema, replaced by the composite ones below.
+DROP INDEX IF EXISTS idx_rated_items_user_id;
+DROP INDEX IF EXISTS idx_rated_items_item_type;
+DROP INDEX IF EXISTS idx_rated_items_status;
+DROP INDEX IF EXISTS idx_rated_items_rating;
+
+-- One index per sort order of the ratings list: WHERE user_id = ? [AND filters] ORDER BY <col>, item_id
+-- is read straight from the index in either direction, and keyset pages seek into it.
+-- Nullable columns are sorted NULLS LAST in both directions, so they need one index per direction.
+CREATE INDEX IF NOT EXISTS idx_rated_items_user_name ON rated_items (user_id, name, item_id);
+CREATE INDEX IF NOT EXISTS idx_rated_items_user_item_type ON rated_items (user_id, item_type, item_id);
+CREATE INDEX IF NOT EXISTS idx_rated_items_user_status ON rated_items (user_id, status, item_id);
+CREATE INDEX IF NOT EXISTS idx_rated_items_user_created_at ON rated_items (user_id, created_at, item_id);
+CREATE INDEX IF NOT EXISTS idx_rated_items_user_rating_asc ON rated_items (user_id, rating ASC NULLS LAST, item_id ASC);
+CREATE INDEX IF NOT EXISTS idx_rated_items_user_rating_desc ON rated_items (user_id, rating DESC NULLS LAST, item_id DESC);
+CREATE INDEX IF NOT EXISTS idx_rated_items_user_updated_at_asc ON rated_items (user_id, updated_at ASC NULLS LAST, item_id ASC);
+CREATE INDEX IF NOT EXISTS idx_rated_items_user_updated_at_desc ON rated_items (user_id, updated_at DESC NULLS LAST, item_id DESC);
+
+-- Search: weighted full-text vector over name, alt_name and review, plus trigram indexes for typo-tolerant name matching
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE rated_items ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(alt_name, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(review, '')), 'C')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_rated_items_search_vector ON rated_items USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_rated_items_name_trgm ON rated_items USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_rated_items_alt_name_trgm ON rated_items USING GIN (alt_name gin_trgm_ops);
+
+-- Bulk loads (the item importer) run with SET LOCAL ratesphere.bulk_load = 'on': the per-row triggers
+-- below then do nothing, and the loader rebuilds user_stats and sends one notification itself.
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+   IF current_setting('ratesphere.bulk_load', true) = 'on' THEN
+       RETURN NEW;
+   END IF;
+   NEW.updated_at = CURRENT_TIMESTAMP;
+   RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS update_item_updated_at ON rated_items;
+CREATE TRIGGER update_item_updated_at
+BEFORE UPDATE ON rated_items
+FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+DROP TRIGGER IF EXISTS update_user_updated_at ON users;
+CREATE TRIGGER update_user_updated_at
+BEFORE UPDATE ON users
+FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Per-user statistics summary, kept current by triggers on rated_items.
+-- One row per (user, type, status, rounded rating) bucket; rating_group 0 holds unrated items.
+-- DatabaseModel.get_user_statistics reads it instead of aggregating rated_items.
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id INTEGER NOT NULL,
+    item_type item_content_type_enum NOT NULL,
+    status item_status_enum NOT NULL,
+    rating_group SMALLINT NOT NULL,
+    item_count INTEGER NOT NULL DEFAULT 0,
+    rated_count INTEGER NOT NULL DEFAULT 0,
+    rating_sum NUMERIC(14, 2) NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (user_id, item_type, status, rating_group)
+);
+
+CREATE OR REPLACE FUNCTION apply_user_stats_delta(
+    p_user_id INTEGER,
+    p_item_type item_content_type_enum,
+    p_status item_status_enum,
+    p_rating NUMERIC,
+    p_sign INTEGER
+)
+RETURNS VOID AS $$
+DECLARE
+    v_rating_group SMALLINT := COALESCE(ROUND(p_rating), 0);
+BEGIN
+    INSERT INTO user_stats AS s (user_id, item_type, status, rating_group, item_count, rated_count, rating_sum)
+    VALUES (p_user_id, p_item_type, p_status, v_rating_group, p_sign,
+            CASE WHEN p_rating IS NULL THEN 0 ELSE p_sign END,
+            COALESCE(p_rating, 0) * p_sign)
+    ON CONFLICT (user_id, item_type, status, rating_group) DO UPDATE
+    SET item_count = s.item_count + EXCLUDED.item_count,
+        rated_count = s.rated_count + EXCLUDED.rated_count,
+        rating_sum = s.rating_sum + EXCLUDED.rating_sum;
+
+    IF p_sign < 0 THEN
+        DELETE FROM user_stats
+        WHERE user_id = p_user_id
+          AND item_type = p_item_type
+          AND status = p_status
+          AND rating_group = v_rating_group
+          AND item_count <= 0;
+    END IF;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION maintain_user_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('ratesphere.bulk_load', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_user_stats_delta(OLD.user_id, OLD.item_type, OLD.status, OLD.rating, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_user_stats_delta(NEW.user_id, NEW.item_type, NEW.status, NEW.rating, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS rated_items_user_stats_insert_delete ON rated_items;
+CREATE TRIGGER rated_items_user_stats_insert_delete
+AFTER INSERT OR DELETE ON rated_items
+FOR EACH ROW EXECUTE FUNCTION maintain_user_stats();
+
+DROP TRIGGER IF EXISTS rated_items_user_stats_update ON rated_items;
+CREATE TRIGGER rated_items_user_stats_update
+AFTER UPDATE OF user_id, item_type, status, rating ON rated_items
+FOR EACH ROW
+WHEN (OLD.user_id IS DISTINCT FROM NEW.user_id
+      OR OLD.item_type IS DISTINCT FROM NEW.item_type
+      OR OLD.status IS DISTINCT FROM NEW.status
+      OR OLD.rating IS DISTINCT FROM NEW.rating)
+EXECUTE FUNCTION maintain_user_stats();
+
+-- Backfill when the table has just been created on a database that already contains items.
+-- Once it holds rows the triggers keep it current, so a rerun leaves it alone.
+INSERT INTO user_stats (user_id, item_type, status, rating_group, item_count, rated_count, rating_sum)
+SELECT user_id, item_type, status, COALESCE(ROUND(rating), 0), COUNT(*), COUNT(rating), COALESCE(SUM(rating), 0)
+FROM rated_items
+WHERE NOT EXISTS (SELECT 1 FROM user_stats)
+GROUP BY user_id, item_type, status, COALESCE(ROUND(rating), 0);
+
+-- rated_items.rating is derived from the criterion ratings: the 'overall' criterion (Total score)
+-- is a direct override, otherwise it is the average of the other criteria (NULL if none).
+-- Every listed item is updated, also when its rating stays the same: new criterion ratings are a new
+-- version of the item, which the row_version trigger below records on this one UPDATE.
+CREATE OR REPLACE FUNCTION recalculate_item_ratings(p_item_ids INTEGER[])
+RETURNS VOID AS $$
+BEGIN
+    UPDATE rated_items ri
+    SET rating = calc.rating
+    FROM (
+        SELECT ids.item_id,
+               COALESCE(
+                   MAX(icr.rating) FILTER (WHERE c.is_overall),
+                   ROUND(AVG(icr.rating) FILTER (WHERE NOT c.is_overall), 2)
+               ) AS rating
+        FROM unnest(p_item_ids) AS ids(item_id)
+        LEFT JOIN item_criterion_ratings icr ON icr.item_id = ids.item_id
+        LEFT JOIN criteria c ON c.criterion_id = icr.criterion_id
+        GROUP BY ids.item_id
+    ) AS calc
+    WHERE ri.item_id = calc.item_id;
+END;
+$$ language 'plpgsql';
+
+-- Change feed: changes to items and their criterion ratings are announced on the 'item_changes'
+-- channel as JSON {"table", "op", "item_id", "user_id"} so running clients can refresh their caches.
+-- A bulk import sends a single {"op": "IMPORT", "item_id": null} for the user instead.
+-- Notifications are delivered on commit; identical ones within a transaction are delivered once.
+CREATE OR REPLACE FUNCTION notify_item_changes(p_table TEXT, p_op TEXT, p_item_ids INTEGER[])
+RETURNS VOID AS $$
+BEGIN
+    IF current_setting('ratesphere.bulk_load', true) = 'on' THEN
+        RETURN;
+    END IF;
+    PERFORM pg_notify('item_changes', json_build_object(
+        'table', p_table, 'op', p_op, 'item_id', ri.item_id, 'user_id', ri.user_id)::text)
+    FROM rated_items ri
+    WHERE ri.item_id = ANY(p_item_ids);
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION notify_rated_item_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('ratesphere.bulk_load', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('item_changes', json_build_object(
+            'table', TG_TABLE_NAME, 'op', TG_OP, 'item_id', OLD.item_id, 'user_id', OLD.user_id)::text);
+    ELSE
+        PERFORM pg_notify('item_changes', json_build_object(
+            'table', TG_TABLE_NAME, 'op', TG_OP, 'item_id', NEW.item_id, 'user_id', NEW.user_id)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS rated_items_notify_change ON rated_items;
+CREATE TRIGGER rated_items_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON rated_items
+FOR EACH ROW EXECUTE FUNCTION notify_rated_item_change();
+
+CREATE OR REPLACE FUNCTION refresh_item_ratings_from_criteria()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed_item_ids INTEGER[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        changed_item_ids := ARRAY(SELECT DISTINCT item_id FROM new_ratings);
+    ELSIF TG_OP = 'UPDATE' THEN
+        changed_item_ids := ARRAY(SELECT item_id FROM new_ratings UNION SELECT item_id FROM old_ratings);
+    ELSE
+        changed_item_ids := ARRAY(SELECT DISTINCT item_id FROM old_ratings);
+    END IF;
+    PERFORM recalculate_item_ratings(changed_item_ids);
+    PERFORM notify_item_changes(TG_TABLE_NAME, TG_OP, changed_item_ids);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Statement-level triggers: a batched upsert or a bulk import recalculates each item once.
+DROP TRIGGER IF EXISTS item_criterion_ratings_refresh_insert ON item_criterion_ratings;
+CREATE TRIGGER item_criterion_ratings_refresh_insert
+AFTER INSERT ON item_criterion_ratings
+REFERENCING NEW TABLE AS new_ratings
+FOR EACH STATEMENT EXECUTE FUNCTION refresh_item_ratings_from_criteria();
+
+DROP TRIGGER IF EXISTS item_criterion_ratings_refresh_update ON item_criterion_ratings;
+CREATE TRIGGER item_criterion_ratings_refresh_update
+AFTER UPDATE ON item_criterion_ratings
+REFERENCING OLD TABLE AS old_ratings NEW TABLE AS new_ratings
+FOR EACH STATEMENT EXECUTE FUNCTION refresh_item_ratings_from_criteria();
+
+DROP TRIGGER IF EXISTS item_criterion_ratings_refresh_delete ON item_criterion_ratings;
+CREATE TRIGGER item_criterion_ratings_refresh_delete
+AFTER DELETE ON item_criterion_ratings
+REFERENCING OLD TABLE AS old_ratings
+FOR EACH STATEMENT EXECUTE FUNCTION refresh_item_ratings_from_criteria();
+
+-- Change tracking for offline replicas (DB_BACKEND=replica, see model/replica_sync.py).
+-- row_version is the item's version: a new sequence value on every insert and update, including the one
+-- recalculate_item_ratings makes when its criterion ratings change. row_xid is the transaction that wrote that version; replicas pull the rows with
+-- row_xid at or above their watermark, the oldest transaction still running at their previous pull.
+-- (A sequence value is drawn before commit, so it cannot be a watermark on its own: a slow transaction
+-- can commit a smaller value after a larger one was already pulled.)
+-- Unlike the triggers above, these also run during bulk loads.
+CREATE SEQUENCE IF NOT EXISTS rated_items_row_version_seq;
+
+ALTER TABLE rated_items ADD COLUMN IF NOT EXISTS row_version BIGINT NOT NULL DEFAULT nextval('rated_items_row_version_seq');
+ALTER TABLE rated_items ADD COLUMN IF NOT EXISTS row_xid BIGINT NOT NULL DEFAULT txid_current();
+
+CREATE INDEX IF NOT EXISTS idx_rated_items_user_row_xid ON rated_items (user_id, row_xid, item_id);
+
+CREATE OR REPLACE FUNCTION set_item_row_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.row_version := nextval('rated_items_row_version_seq');
+    NEW.row_xid := txid_current();
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS rated_items_row_version ON rated_items;
+CREATE TRIGGER rated_items_row_version
+BEFORE INSERT OR UPDATE ON rated_items
+FOR EACH ROW EXECUTE FUNCTION set_item_row_version();
+
+-- One tombstone per deleted item, so replicas learn about deletions without comparing id lists.
+-- Tombstones are pruned after 30 days, and rated_item_tombstones_pruned keeps the newest row_xid pruned:
+-- a replica whose watermark is not above it may have missed deletions, so it pulls all items again.
+CREATE TABLE IF NOT EXISTS rated_item_tombstones (
+    item_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    row_xid BIGINT NOT NULL DEFAULT txid_current(),
+    deleted_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_rated_item_tombstones_user_row_xid ON rated_item_tombstones (user_id, row_xid, item_id);
+CREATE INDEX IF NOT EXISTS idx_rated_item_tombstones_deleted_at ON rated_item_tombstones (deleted_at);
+
+CREATE TABLE IF NOT EXISTS rated_item_tombstones_pruned (
+    only_row BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (only_row),
+    row_xid BIGINT NOT NULL
+);
+
+INSERT INTO rated_item_tombstones_pruned (row_xid) VALUES (0) ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION record_rated_item_tombstones()
+RETURNS TRIGGER AS $$
+DECLARE
+    pruned_xid BIGINT;
+BEGIN
+    INSERT INTO rated_item_tombstones (item_id, user_id)
+    SELECT item_id, user_id FROM deleted_items
+    ON CONFLICT (item_id) DO NOTHING;
+
+    WITH pruned AS (
+        DELETE FROM rated_item_tombstones
+        WHERE deleted_at < CURRENT_TIMESTAMP - INTERVAL '30 days'
+        RETURNING row_xid
+    )
+    SELECT MAX(row_xid) INTO pruned_xid FROM pruned;
+    IF pruned_xid IS NOT NULL THEN
+        UPDATE rated_item_tombstones_pruned SET row_xid = GREATEST(row_xid, pruned_xid);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS rated_items_tombstones ON rated_items;
+CREATE TRIGGER rated_items_tombstones
+AFTER DELETE ON rated_items
+REFERENCING OLD TABLE AS deleted_items
+FOR EACH STATEMENT EXECUTE FUNCTION record_rated_item_tombstones();
+
+COMMIT;
@@ -0,0 +1,176 @@
+"""
+Startup profiler. Enabled by setting STARTUP_PROFILE to a report path in the environment (not in .env,
+which is read too late), e.g.
+
+    STARTUP_PROFILE=startup.json python main.py
+
+It must be the first import of main.py: from then on it times every module import (self and cumulative,
+like python -X importtime) and the phases main.py marks with phase(), up to the first drawn frame and
+the database being ready, and writes a JSON report. STARTUP_PROFILE_EXIT=1 also stops the app once the
+report is written (used by benchmarks.startup_budget). Uses only the standard library, so it adds
+nothing to the imports it measures.
+"""
+import importlib.abc
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+REPORT_PATH = os.environ.get("STARTUP_PROFILE")
+EXIT_AFTER_REPORT = os.environ.get("STARTUP_PROFILE_EXIT", "").lower() in ("1", "true", "yes")
+TOP_IMPORTS = 40    # Slowest modules listed in the report
+EXIT_TIMEOUT = 30.0 # With STARTUP_PROFILE_EXIT, seconds after which the app stops even if the database never got ready
+
+_started = time.perf_counter()
+
+def _elapsed_ms(moment=None):
+    return ((moment if moment is not None else time.perf_counter()) - _started) * 1000
+
+class _TimedLoader:
+    """Wraps a module loader to time exec_module; everything else is passed through."""
+
+    def __init__(self, loader, timer):
+        self._loader = loader
+        self._timer = timer
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        with self._timer.timing(module.__name__):
+            self._loader.exec_module(module)
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """Meta path finder that records how long each module took to execute, with and without its own imports."""
+
+    def __init__(self):
+        self.modules = {}       # name -> {'self_ms', 'cumulative_ms', 'start_ms'}
+        self._local = threading.local()
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, name, path=None, target=None):
+        if getattr(self._local, 'finding', False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                        spec.loader = _TimedLoader(spec.loader, self)
+                    return spec
+            return None
+        finally:
+            self._local.finding = False
+
+    @contextmanager
+    def timing(self, name):
+        stack = self._local.__dict__.setdefault('stack', [])
+        started = time.perf_counter()
+        stack.append(0.0)   # Time spent in nested imports
+        try:
+            yield
+        finally:
+            nested = stack.pop()
+            cumulative = time.perf_counter() - started
+            if stack:
+                stack[-1] += cumulative
+            self.modules[name] = {
+                'self_ms': round((cumulative - nested) * 1000, 3),
+                'cumulative_ms': round(cumulative * 1000, 3),
+                'start_ms': round(_elapsed_ms(started), 3),
+            }
+
+class StartupProfiler:
+    """Phase timeline and import times of one application start. All methods are no-ops when disabled."""
+
+    def __init__(self, report_path=REPORT_PATH, exit_after_report=EXIT_AFTER_REPORT):
+        self.report_path = report_path
+        self.exit_after_report = exit_after_report
+        self.enabled = bool(report_path)
+        self.phases = []        # {'name', 'start_ms', 'duration_ms', 'thread'}
+        self.marks = {}         # name -> ms since start
+        self._lock = threading.Lock()
+        self.import_timer = ImportTimer()
+        if self.enabled:
+            self.import_timer.install()
+
+    @contextmanager
+    def phase(self, name):
+        """Times the enclosed block as a named phase of the timeline."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(name, started, time.perf_counter())
+
+    def record_phase(self, name, started, finished):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.phases.append({
+                'name': name,
+                'start_ms': round(_elapsed_ms(started), 3),
+                'duration_ms': round((finished - started) * 1000, 3),
+                'thread': threading.current_thread().name,
+            })
+
+    def mark(self, name):
+        """Records a point in time (e.g. 'first_frame'); the first occurrence wins."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.marks.setdefault(name, round(_elapsed_ms(), 3))
+
+    def report(self):
+        slowest = sorted(self.import_timer.modules.items(), key=lambda entry: entry[1]['cumulative_ms'], reverse=True)
+        with self._lock:
+            return {
+                'python': sys.version.split()[0],
+                'argv': sys.argv,
+                'marks': dict(self.marks),
+                'phases': sorted(self.phases, key=lambda entry: entry['start_ms']),
+                'imports': {
+                    'count': len(self.import_timer.modules),
+                    'total_self_ms': round(sum(entry['self_ms'] for entry in self.import_timer.modules.values()), 3),
+                    'slowest': [dict(module=name, **timing) for name, timing in slowest[:TOP_IMPORTS]],
+                },
+            }
+
+    def write_report(self):
+        """Writes the JSON report to report_path. Returns the report (None when disabled)."""
+        if not self.enabled:
+            return None
+        report = self.report()
+        try:
+            with open(self.report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            logger.info(f"Startup profile written to {self.report_path} "
+                        f"(first frame at {report['marks'].get('first_frame', 0):.0f} ms).")
+        except OSError as e:
+            logger.error(f"Could not write startup profile {self.report_path}: {e}")
+        return report
+
+profiler = StartupProfiler()
+phase = profiler.phase
+mark = profiler.mark
@@ -0,0 +1,165 @@
+import importlib
+import logging
+import os
+import time
+
+from kivy.clock import Clock
+from kivy.lang import Builder
+from kivy.uix.screenmanager import ScreenManager
+
+import startup_profiler
+from config import KV_DIR, SCREEN_PREFETCH_DELAY
+
+logger = logging.getLogger(__name__)
+
+_loaded_kv_files = set()
+
+class ScreenFactory:
+    """
+    Describes how to build one screen, by naming convention: for screen 'add_item' with class prefix
+    'AddItem' that is view/kv/add_item_screen.kv, view.screens.add_item_screen.AddItemScreen and
+    controller.add_item_controller.AddItemController (exposed as app.add_item_controller).
+    prefetch lists the screens usually opened next, built in idle time once this one is shown.
+    """
+
+    def __init__(self, class_prefix, prefetch=()):
+        self.class_prefix = class_prefix
+        self.prefetch = tuple(prefetch)
+
+    def create(self, screen_name, app):
+        """
+        Loads the KV file, imports View and Controller, creates their instances and associates them.
+        Returns the created view instance or None on failure. Does not add it to a screen manager.
+        """
+        self._load_kv(screen_name)
+        logger.debug(f"Registering modules for: '{screen_name}' (Classes: {self.class_prefix}...)")
+        view_instance = None
+
+        view_module_name = f"view.screens.{screen_name}_screen"
+        view_class_name = f"{self.class_prefix}Screen"
+        controller_module_name = f"controller.{screen_name}_controller"
+        controller_class_name = f"{self.class_prefix}Controller"
+        controller_attr_name = f"{screen_name}_controller"
+
+        try:
+            view_module = importlib.import_module(view_module_name)
+            ViewClass = getattr(view_module, view_class_name)
+            view_instance = ViewClass(name=screen_name)
+            logger.debug(f"View created: {view_class_name}")
+
+            controller_module = importlib.import_module(controller_module_name)
+            ControllerClass = getattr(controller_module, controller_class_name)
+            controller_instance = ControllerClass(
+                models=app.models,
+                view=view_instance,
+                app=app
+            )
+            logger.debug(f"Controller created: {controller_class_name}")
+
+            setattr(app, controller_attr_name, controller_instance)
+            logger.debug(f"Controller available as: app.{controller_attr_name}")
+
+        except ImportError as e:
+            logger.error(f"IMPORT FAILED for screen '{screen_name}': {e}")
+            logger.error(f"Please check: {view_module_name.replace('.', '/')}.py (Class {view_class_name}) or {controller_module_name.replace('.', '/')}.py (Class {controller_class_name})")
+            view_instance = None
+        except AttributeError as e:
+            logger.error(f"ATTRIBUTE ERROR for screen '{screen_name}': {e}")
+            logger.error(f"Check that the classes '{view_class_name}' and '{controller_class_name}' exist in the corresponding files.")
+            view_instance = None
+        except Exception as e:
+            logger.exception(f"  - UNKNOWN ERROR while registering screen modules for '{screen_name}': {e}")
+            view_instance = None
+
+        return view_instance
+
+    @staticmethod
+    def _load_kv(screen_name):
+        kv_file_path = os.path.join(KV_DIR, f"{screen_name}_screen.kv")
+        if kv_file_path in _loaded_kv_files:
+            return
+        if not os.path.exists(kv_file_path):
+            logger.warning(f"KV file not found: {kv_file_path}")
+            return
+        try:
+            with startup_profiler.phase(f"kv:{screen_name}"):
+                Builder.load_file(kv_file_path)
+            _loaded_kv_files.add(kv_file_path)
+            logger.info(f"KV file loaded: {kv_file_path}")
+        except Exception as e:
+            logger.exception(f"Loading KV file: {kv_file_path}: {e}")
+
+class LazyScreenManager(ScreenManager):
+    """
+    ScreenManager that builds each screen (KV, view, controller) the first time it is needed:
+    on navigation (setting current) or get_screen(). After a screen is shown, the screens its
+    factory lists in prefetch are built one per frame after prefetch_delay seconds, so the
+    usual next screen opens without the build cost. A prefetch_delay of 0 or less disables prefetching.
+    """
+
+    def __init__(self, factories, app, prefetch_delay=SCREEN_PREFETCH_DELAY, **kwargs):
+        self.factories = factories      # {screen name: ScreenFactory}
+        self.app = app                  # Link to the main application class (owns models and controllers)
+        self.prefetch_delay = prefetch_delay
+        self._failed = set()
+        self._prefetch_queue = []
+        self._prefetch_event = None
+        super().__init__(**kwargs)
+
+    def has_screen(self, name):
+        return name in self.factories or super().has_screen(name)
+
+    def get_screen(self, name):
+        if not super().has_screen(name):
+            self.load_screen(name)
+        return super().get_screen(name)
+
+    def is_loaded(self, name):
+        return super().has_screen(name)
+
+    def load_screen(self, name):
+        """Builds the screen and adds it. Returns the screen, or None if it is unknown or failed to build."""
+        if super().has_screen(name):
+            return super().get_screen(name)
+        factory = self.factories.get(name)
+        if factory is None or name in self._failed:
+            return None
+        started = time.perf_counter()
+        screen = factory.create(name, self.app)
+        if screen is None:
+            self._failed.add(name)
+            return None
+        try:
+            self.add_widget(screen)
+        except Exception as e:
+            logger.exception(f"FAILED to add screen {name} to manager: {e}")
+            self._failed.add(name)
+            return None
+        startup_profiler.profiler.record_phase(f"screen:{name}", started, time.perf_counter())
+        logger.info(f"Screen '{name}' built in {(time.perf_counter() - started) * 1000:.0f} ms.")
+        return screen
+
+    def on_current(self, instance, value):
+        super().on_current(instance, value)
+        factory = self.factories.get(value)
+        if factory is not None and self.prefetch_delay > 0:
+            self.prefetch(factory.prefetch)
+
+    def prefetch(self, names):
+        """Queues screens to be built in idle time, one per frame."""
+        for name in names:
+            if name not in self._prefetch_queue and not self.is_loaded(name) and name not in self._failed:
+                self._prefetch_queue.append(name)
+        if self._prefetch_queue and self._prefetch_event is None:
+            self._prefetch_event = Clock.schedule_once(self._prefetch_next, self.prefetch_delay)
+
+    def _prefetch_next(self, dt):
+        self._prefetch_event = None
+        while self._prefetch_queue:
+            name = self._prefetch_queue.pop(0)
+            if not self.is_loaded(name):
+                logger.debug(f"Prefetching screen '{name}'.")
+                self.load_screen(name)
+                break
+        if self._prefetch_queue:
+            self._prefetch_event = Clock.schedule_once(self._prefetch_next, 0)
@@ -54,6 +54,9 @@ class AddItemScreen(MDScreen):
 
     def on_leave(self, *args):
         """Called when you leave the screen."""
+        app = MDApp.get_running_app()
+        if hasattr(app, 'add_item_controller'):
+            app.add_item_controller.cancel_pending()
         self._dismiss_all_dialogs()
         self.edit_mode = False
         self.item_to_edit_id = None
@@ -154,6 +157,21 @@ class AddItemScreen(MDScreen):
             self.edit_mode = False
             return
 
+        self._fill_item_fields(item_data)
+        if hasattr(self.ids, 'save_button_text'):
+            self.ids.save_button_text.text = "Update"
+
+        app = MDApp.get_running_app()
+        if not hasattr(app, 'add_item_controller'):
+            logger.error("Cannot load criteria ratings: add_item_controller not found.")
+            self.show_error("Error loading rating details.")
+            return
+
+        if hasattr(self.ids, 'rating_button_text'):
+            self.ids.rating_button_text.text = "Loading rating..."
+        app.add_item_controller.load_item_for_edit(self.item_to_edit_id)
+
+    def _fill_item_fields(self, item_data):
         self.ids.item_name.text = item_data.get('name', '') or ''
         self.ids.item_alt_name.text = item_data.get('alt_name') or ''
         self.ids.item_review.text = item_data.get('review') or ''
@@ -164,60 +182,70 @@ class AddItemScreen(MDScreen):
         if item_status and hasattr(self.ids, 'status_button_text'):
             self.ids.status_button_text.text = item_status
 
-        app = MDApp.get_running_app()
-        db_model = app.models.get('database')
-        if not db_model:
-            logger.error("Cannot load criteria ratings: DB model not found.")
-            self.show_error("Error loading rating details.")
+        if hasattr(self.ids, 'top_app_bar_title'):
+            self.ids.top_app_bar_title.text = f"Edit: {item_data.get('name', '')}"
+
+    def apply_edit_item(self, item_id, item_row):
+        """Refreshes the fields with the stored item once it has been fetched (the list row may be stale)."""
+        if not self.edit_mode or item_id != self.item_to_edit_id:
+            return
+        if not item_row:
+            logger.warning(f"Item {item_id} was not found while loading it for edit.")
             return
+        self._fill_item_fields(dict(item_row))
 
-        try:
-            criteria_ratings_list = db_model.get_criterion_ratings_for_item(self.item_to_edit_id)
-            loaded_rating_data = {}
-            calculated_average = 0
-            rated_count = 0
-            has_only_total = False
-
-            if criteria_ratings_list:
-                if len(criteria_ratings_list) == 1 and criteria_ratings_list[0].get('is_overall'):
-                    total_score_rating = criteria_ratings_list[0].get('rating')
-                    loaded_rating_data[OVERALL_CRITERION_NAME] = float(total_score_rating)
-                    has_only_total = True
-                else:
-                    sum_ratings = 0
-                    for rating_info in criteria_ratings_list:
-                        name = rating_info.get('criterion_name')
-                        rating_val = rating_info.get('rating')
-                        if name and rating_val is not None:
-                            loaded_rating_data[name] = float(rating_val)
-                            if not rating_info.get('is_overall'):
-                                sum_ratings += float(rating_val)
-                                rated_count += 1
-                    if rated_count > 0:
-                        calculated_average = round(sum_ratings / rated_count, 1)
-
-            self.rating_data = loaded_rating_data
-            logger.debug(f"Loaded rating data for edit: {self.rating_data}")
+    def apply_edit_ratings(self, item_id, criteria_ratings_list, load_error):
+        """Fills in the rating data of the item being edited once it has been fetched."""
+        if not self.edit_mode or item_id != self.item_to_edit_id:
+            logger.debug(f"Ignoring criteria ratings for item {item_id}, no longer editing it.")
+            return
 
-            if hasattr(self.ids, 'rating_button_text'):
-                if has_only_total:
-                    self.ids.rating_button_text.text = f"Rating: {loaded_rating_data[OVERALL_CRITERION_NAME]:.1f}/10"
-                elif rated_count > 0:
-                    self.ids.rating_button_text.text = f"Rating: {calculated_average:.1f}/10 ({rated_count} criteria)"
-                else:
-                    self.ids.rating_button_text.text = "Set Rating"
-
-        except DatabaseError as e:
-            logger.exception(f"Failed to load criteria ratings for item {self.item_to_edit_id} during edit load.")
+        if load_error is not None:
+            logger.error(f"Failed to load criteria ratings for item {item_id} during edit load: {load_error}")
             self.show_error("Error loading rating details.")
             self.rating_data = {}
             if hasattr(self.ids, 'rating_button_text'):
                 self.ids.rating_button_text.text = "Set Rating (Error)"
+            return
 
-        if hasattr(self.ids, 'top_app_bar_title'):
-            self.ids.top_app_bar_title.text = f"Edit: {item_data.get('name', '')}"
-        if hasattr(self.ids, 'save_button_text'):
-            self.ids.save_button_text.text = "Update"
+        loaded_rating_data = {}
+        calculated_average = 0
+        rated_count = 0
+        has_only_total = False
+
+        if criteria_ratings_list:
+            if len(criteria_ratings_list) == 1 and criteria_ratings_list[0].get('is_overall'):
+                total_score_rating = criteria_ratings_list[0].get('rating')
+                loaded_rating_data[OVERALL_CRITERION_NAME] = float(total_score_rating)
+                has_only_total = True
+            else:
+                sum_ratings = 0
+                for rating_info in criteria_ratings_list:
+                    name = rating_info.get('criterion_name')
+                    rating_val = rating_info.get('rating')
+                    if name and rating_val is not None:
+                        loaded_rating_data[name] = float(rating_val)
+                        if not rating_info.get('is_overall'):
+                            sum_ratings += float(rating_val)
+                            rated_count += 1
+                if rated_count > 0:
+                    calculated_average = round(sum_ratings / rated_count, 1)
+
+        self.rating_data = loaded_rating_data
+        logger.debug(f"Loaded rating data for edit: {self.rating_data}")
+
+        if hasattr(self.ids, 'rating_button_text'):
+            if has_only_total:
+                self.ids.rating_button_text.text = f"Rating: {loaded_rating_data[OVERALL_CRITERION_NAME]:.1f}/10"
+            elif rated_count > 0:
+                self.ids.rating_button_text.text = f"Rating: {calculated_average:.1f}/10 ({rated_count} criteria)"
+            else:
+                self.ids.rating_button_text.text = "Set Rating"
+
+    def show_loading(self, is_loading):
+        """Disables the save button while a save or load is running."""
+        if hasattr(self.ids, 'save_button'):
+            self.ids.save_button.disabled = is_loading
 
     def _create_menu_items(self, items_list, callback):
         return [
@@ -361,9 +389,8 @@ class AddItemScreen(MDScreen):
         self._dismiss_all_dialogs()
 
         app = MDApp.get_running_app()
-        db_model = app.models.get('database')
-        if not db_model:
-            logger.error("Database model not found!")
+        if not hasattr(app, 'add_item_controller'):
+            logger.error("add_item_controller not found!")
             self.show_error("Error: Cannot access database.")
             return
 
@@ -372,9 +399,22 @@ class AddItemScreen(MDScreen):
             self.show_error("Please select item type first to see suggested criteria.")
             return
 
+        app.add_item_controller.load_criteria_choices(selected_type, self._open_criteria_rating_dialog)
+
+    def _open_criteria_rating_dialog(self, suggested_criteria, all_criteria, load_error):
+        """Builds the criteria rating dialog once the criteria lists are available."""
+        if load_error is not None:
+            if isinstance(load_error, DatabaseError):
+                logger.error(f"Database error loading criteria: {load_error}")
+                self.show_error("Error loading criteria from database.")
+            else:
+                logger.error(f"Unexpected error loading criteria: {load_error}", exc_info=load_error)
+                self.show_error("An unexpected error occurred.")
+            return
+
+        self._dismiss_all_dialogs()
         try:
-            suggested_criteria = db_model.get_suggested_criteria(selected_type)
-            self.all_criteria_list = db_model.get_all_criteria()
+            self.all_criteria_list = all_criteria
 
             if not self.all_criteria_list:
                 logger.warning("No criteria found in the database.")
@@ -429,9 +469,6 @@ class AddItemScreen(MDScreen):
             )
             self.criteria_rating_dialog.open()
 
-        except DatabaseError as e:
-            logger.exception("Database error loading criteria.")
-            self.show_error("Error loading criteria from database.")
         except Exception as e:
             logger.exception("Unexpected error opening criteria dialog.")
             self.show_error("An unexpected error occurred.")
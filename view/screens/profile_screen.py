@@ -1,8 +1,12 @@
 import logging
+import os
 
 from kivymd.uix.list import MDListItem, MDListItemHeadlineText, MDListItemTertiaryText
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.menu import MDDropdownMenu
+from kivymd.uix.filemanager import MDFileManager
+
+from model.item_exporter import EXPORT_FORMATS
 
 from kivy.metrics import dp
 from kivymd.app import MDApp
@@ -25,6 +29,10 @@ class ProfileScreen(MDScreen):
 
     sort_column_menu = None
     sort_order_menu = None
+    import_file_manager = None
+    export_format_menu = None
+    export_folder_manager = None
+    _export_format = None
 
     def on_pre_enter(self, *args):
         """Load profile data, clear password fields, and update sort settings."""
@@ -34,6 +42,7 @@ class ProfileScreen(MDScreen):
         self.clear_password_fields()
         self.show_password_feedback("")
         self.show_settings_feedback("")
+        self.show_library_feedback("")
 
         if hasattr(app, 'profile_controller'):
             app.profile_controller.load_profile_data()
@@ -42,6 +51,24 @@ class ProfileScreen(MDScreen):
              logger.error("ProfileScreen Error: profile_controller not found in app.")
         return super().on_pre_enter(*args)
 
+    def on_leave(self, *args):
+        app = MDApp.get_running_app()
+        if hasattr(app, 'profile_controller'):
+            app.profile_controller.cancel_pending()
+        logger.debug(f"<<===== LEAVING screen: {self.name}")
+        return super().on_leave(*args)
+
+    def show_loading(self, is_loading):
+        """Shows or hides the progress bar under the top app bar."""
+        if not hasattr(self.ids, 'loading_indicator'):
+            return
+        indicator = self.ids.loading_indicator
+        indicator.opacity = 1 if is_loading else 0
+        if is_loading:
+            indicator.start()
+        else:
+            indicator.stop()
+
     def display_profile_data(self, user_info, stats):
         """Updates widgets on the screen with user data and statistics."""
         logger.debug(f"Displaying profile data: User={user_info}, Stats={stats}")
@@ -161,6 +188,82 @@ class ProfileScreen(MDScreen):
         else:
             logger.warning("settings_feedback_label ID not found in ProfileScreen.")
 
+    def show_library_feedback(self, message, is_error=False):
+        """Displays a feedback message for import/export actions."""
+        if hasattr(self.ids, 'library_feedback_label'):
+            feedback_label = self.ids.library_feedback_label
+            feedback_label.text = message
+            if is_error:
+                feedback_label.text_color = MDApp.get_running_app().theme_cls.errorColor
+            else:
+                feedback_label.text_color = MDApp.get_running_app().theme_cls.primaryColor
+            feedback_label.height = feedback_label.texture_size[1] if message else 0
+        else:
+            logger.warning("library_feedback_label ID not found in ProfileScreen.")
+
+    def open_import_dialog(self):
+        """Lets the user pick a CSV or JSON lines file to import."""
+        if not self.import_file_manager:
+            self.import_file_manager = MDFileManager(
+                exit_manager=lambda *args: self.import_file_manager.close(),
+                select_path=self._on_import_file_selected,
+                ext=['.csv', '.jsonl', '.ndjson'],
+            )
+        self.import_file_manager.show(os.path.expanduser('~'))
+
+    def _on_import_file_selected(self, path):
+        self.import_file_manager.close()
+        if os.path.isdir(path):
+            return
+        app = MDApp.get_running_app()
+        if hasattr(app, 'profile_controller'):
+            app.profile_controller.import_items(path)
+
+    def open_export_menu(self, caller_widget):
+        """Opens the export format menu; picking a format asks for the target folder."""
+        if not self.export_format_menu:
+            menu_items = [
+                {
+                    "text": label,
+                    "on_release": lambda x=export_format: self._on_export_format_selected(x),
+                } for export_format, (_, label) in EXPORT_FORMATS.items()
+            ]
+            self.export_format_menu = MDDropdownMenu(caller=caller_widget, items=menu_items)
+        self.export_format_menu.caller = caller_widget
+        self.export_format_menu.open()
+
+    def _on_export_format_selected(self, export_format):
+        self.export_format_menu.dismiss()
+        self._export_format = export_format
+        if not self.export_folder_manager:
+            self.export_folder_manager = MDFileManager(
+                exit_manager=lambda *args: self.export_folder_manager.close(),
+                select_path=self._on_export_folder_selected,
+                selector='folder',
+            )
+        self.export_folder_manager.show(os.path.expanduser('~'))
+
+    def _on_export_folder_selected(self, path):
+        self.export_folder_manager.close()
+        app = MDApp.get_running_app()
+        if hasattr(app, 'profile_controller'):
+            app.profile_controller.export_items(path, self._export_format)
+
+    def show_export_progress(self, done, total):
+        """Shows export progress; total None (not known yet) shows an empty bar."""
+        if not hasattr(self.ids, 'export_progress'):
+            return
+        progress = self.ids.export_progress
+        progress.opacity = 1
+        progress.value = (100 * done / total) if total else 0
+        if total:
+            self.show_library_feedback(f"Exporting... {done} / {total} items")
+
+    def hide_export_progress(self):
+        if hasattr(self.ids, 'export_progress'):
+            self.ids.export_progress.opacity = 0
+            self.ids.export_progress.value = 0
+
     def clear_password_fields(self):
         """Clears the password input fields."""
         if hasattr(self.ids, 'current_password'):
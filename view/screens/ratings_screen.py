@@ -1,7 +1,5 @@
 import logging
 
-from model.database_model import DatabaseError
-
 from kivymd.uix.scrollview import MDScrollView
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.boxlayout import MDBoxLayout
@@ -15,14 +13,23 @@ from kivymd.uix.dialog import (
 from kivymd.uix.button import MDButton, MDButtonText
 from kivymd.uix.label import MDLabel
 from kivymd.uix.divider import MDDivider
+from kivymd.uix.list import MDList, MDListItem, MDListItemHeadlineText, MDListItemTrailingCheckbox
+from kivymd.uix.slider import MDSlider
 
 from kivymd.app import MDApp
 
+from kivy.clock import Clock
 from kivy.metrics import dp
 from kivy.core.window import Window
 from kivy.properties import StringProperty, DictProperty
 
+from model.item_filter import ItemFilter
+from model.item_store import ITEM_STATUS_ORDER, ITEM_TYPE_ORDER
+
 OVERALL_CRITERION_NAME = "Total score"
+LOAD_MORE_SCROLL_THRESHOLD = 0.1  # scroll_y below which the next page is requested (0 is the bottom)
+PREFETCH_DELAY = 0.2  # Seconds the list must rest before criterion ratings of visible rows are prefetched
+SEARCH_DEBOUNCE_DELAY = 0.25  # Seconds without typing before the search query is sent
 
 logger = logging.getLogger(__name__)
 
@@ -37,19 +44,62 @@ class RatingRowWidget(MDBoxLayout):
 class RatingsScreen(MDScreen):
     dialog = None
     confirm_dialog = None
+    filter_dialog = None
+
+    def on_kv_post(self, base_widget):
+        self._prefetch_trigger = Clock.create_trigger(self._prefetch_visible_criteria, PREFETCH_DELAY)
+        self._search_trigger = Clock.create_trigger(self._run_search, SEARCH_DEBOUNCE_DELAY)
+        if hasattr(self.ids, 'ratings_rv'):
+            self.ids.ratings_rv.bind(scroll_y=self._on_ratings_scroll)
+        return super().on_kv_post(base_widget)
+
+    def on_search_text(self, text):
+        """Restarts the debounce timer on every keystroke; the search runs once typing pauses."""
+        self._search_trigger.cancel()
+        self._search_trigger()
+
+    def _run_search(self, *args):
+        app = MDApp.get_running_app()
+        if hasattr(app, 'ratings_controller') and hasattr(self.ids, 'search_field'):
+            app.ratings_controller.search(self.ids.search_field.text)
+
+    def _prefetch_visible_criteria(self, *args):
+        """Asks the controller to cache the criterion ratings of the rows currently shown by ratings_rv."""
+        if not hasattr(self.ids, 'ratings_rv'):
+            return
+        rv = self.ids.ratings_rv
+        item_ids = [rv.data[index]['item_data'].get('item_id')
+                    for index in sorted(rv.view_adapter.views) if index < len(rv.data)]
+        item_ids = [item_id for item_id in item_ids if item_id]
+        app = MDApp.get_running_app()
+        if item_ids and hasattr(app, 'ratings_controller'):
+            app.ratings_controller.prefetch_item_criteria(item_ids)
+
+    def _on_ratings_scroll(self, rv, scroll_y):
+        """Requests the next page of items when the list is scrolled close to its end."""
+        self._prefetch_trigger()
+        if not rv.data or scroll_y > LOAD_MORE_SCROLL_THRESHOLD:
+            return
+        app = MDApp.get_running_app()
+        if hasattr(app, 'ratings_controller'):
+            app.ratings_controller.load_more_items()
 
     def on_enter(self, *args):
         logger.debug(f"=====>> ENTERING screen: {self.name}")
         app = MDApp.get_running_app()
         if hasattr(app, 'ratings_controller'):
-            app.ratings_controller.load_items()
+            app.ratings_controller.show_items()
         else:
              logger.debug("RatingsScreen Error: ratings_controller not found in app.")
         return super().on_enter(*args)
 
     def on_leave(self, *args):
+        self._prefetch_trigger.cancel()
         if self.dialog:
             self.dialog.dismiss()
+        app = MDApp.get_running_app()
+        if hasattr(app, 'ratings_controller'):
+            app.ratings_controller.cancel_pending()
         logger.debug(f"<<===== LEAVING screen: {self.name}")
         return super().on_leave(*args)
 
@@ -60,22 +110,63 @@ class RatingsScreen(MDScreen):
         (keys: 'item_id', 'name', 'item_type', etc.).
         """
         if hasattr(self.ids, 'ratings_rv'):
-            formatted_data = []
-            for item_dict in rv_data_from_controller:
-                formatted_data.append({
-                    "name_text": str(item_dict.get('name', '')),
-                    "type_text": str(item_dict.get('item_type', '')),
-                    "status_text": str(item_dict.get('status', '')),
-                    "rating_text": str(item_dict.get('rating', '')),
-                    "item_data": item_dict,
-                })
+            formatted_data = [self._format_rv_row(item_dict) for item_dict in rv_data_from_controller]
 
             logger.debug(f"RatingsScreen: Updating RecycleView data with {len(formatted_data)} items.")
             self.ids.ratings_rv.data = formatted_data
+            self.ids.ratings_rv.scroll_y = 1
             self.ids.ratings_rv.refresh_from_data()
+            self._prefetch_trigger()
+        else:
+             logger.error("RatingsScreen Error: ratings_rv ID not found.")
+
+    def show_loading(self, is_loading):
+        """Shows or hides the progress bar under the list header."""
+        if not hasattr(self.ids, 'loading_indicator'):
+            return
+        indicator = self.ids.loading_indicator
+        indicator.opacity = 1 if is_loading else 0
+        if is_loading:
+            indicator.start()
+        else:
+            indicator.stop()
+
+    def append_data(self, rv_data_from_controller):
+        """Appends the next page of items to the RecycleView, keeping the scroll position."""
+        if not rv_data_from_controller:
+            return
+        if hasattr(self.ids, 'ratings_rv'):
+            formatted_data = [self._format_rv_row(item_dict) for item_dict in rv_data_from_controller]
+            logger.debug(f"RatingsScreen: Appending {len(formatted_data)} items to RecycleView.")
+            self.ids.ratings_rv.data.extend(formatted_data)
         else:
              logger.error("RatingsScreen Error: ratings_rv ID not found.")
 
+    def insert_row(self, index, item_dict):
+        """Inserts a single item at index without rebuilding the list."""
+        if hasattr(self.ids, 'ratings_rv'):
+            self.ids.ratings_rv.data.insert(index, self._format_rv_row(item_dict))
+            self._prefetch_trigger()
+
+    def replace_row(self, index, item_dict):
+        if hasattr(self.ids, 'ratings_rv') and index < len(self.ids.ratings_rv.data):
+            self.ids.ratings_rv.data[index] = self._format_rv_row(item_dict)
+
+    def remove_row(self, index):
+        if hasattr(self.ids, 'ratings_rv') and index < len(self.ids.ratings_rv.data):
+            del self.ids.ratings_rv.data[index]
+
+    @staticmethod
+    def _format_rv_row(item_dict):
+        """Maps a controller item dictionary to RatingRowWidget properties."""
+        return {
+            "name_text": str(item_dict.get('name', '')),
+            "type_text": str(item_dict.get('item_type', '')),
+            "status_text": str(item_dict.get('status', '')),
+            "rating_text": str(item_dict.get('rating', '')),
+            "item_data": item_dict,
+        }
+
     def show_item_details_dialog(self, item_data):
         """
         Creates and displays a dialog with complete information about the item,
@@ -89,13 +180,22 @@ class RatingsScreen(MDScreen):
             return
 
         app = MDApp.get_running_app()
-        db_model = app.models.get('database')
         item_id = item_data.get('item_id')
 
-        if not db_model or not item_id:
-            logger.error(f"Cannot show details: missing model or item_id. Item data: {item_data}")
+        if not hasattr(app, 'ratings_controller') or not item_id:
+            logger.error(f"Cannot show details: missing controller or item_id. Item data: {item_data}")
             return
 
+        app.ratings_controller.load_item_criteria(
+            item_id,
+            lambda criteria_ratings, error: self._open_item_details_dialog(item_data, criteria_ratings, error)
+        )
+
+    def _open_item_details_dialog(self, item_data, criteria_ratings, load_error):
+        """Builds and opens the details dialog once the criterion ratings have been fetched."""
+        self._dismiss_all_dialogs()
+        item_id = item_data.get('item_id')
+
         dialog_content = MDBoxLayout(
             orientation="vertical",
             padding="10dp",
@@ -119,9 +219,7 @@ class RatingsScreen(MDScreen):
             )
         )
 
-        try:
-            criteria_ratings = db_model.get_criterion_ratings_for_item(item_id)
-
+        if load_error is None:
             if criteria_ratings:
                 dialog_content.add_widget(MDDivider())
                 dialog_content.add_widget(
@@ -165,9 +263,8 @@ class RatingsScreen(MDScreen):
                             'is_overall'):
                         dialog_content.add_widget(
                             MDLabel(text="- No specific criteria rated.", adaptive_height=True, italic=True))
-
-        except DatabaseError as e:
-            logger.exception(f"Failed to load criteria ratings for item {item_id}")
+        else:
+            logger.error(f"Failed to load criteria ratings for item {item_id}: {load_error}")
             dialog_content.add_widget(MDDivider())
             dialog_content.add_widget(
                 MDLabel(
@@ -300,9 +397,84 @@ class RatingsScreen(MDScreen):
 
         self._dismiss_all_dialogs()
 
+    def open_filter_dialog(self):
+        """Shows a dialog for filtering the list by type, status and minimum rating."""
+        self._dismiss_all_dialogs()
+        app = MDApp.get_running_app()
+        if not hasattr(app, 'ratings_controller'):
+            logger.error("Cannot open filter dialog: ratings_controller not found in app.")
+            return
+        current_filter = app.ratings_controller.current_filter
+
+        content = MDBoxLayout(orientation="vertical", spacing="8dp", adaptive_height=True)
+        type_checkboxes = self._add_filter_section(content, "Type", ITEM_TYPE_ORDER, current_filter.item_types)
+        status_checkboxes = self._add_filter_section(content, "Status", ITEM_STATUS_ORDER, current_filter.statuses)
+
+        # Slider 0 means "any rating"; 1-10 is the minimum overall rating.
+        min_rating_label = MDLabel(adaptive_height=True)
+        min_rating_slider = MDSlider(min=0, max=10, step=1, value=current_filter.min_rating or 0, value_track=True)
+
+        def update_min_rating_label(instance, value):
+            min_rating_label.text = f"Minimum rating: {int(value)}" if value else "Minimum rating: any"
+
+        min_rating_slider.bind(value=update_min_rating_label)
+        update_min_rating_label(min_rating_slider, min_rating_slider.value)
+        content.add_widget(min_rating_label)
+        content.add_widget(min_rating_slider)
+
+        scroll = MDScrollView(height="400dp", size_hint_y=None)
+        scroll.add_widget(content)
+
+        def apply_filter(*args):
+            self._apply_filter(ItemFilter(
+                item_types=[value for value, checkbox in type_checkboxes.items() if checkbox.active],
+                statuses=[value for value, checkbox in status_checkboxes.items() if checkbox.active],
+                min_rating=min_rating_slider.value or None,
+                max_rating=current_filter.max_rating,
+                created_from=current_filter.created_from,
+                created_to=current_filter.created_to,
+            ))
+
+        self.filter_dialog = MDDialog(
+            MDDialogHeadlineText(text="Filter Ratings"),
+            MDDialogContentContainer(scroll),
+            MDDialogButtonContainer(
+                MDButton(MDButtonText(text="Clear"), style="text",
+                         on_release=lambda *args: self._apply_filter(None)),
+                MDButton(MDButtonText(text="Cancel"), style="text",
+                         on_release=lambda *args: self.filter_dialog.dismiss()),
+                MDButton(MDButtonText(text="Apply"), style="filled", on_release=apply_filter),
+                spacing="8dp",
+            ),
+            size_hint=(0.8, None),
+            on_dismiss=lambda *args: setattr(self, 'filter_dialog', None)
+        )
+        self.filter_dialog.open()
+
+    @staticmethod
+    def _add_filter_section(content, title, values, selected):
+        """Adds a titled checkbox list to the filter dialog; returns {value: checkbox}."""
+        content.add_widget(MDLabel(text=title, adaptive_height=True, bold=True))
+        value_list = MDList(size_hint_y=None)
+        value_list.bind(minimum_height=value_list.setter('height'))
+        checkboxes = {}
+        for value in values:
+            checkbox = MDListItemTrailingCheckbox(active=value in selected)
+            value_list.add_widget(MDListItem(MDListItemHeadlineText(text=value), checkbox))
+            checkboxes[value] = checkbox
+        content.add_widget(value_list)
+        return checkboxes
+
+    def _apply_filter(self, item_filter):
+        if self.filter_dialog:
+            self.filter_dialog.dismiss()
+        app = MDApp.get_running_app()
+        if hasattr(app, 'ratings_controller'):
+            app.ratings_controller.set_filter(item_filter)
+
     def _dismiss_all_dialogs(self):
         """Closes all active dialogs on this screen."""
-        for dialog_attr in ['dialog', 'confirm_dialog']:
+        for dialog_attr in ['dialog', 'confirm_dialog', 'filter_dialog']:
             dialog = getattr(self, dialog_attr, None)
             if dialog:
                 try:
@@ -0,0 +1,21 @@
+from kivymd.uix.screen import MDScreen
+from kivymd.app import MDApp
+
+class SplashScreen(MDScreen):
+    """First screen drawn: shows the startup progress while the database connects in the background."""
+
+    def on_enter(self, *args):
+        self.ids.progress_indicator.start()
+        app = MDApp.get_running_app()
+        if hasattr(app, 'splash_controller'):
+            app.splash_controller.start()
+
+    def on_leave(self, *args):
+        self.ids.progress_indicator.stop()
+
+    def show_status(self, message, is_error=False, can_retry=False):
+        """Displays the startup status; the Retry button is only shown while waiting for a retry."""
+        self.ids.status_label.text = message
+        self.ids.status_label.theme_text_color = "Error" if is_error else "Primary"
+        self.ids.retry_button.opacity = 1 if can_retry else 0
+        self.ids.retry_button.disabled = not can_retry